@@ -0,0 +1,233 @@
+"""
+Offline benchmark for the page parsers
+
+Runs listing extraction and product-detail/PDF extraction against the saved
+fixtures (test_page_source.html, product_page_source.html) and synthetic
+variants scaled up from them. No browser, no network. For every
+backend/fixture pair it reports parses per second, tracemalloc peak memory
+and the number of memory blocks still held by the result. Each run is appended
+to benchmark_results.jsonl with the current git commit so numbers can be
+compared across commits.
+
+tracemalloc only sees Python allocations. libxml2's own memory (lxml) is not
+included, so compare memory between commits for one backend rather than
+across backends.
+
+Usage:
+    python3 benchmark_parsers.py
+    python3 benchmark_parsers.py --scales 1 4 16 --min-time 2 --backend lxml
+"""
+import argparse
+import copy
+import gc
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+
+from lxml import etree
+import lxml.html
+
+from page_parsers import available_backends, get_parser_backend
+
+
+BASE_URL = "https://www.partstown.com"
+HERE = os.path.dirname(os.path.abspath(__file__))
+LISTING_FIXTURE = os.path.join(HERE, 'test_page_source.html')
+PRODUCT_FIXTURE = os.path.join(HERE, 'product_page_source.html')
+RESULTS_FILE = os.path.join(HERE, 'benchmark_results.jsonl')
+
+
+def _backend_parsers(name):
+    backend = get_parser_backend(name)
+    return (
+        lambda content: backend.parse_listing(content, BASE_URL),
+        lambda content: backend.parse_product(content, BASE_URL),
+    )
+
+
+# backend -> (listing parser, product parser); each takes the page bytes.
+# Only installed backends are listed (selectolax is optional).
+BACKENDS = {name: _backend_parsers(name) for name in available_backends()}
+
+
+# -- synthetic fixtures -------------------------------------------------------
+
+def _scale_siblings(doc, xpath, factor, rewrite=None):
+    """Append factor-1 copies of every element matched by xpath next to the originals"""
+    elems = doc.xpath(xpath)
+    for copy_index in range(1, factor):
+        for elem in elems:
+            clone = copy.deepcopy(elem)
+            if rewrite:
+                rewrite(clone, copy_index)
+            elem.getparent().append(clone)
+    return len(elems)
+
+
+def scale_listing(content, factor):
+    """Listing page with factor times as many product items (each with a distinct URL)"""
+    if factor <= 1:
+        return content
+    doc = lxml.html.fromstring(content)
+
+    def rewrite(item, copy_index):
+        for link in item.iter('a'):
+            if link.get('href'):
+                link.set('href', f"{link.get('href')}-{copy_index}")
+        if item.get('data-id'):
+            item.set('data-id', f"{item.get('data-id')}-{copy_index}")
+
+    _scale_siblings(doc, "//li[contains(concat(' ', normalize-space(@class), ' '), ' js-product-item ')]",
+                    factor, rewrite)
+    return etree.tostring(doc, encoding='utf-8', method='html')
+
+
+def scale_product(content, factor):
+    """Product page with factor times as many manual links and detail rows"""
+    if factor <= 1:
+        return content
+    doc = lxml.html.fromstring(content)
+
+    def rewrite(elem, copy_index):
+        for node in elem.iter():
+            href = node.get('href')
+            if href and '.pdf' in href:
+                node.set('href', href.replace('.pdf', f"-{copy_index}.pdf"))
+
+    _scale_siblings(doc, "//*[@data-manual-name] | //a[contains(@href, '.pdf')]", factor, rewrite)
+    _scale_siblings(doc, "//*[contains(concat(' ', normalize-space(@class), ' '), ' product__row ')]", factor)
+    return etree.tostring(doc, encoding='utf-8', method='html')
+
+
+# -- measurement --------------------------------------------------------------
+
+def _result_size(kind, result):
+    if kind == 'listing':
+        return len(result)
+    details, pdf_urls = result
+    return sum(1 for value in details.values() if value) + len(pdf_urls)
+
+
+def measure(func, content, min_time=1.0, min_runs=3):
+    """Time repeated parses, then measure one parse under tracemalloc"""
+    func(content)  # warm-up (imports, compiled XPath caches)
+    runs = 0
+    gc.collect()
+    start = time.perf_counter()
+    while True:
+        result = func(content)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if runs >= min_runs and elapsed >= min_time:
+            break
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        result = func(content)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    retained_blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+    return {
+        'runs': runs,
+        'ops_per_sec': round(runs / elapsed, 3),
+        'ms_per_op': round(elapsed / runs * 1000, 3),
+        'peak_kb': round(peak / 1024, 1),
+        'retained_blocks': retained_blocks,
+    }, result
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=HERE,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_results(path):
+    """Latest earlier result per case key, for the comparison column"""
+    latest = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    run = json.loads(line)
+                except ValueError:
+                    continue
+                for case in run.get('cases', []):
+                    latest[case['key']] = (run.get('commit'), case)
+    return latest
+
+
+def run_benchmarks(backends, scales, min_time, output):
+    with open(LISTING_FIXTURE, 'rb') as f:
+        listing = f.read()
+    with open(PRODUCT_FIXTURE, 'rb') as f:
+        product = f.read()
+
+    fixtures = []
+    for factor in scales:
+        fixtures.append(('listing', f"listing x{factor}", scale_listing(listing, factor)))
+        fixtures.append(('product', f"product x{factor}", scale_product(product, factor)))
+
+    previous = previous_results(output)
+    cases = []
+    print(f"{'case':<28}{'backend':<12}{'KB':>8}{'ops/s':>10}{'ms/op':>10}{'peak KB':>10}{'blocks':>9}{'items':>7}  vs last")
+    for kind, label, content in fixtures:
+        for backend in backends:
+            func = BACKENDS[backend][0 if kind == 'listing' else 1]
+            stats, result = measure(func, content, min_time=min_time)
+            key = f"{backend}:{label}"
+            case = dict(key=key, backend=backend, fixture=label, bytes=len(content),
+                        items=_result_size(kind, result), **stats)
+            cases.append(case)
+
+            change = ''
+            if key in previous:
+                last_commit, last = previous[key]
+                delta = (case['ops_per_sec'] - last['ops_per_sec']) / last['ops_per_sec'] * 100
+                change = f"{delta:+.1f}% ops/s vs {last_commit}"
+            print(f"{label:<28}{backend:<12}{len(content) // 1024:>8}{case['ops_per_sec']:>10.2f}"
+                  f"{case['ms_per_op']:>10.2f}{case['peak_kb']:>10.1f}{case['retained_blocks']:>9}"
+                  f"{case['items']:>7}  {change}")
+
+    record = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'lxml': '.'.join(map(str, etree.LXML_VERSION)),
+        'machine': platform.machine(),
+        'min_time': min_time,
+        'cases': cases,
+    }
+    with open(output, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+    print(f"\nResults appended to {output}")
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the listing and product page parsers on saved fixtures")
+    parser.add_argument('--backend', action='append', choices=sorted(BACKENDS),
+                        help="parser backend to run (repeatable; default: all)")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 4, 16],
+                        help="synthetic size multipliers for the fixtures (default: 1 4 16)")
+    parser.add_argument('--min-time', type=float, default=1.0, help="seconds to spend timing each case (default: 1)")
+    parser.add_argument('--output', default=RESULTS_FILE, help="JSON-lines file results are appended to")
+    args = parser.parse_args()
+    run_benchmarks(args.backend or sorted(BACKENDS), args.scales, args.min_time, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Chrome resource policy for the Selenium workers
+
+Product pages pull in ~2 MB of images, fonts, video and third-party tags that
+never affect extraction. BrowserProfile turns them off: images via Chrome
+prefs, everything else through CDP Network.setBlockedURLs patterns. It also
+sets the page-load strategy and headless mode.
+
+setBlockedURLs only matches URLs, so resource types are mapped to file
+extensions (RESOURCE_TYPE_PATTERNS). Each pattern ends in '*' so versioned
+assets (`logo.png?v=123`) are blocked too. Stylesheets and first-party scripts are
+left alone: visibility checks and the Manuals tab depend on them.
+"""
+
+RESOURCE_TYPE_PATTERNS = {
+    'image': ('*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*', '*.bmp*'),
+    'font': ('*.woff*', '*.ttf*', '*.otf*', '*.eot*'),
+    'media': ('*.mp4*', '*.webm*', '*.ogg*', '*.mp3*', '*.m3u8*'),
+    'stylesheet': ('*.css*',),
+}
+
+# Analytics, A/B testing, chat, maps and social tags seen on product pages
+THIRD_PARTY_PATTERNS = (
+    '*googletagmanager.com*',
+    '*google-analytics.com*',
+    '*doubleclick.net*',
+    '*maps.googleapis.com*',
+    '*youtube.com*',
+    '*monetate.net*',
+    '*visualwebsiteoptimizer.com*',
+    '*heap-api.com*',
+    '*bat.bing.com*',
+    '*analytics.tiktok.com*',
+    '*inside-graph.com*',
+    '*pinimg.com*',
+    '*connect.facebook.net*',
+    '*qualtrics.com*',
+    '*js.stripe.com*',
+    '*trustpilot.com*',
+    '*sirv.com*',
+)
+
+PAGE_LOAD_STRATEGIES = ('normal', 'eager', 'none')
+
+
+class BrowserProfile:
+    def __init__(self, block_images=True, blocked_types=('image', 'font', 'media'),
+                 blocked_url_patterns=THIRD_PARTY_PATTERNS, page_load_strategy='eager', headless=False):
+        if page_load_strategy not in PAGE_LOAD_STRATEGIES:
+            raise ValueError(f"page_load_strategy must be one of {PAGE_LOAD_STRATEGIES}, got {page_load_strategy!r}")
+        unknown = set(blocked_types) - set(RESOURCE_TYPE_PATTERNS)
+        if unknown:
+            raise ValueError(f"unknown resource type(s): {', '.join(sorted(unknown))}")
+        self.block_images = block_images
+        self.blocked_types = tuple(blocked_types)
+        self.blocked_url_patterns = tuple(blocked_url_patterns)
+        self.page_load_strategy = page_load_strategy
+        self.headless = headless
+
+    @classmethod
+    def unrestricted(cls, headless=False):
+        """Load everything, like a regular browser"""
+        return cls(block_images=False, blocked_types=(), blocked_url_patterns=(),
+                   page_load_strategy='normal', headless=headless)
+
+    def blocked_urls(self):
+        """URL patterns for Network.setBlockedURLs"""
+        patterns = list(self.blocked_url_patterns)
+        for resource_type in self.blocked_types:
+            patterns.extend(RESOURCE_TYPE_PATTERNS[resource_type])
+        return patterns
+
+    def ready_states(self):
+        """document.readyState values that count as loaded under this page-load strategy"""
+        if self.page_load_strategy == 'normal':
+            return ('complete',)
+        return ('interactive', 'complete')
+
+    def apply_to_options(self, chrome_options):
+        """Chrome options that must be set before the browser starts"""
+        chrome_options.page_load_strategy = self.page_load_strategy
+        if self.headless:
+            chrome_options.add_argument('--headless=new')
+        if self.block_images:
+            chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+            chrome_options.add_experimental_option(
+                'prefs', {'profile.managed_default_content_settings.images': 2})
+
+    def apply_to_driver(self, driver):
+        """Install the URL block list on a running driver (kept for the driver's lifetime)"""
+        patterns = self.blocked_urls()
+        if patterns:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
@@ -0,0 +1,356 @@
+"""
+Lookup index over the scraped catalog
+
+Built from trane_parts/catalog.jsonl (or catalog.sqlite3, or the part folders'
+product_info.txt / fits_models.json when no catalog was written) into
+trane_parts/catalog_index.sqlite3. It answers, from B-tree indexes:
+
+- exact lookups on Manufacturer # and Parts Town #
+- prefix searches on the same numbers
+- which parts fit a model (reverse index over each part's Fits Models list,
+  collected with scraper_selenium.py --fits-models)
+
+Part and model numbers are compared without case, spaces or punctuation, so
+"PAN-02916" finds "PAN02916". A trailing * turns a lookup into a prefix
+search. The index is rebuilt into a temporary file and swapped in, so
+lookups never see a half-built index; `build` skips the work when the catalog
+has not changed.
+
+Usage:
+    python3 catalog_index.py build
+    python3 catalog_index.py part PAN02916
+    python3 catalog_index.py part "PAN029*" --manufacturer Trane
+    python3 catalog_index.py model 4TTR4036L1000A
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+import uuid
+
+from catalog_sink import read_records
+
+
+DEFAULT_OUTPUT_DIR = "trane_parts"
+INDEX_FILENAME = "catalog_index.sqlite3"
+
+SCHEMA = """
+CREATE TABLE parts (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE NOT NULL,
+    name TEXT,
+    manufacturer TEXT,
+    manufacturer_number TEXT,
+    partstown_number TEXT,
+    list_price TEXT,
+    product_page_url TEXT,
+    model_count INTEGER,
+    scraped_at REAL
+);
+CREATE INDEX parts_manufacturer ON parts (manufacturer COLLATE NOCASE);
+CREATE TABLE part_numbers (
+    key TEXT NOT NULL,
+    field TEXT NOT NULL,
+    part_id INTEGER NOT NULL,
+    PRIMARY KEY (key, part_id, field)
+) WITHOUT ROWID;
+CREATE TABLE models (
+    key TEXT NOT NULL,
+    part_id INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    url TEXT,
+    PRIMARY KEY (key, part_id)
+) WITHOUT ROWID;
+CREATE INDEX models_part ON models (part_id);
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Details field -> part_numbers.field
+NUMBER_FIELDS = {'Manufacturer #': 'manufacturer', 'Parts Town #': 'partstown'}
+
+_NOT_ALNUM = re.compile(r'[^0-9A-Z]')
+
+
+def normalize_key(value):
+    """Lookup key for a part or model number: uppercase letters and digits only"""
+    return _NOT_ALNUM.sub('', str(value).upper()) if value else ''
+
+
+def _prefix_range(prefix):
+    """(low, high) bounds of every key starting with prefix"""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+# -- sources --------------------------------------------------------------
+
+def find_catalog(output_dir):
+    """(path, fmt) of the newest catalog file in output_dir, or (None, None)"""
+    candidates = []
+    for name, fmt in (('catalog.jsonl', 'jsonl'), ('catalog.sqlite3', 'sqlite')):
+        path = os.path.join(output_dir, name)
+        if os.path.exists(path):
+            candidates.append((os.path.getmtime(path), path, fmt))
+    if not candidates:
+        return None, None
+    _, path, fmt = max(candidates)
+    return path, fmt
+
+
+def records_from_part_folders(output_dir):
+    """Catalog-like records read back from product_info.txt (and fits_models.json) in each part folder"""
+    records = []
+    for entry in sorted(os.scandir(output_dir), key=lambda e: e.name):
+        info_path = os.path.join(entry.path, 'product_info.txt')
+        if not entry.is_dir() or not os.path.exists(info_path):
+            continue
+        details, product_url = {}, None
+        with open(info_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                key, sep, value = line.rstrip('\n').partition(': ')
+                if not sep:
+                    continue
+                if key == 'Product Page':
+                    product_url = value
+                elif not key.startswith('PDF '):
+                    details[key] = None if value == 'N/A' else value
+        fits_models = None
+        try:
+            with open(os.path.join(entry.path, 'fits_models.json'), 'r', encoding='utf-8') as f:
+                fits_models = json.load(f)
+        except (OSError, ValueError):
+            pass
+        records.append({'url': product_url or entry.name, 'name': entry.name, 'product_page_url': product_url,
+                        'details': details, 'scraped_at': os.path.getmtime(info_path), 'fits_models': fits_models})
+    return records
+
+
+# -- building -------------------------------------------------------------
+
+def build_index(records, index_path, source=None):
+    """Write a fresh index for records to index_path (atomically); returns (parts, part numbers, models)"""
+    os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+    tmp_path = f"{index_path}.{uuid.uuid4().hex}.tmp"
+    conn = sqlite3.connect(tmp_path)
+    number_count = model_count = 0
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(SCHEMA)
+        with conn:
+            for part_id, record in enumerate(records, 1):
+                details = record.get('details') or {}
+                models = ((record.get('fits_models') or {}).get('models')) or []
+                conn.execute(
+                    "INSERT OR REPLACE INTO parts (id, url, name, manufacturer, manufacturer_number, partstown_number, "
+                    "list_price, product_page_url, model_count, scraped_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (part_id, record['url'], record.get('name'), details.get('Manufacturer'),
+                     details.get('Manufacturer #'), details.get('Parts Town #'), details.get('List Price'),
+                     record.get('product_page_url'), len(models), record.get('scraped_at')))
+                for detail, field in NUMBER_FIELDS.items():
+                    key = normalize_key(details.get(detail))
+                    if key:
+                        conn.execute("INSERT OR IGNORE INTO part_numbers (key, field, part_id) VALUES (?, ?, ?)",
+                                     (key, field, part_id))
+                        number_count += 1
+                for model in models:
+                    name = model.get('name') if isinstance(model, dict) else model
+                    key = normalize_key(name)
+                    if key:
+                        conn.execute("INSERT OR IGNORE INTO models (key, part_id, model, url) VALUES (?, ?, ?, ?)",
+                                     (key, part_id, name, model.get('url') if isinstance(model, dict) else None))
+                        model_count += 1
+            conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                             (('source', json.dumps(source)), ('built_at', str(time.time()))))
+        conn.execute("ANALYZE")
+        conn.commit()
+    except BaseException:
+        conn.close()
+        os.remove(tmp_path)
+        raise
+    conn.close()
+    os.replace(tmp_path, index_path)
+    return len(records), number_count, model_count
+
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def update_index(output_dir=DEFAULT_OUTPUT_DIR, index_path=None, force=False):
+    """Rebuild output_dir/catalog_index.sqlite3 unless the catalog it was built from is unchanged"""
+    index_path = index_path or os.path.join(output_dir, INDEX_FILENAME)
+    started = time.time()
+    catalog_path, fmt = find_catalog(output_dir)
+    source = _source_signature(catalog_path) if catalog_path else None
+    if source and not force and os.path.exists(index_path):
+        index = CatalogIndex(index_path)
+        try:
+            unchanged = index.source() == source
+        finally:
+            index.close()
+        if unchanged:
+            print(f"Catalog index is up to date ({index_path})")
+            return None
+
+    if catalog_path:
+        records = read_records(catalog_path, fmt)
+    else:
+        print(f"No catalog file in {output_dir}; reading the part folders")
+        records = records_from_part_folders(output_dir)
+    parts, numbers, models = build_index(records, index_path, source)
+    print(f"Catalog index: {parts} parts, {numbers} part numbers, {models} model links "
+          f"in {time.time() - started:.1f}s -> {index_path}")
+    return parts, numbers, models
+
+
+# -- lookups --------------------------------------------------------------
+
+_PART_COLUMNS = ("id, url, name, manufacturer, manufacturer_number, partstown_number, list_price, "
+                 "product_page_url, model_count")
+
+
+class CatalogIndex:
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} does not exist; run `python3 catalog_index.py build` first")
+        self.path = path
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+    def close(self):
+        self.conn.close()
+
+    def source(self):
+        """Signature of the catalog file the index was built from"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _parts(self, part_ids):
+        if not part_ids:
+            return []
+        placeholders = ','.join('?' * len(part_ids))
+        sql = f"SELECT {_PART_COLUMNS} FROM parts WHERE id IN ({placeholders})"
+        columns = [column.strip() for column in _PART_COLUMNS.split(',')]
+        rows = {row[0]: dict(zip(columns, row)) for row in self.conn.execute(sql, list(part_ids))}
+        # Keep the order the keys matched in
+        return [rows[part_id] for part_id in part_ids if part_id in rows]
+
+    def find_parts(self, number, field=None, manufacturer=None, limit=50):
+        """
+        Parts whose Manufacturer # or Parts Town # is number ('PAN029*' for a prefix).
+
+        field limits the match to 'manufacturer' or 'partstown'.
+        """
+        prefix = number.endswith('*')
+        key = normalize_key(number.rstrip('*'))
+        if not key:
+            return []
+        # Filter on manufacturer before LIMIT, and group so a part matching several keys counts once
+        sql = "SELECT part_numbers.part_id, MIN(part_numbers.key) AS first_key FROM part_numbers"
+        if manufacturer:
+            sql += " JOIN parts ON parts.id = part_numbers.part_id"
+        if prefix:
+            low, high = _prefix_range(key)
+            sql, params = sql + " WHERE part_numbers.key >= ? AND part_numbers.key < ?", [low, high]
+        else:
+            sql, params = sql + " WHERE part_numbers.key = ?", [key]
+        if field:
+            sql += " AND part_numbers.field = ?"
+            params.append(field)
+        if manufacturer:
+            sql += " AND parts.manufacturer = ? COLLATE NOCASE"
+            params.append(manufacturer)
+        sql += " GROUP BY part_numbers.part_id ORDER BY first_key LIMIT ?"
+        params.append(limit)
+        part_ids = [row[0] for row in self.conn.execute(sql, params)]
+        return self._parts(part_ids)
+
+    def parts_for_model(self, model, manufacturer=None, limit=500):
+        """Parts whose Fits Models list contains model ('4TTR4036*' for every model with that prefix)"""
+        prefix = model.endswith('*')
+        key = normalize_key(model.rstrip('*'))
+        if not key:
+            return []
+        # SQLite takes the bare models.model column from the row holding MIN(key)
+        sql = "SELECT models.part_id, models.model, MIN(models.key) AS first_key FROM models"
+        if manufacturer:
+            sql += " JOIN parts ON parts.id = models.part_id"
+        if prefix:
+            low, high = _prefix_range(key)
+            sql, params = sql + " WHERE models.key >= ? AND models.key < ?", [low, high]
+        else:
+            sql, params = sql + " WHERE models.key = ?", [key]
+        if manufacturer:
+            sql += " AND parts.manufacturer = ? COLLATE NOCASE"
+            params.append(manufacturer)
+        sql += " GROUP BY models.part_id ORDER BY first_key LIMIT ?"
+        params.append(limit)
+        matched = {part_id: model_name for part_id, model_name, _ in self.conn.execute(sql, params)}
+        parts = self._parts(list(matched))
+        for part in parts:
+            part['model'] = matched[part['id']]
+        return parts
+
+    def models_for_part(self, url):
+        """Model names a part fits, by product URL"""
+        return [row[0] for row in self.conn.execute(
+            "SELECT models.model FROM models JOIN parts ON parts.id = models.part_id WHERE parts.url = ? "
+            "ORDER BY models.key", (url,))]
+
+
+def _print_parts(parts):
+    for part in parts:
+        model = f"  fits {part['model']}" if part.get('model') else ''
+        print(f"{part['partstown_number'] or '-':<16}{part['manufacturer_number'] or '-':<18}"
+              f"{(part['manufacturer'] or '-')[:14]:<16}{part['list_price'] or '-':>11}  {part['name']}{model}")
+        print(f"{'':<16}{part['product_page_url'] or part['url']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up scraped parts by part number or by the model they fit")
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR, help="scraper output folder (default: trane_parts)")
+    parser.add_argument('--index', default=None, help="index file (default: <output-dir>/catalog_index.sqlite3)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="(re)build the index from the catalog")
+    build.add_argument('--force', action='store_true', help="rebuild even if the catalog has not changed")
+    for name, help_text in (('part', "parts by Manufacturer # or Parts Town # (NUMBER* for a prefix)"),
+                            ('model', "parts that fit a model (MODEL* for a prefix)")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('query')
+        command.add_argument('--manufacturer', default=None, help="only parts from this manufacturer")
+        command.add_argument('--limit', type=int, default=50 if name == 'part' else 500,
+                             help="maximum number of parts to show")
+        command.add_argument('--json', action='store_true', help="print the results as JSON")
+    commands.choices['part'].add_argument('--field', choices=sorted(NUMBER_FIELDS.values()), default=None,
+                                          help="only match this part number field")
+    args = parser.parse_args()
+
+    index_path = args.index or os.path.join(args.output_dir, INDEX_FILENAME)
+    if args.command == 'build':
+        update_index(args.output_dir, index_path, force=args.force)
+        return
+
+    index = CatalogIndex(index_path)
+    try:
+        started = time.perf_counter()
+        if args.command == 'part':
+            parts = index.find_parts(args.query, field=args.field, manufacturer=args.manufacturer, limit=args.limit)
+        else:
+            parts = index.parts_for_model(args.query, manufacturer=args.manufacturer, limit=args.limit)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    finally:
+        index.close()
+    if args.json:
+        print(json.dumps(parts, indent=1))
+        return
+    _print_parts(parts)
+    print(f"{len(parts)} part(s) in {elapsed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
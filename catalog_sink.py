@@ -0,0 +1,178 @@
+"""
+Structured catalog output written by a single background thread
+
+Workers hand one record per scraped part to CatalogSink.write(); the writer
+thread appends them to trane_parts/catalog.jsonl (or upserts them into a
+SQLite table) in batches, so the whole catalog can be loaded with one
+sequential read. At the end of a run the records can be rolled into a
+Parquet file when pyarrow is installed.
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+FORMATS = ('jsonl', 'sqlite')
+
+_STOP = object()
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parts (
+    url TEXT PRIMARY KEY,
+    name TEXT,
+    product_page_url TEXT,
+    details TEXT,
+    pdf_urls TEXT,
+    pdf_files TEXT,
+    scraped_at REAL,
+    fits_models TEXT
+);
+"""
+
+
+def ensure_schema(conn):
+    """Create the parts table, adding columns that catalogs from older versions lack"""
+    conn.executescript(SQLITE_SCHEMA)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(parts)")]
+    if 'fits_models' not in columns:
+        conn.execute("ALTER TABLE parts ADD COLUMN fits_models TEXT")
+
+
+def make_record(part, details, product_page_url, pdf_urls, pdf_files, fits_models=None):
+    """One catalog row for a scraped part; fits_models is a ModelListFetcher result, if fetched"""
+    return {
+        'url': part['url'],
+        'name': part['name'],
+        'product_page_url': product_page_url,
+        'details': details,
+        'pdf_urls': list(pdf_urls),
+        'pdf_files': list(pdf_files),
+        'scraped_at': time.time(),
+        'fits_models': fits_models,
+    }
+
+
+class CatalogSink:
+    def __init__(self, path, fmt='jsonl', batch_size=200, queue_size=1000):
+        if fmt not in FORMATS:
+            raise ValueError(f"fmt must be one of {FORMATS}, got {fmt!r}")
+        self.path = path
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.written = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._drain, name='catalog-writer', daemon=True)
+        self._thread.start()
+
+    def write(self, record):
+        """Queue a record; blocks while the writer is behind"""
+        self._queue.put(record)
+
+    def _drain(self):
+        if self.fmt == 'sqlite':
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            ensure_schema(conn)
+            out = None
+        else:
+            conn = None
+            out = open(self.path, 'a', encoding='utf-8')
+        try:
+            stopping = False
+            while not stopping:
+                batch = [self._queue.get()]
+                # Take whatever else is already waiting, up to one batch
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if batch[-1] is _STOP:
+                    batch.pop()
+                    stopping = True
+                try:
+                    if batch:
+                        self._write_batch(batch, conn, out)
+                except Exception as e:
+                    print(f"Catalog writer error ({len(batch)} record(s) lost): {e}")
+        finally:
+            if conn is not None:
+                conn.close()
+            if out is not None:
+                out.close()
+
+    def _write_batch(self, batch, conn, out):
+        if conn is not None:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO parts (url, name, product_page_url, details, pdf_urls, pdf_files, scraped_at, "
+                    "fits_models) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(r['url'], r['name'], r['product_page_url'], json.dumps(r['details']),
+                      json.dumps(r['pdf_urls']), json.dumps(r['pdf_files']), r['scraped_at'],
+                      json.dumps(r.get('fits_models'))) for r in batch])
+        else:
+            out.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in batch))
+            out.flush()
+        self.written += len(batch)
+
+    def write_parquet(self, path):
+        """Roll the catalog into a Parquet file; returns False without pyarrow"""
+        return write_parquet(self.path, self.fmt, path)
+
+    def close(self):
+        """Write everything still queued and stop the writer thread"""
+        self._queue.put(_STOP)
+        self._thread.join()
+        print(f"Catalog: {self.written} record(s) written to {self.path}")
+
+
+def read_records(path, fmt='jsonl'):
+    """Every record in a catalog file, latest scrape per part URL"""
+    latest = {}
+    if fmt == 'sqlite':
+        conn = sqlite3.connect(path)
+        try:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(parts)")]
+            models_column = 'fits_models' if 'fits_models' in columns else 'NULL'
+            for url, name, page_url, details, pdf_urls, pdf_files, scraped_at, fits_models in conn.execute(
+                    "SELECT url, name, product_page_url, details, pdf_urls, pdf_files, scraped_at, "
+                    f"{models_column} FROM parts"):
+                latest[url] = {'url': url, 'name': name, 'product_page_url': page_url,
+                               'details': json.loads(details), 'pdf_urls': json.loads(pdf_urls),
+                               'pdf_files': json.loads(pdf_files), 'scraped_at': scraped_at,
+                               'fits_models': json.loads(fits_models) if fits_models else None}
+        finally:
+            conn.close()
+    elif os.path.exists(path):
+        # Appended across runs; a later line for the same part replaces the earlier one
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    latest[record['url']] = record
+    return list(latest.values())
+
+
+def write_parquet(path, fmt, dest):
+    """Write a catalog file to Parquet with one column per detail field; returns False without pyarrow"""
+    if pyarrow is None:
+        print("pyarrow is not installed; skipping Parquet export")
+        return False
+    rows = []
+    for record in read_records(path, fmt):
+        row = {key: value for key, value in record.items() if key != 'details'}
+        row.update(record['details'] or {})
+        rows.append(row)
+    pyarrow.parquet.write_table(pyarrow.Table.from_pylist(rows), dest)
+    print(f"Wrote {len(rows)} parts to {dest}")
+    return True
@@ -0,0 +1,101 @@
+"""
+Circuit breaker that pauses the whole worker pool during an outage
+
+Workers call wait() before each page and record() with the outcome and the
+token wait() returned. When at least failure_rate of the last `window`
+outcomes failed, the circuit opens and every wait() blocks for `cooldown`
+seconds instead of burning browser time against a site that is down. After
+the cooldown one caller is let through as a probe. If it succeeds the
+circuit closes; if it fails, or does not report within probe_timeout, the
+circuit opens again with twice the cooldown (up to max_cooldown). Outcomes
+of work that started before the circuit last changed state are ignored.
+"""
+import threading
+import time
+from collections import deque
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreaker:
+    def __init__(self, window=50, failure_rate=0.5, min_calls=20, cooldown=60.0, max_cooldown=900.0,
+                 probe_timeout=120.0):
+        self.window = window
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls  # don't judge the rate on fewer outcomes than this
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_timeout = probe_timeout
+        self.state = CLOSED
+        self.trips = 0
+        self.paused_seconds = 0.0
+        self._outcomes = deque(maxlen=window)
+        self._current_cooldown = cooldown
+        self._open_until = 0.0
+        self._probe_deadline = 0.0
+        self._generation = 0  # bumped on every state change; wait() hands it out as the token
+        self._cond = threading.Condition()
+
+    def _set_state(self, state):
+        self.state = state
+        self._generation += 1
+
+    def _open(self, cooldown, reason):
+        self._set_state(OPEN)
+        self._current_cooldown = min(cooldown, self.max_cooldown)
+        self._open_until = time.monotonic() + self._current_cooldown
+        self.trips += 1
+        self.paused_seconds += self._current_cooldown
+        print(f"Circuit breaker open ({reason}); pausing workers for {self._current_cooldown:.0f}s")
+        self._cond.notify_all()
+
+    def record(self, ok, token=None):
+        """Report the outcome of one page/part; token is what wait() returned before the work"""
+        with self._cond:
+            if token is not None and token != self._generation:
+                # Started before the circuit opened (or before the probe); not evidence either way
+                return
+            if self.state == HALF_OPEN:
+                if ok:
+                    self._set_state(CLOSED)
+                    self._outcomes.clear()
+                    self._current_cooldown = self.cooldown
+                    print("Circuit breaker closed; resuming workers")
+                    self._cond.notify_all()
+                else:
+                    self._open(self._current_cooldown * 2, "probe failed")
+                return
+            if self.state == OPEN:
+                # Work that was already running when the circuit opened
+                return
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures >= self.failure_rate * len(self._outcomes):
+                self._open(self.cooldown, f"{failures} of the last {len(self._outcomes)} failed")
+
+    def wait(self):
+        """Block while the circuit is open; returns a token to pass to record() once work may go ahead"""
+        with self._cond:
+            while True:
+                if self.state == CLOSED:
+                    return self._generation
+                if self.state == OPEN:
+                    remaining = self._open_until - time.monotonic()
+                    if remaining <= 0:
+                        # This caller is the probe; the others wait for its outcome
+                        self._set_state(HALF_OPEN)
+                        self._probe_deadline = time.monotonic() + self.probe_timeout
+                        return self._generation
+                    self._cond.wait(remaining)
+                else:
+                    remaining = self._probe_deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._open(self._current_cooldown * 2, "probe did not report back")
+                        continue
+                    self._cond.wait(remaining)
+
+    def summary(self):
+        return f"Circuit breaker: {self.trips} trip(s), {self.paused_seconds:.0f}s paused"
@@ -0,0 +1,203 @@
+"""
+SQLite crawl-state store used to resume an interrupted run
+
+Records discovered parts and their status, finished listing pages and PDF
+jobs. Writes from the worker threads are buffered and committed in batches;
+the database runs in WAL mode so checkpoints don't stall the pool.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+
+PENDING = 'pending'
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parts (
+    url TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    seq INTEGER,
+    listing TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS parts_status ON parts (status);
+CREATE TABLE IF NOT EXISTS listing_pages (
+    page INTEGER PRIMARY KEY,
+    part_count INTEGER NOT NULL,
+    done_at REAL
+);
+CREATE TABLE IF NOT EXISTS pdf_jobs (
+    dest TEXT PRIMARY KEY,
+    pdf_url TEXT NOT NULL,
+    part_name TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS pdf_jobs_status ON pdf_jobs (status);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class CrawlState:
+    def __init__(self, path, batch_size=200, flush_interval=2.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(parts)")}
+        if 'listing' not in columns:
+            # State files from before listing attributes were recorded
+            self._conn.execute("ALTER TABLE parts ADD COLUMN listing TEXT")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM parts").fetchone()[0]
+
+    # -- batching -------------------------------------------------------
+
+    def _queue(self, sql, params):
+        with self._lock:
+            self._pending.append((sql, params))
+            due = (len(self._pending) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+            if due:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if self._pending:
+            with self._conn:
+                for sql, params in self._pending:
+                    self._conn.execute(sql, params)
+            self._pending = []
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        """Commit all buffered writes"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    # -- lifecycle ------------------------------------------------------
+
+    def reset(self):
+        """Forget everything from earlier runs (used for a fresh, non-resumed crawl)"""
+        with self._lock:
+            self._pending = []
+            with self._conn:
+                for table in ('parts', 'listing_pages', 'pdf_jobs', 'meta'):
+                    self._conn.execute(f"DELETE FROM {table}")
+            self._seq = 0
+
+    def set_meta(self, key, value):
+        self._queue("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def get_meta(self, key, default=None):
+        self.flush()
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    # -- listing --------------------------------------------------------
+
+    def add_parts(self, parts):
+        """Record discovered parts; parts already known keep their status"""
+        with self._lock:
+            for part in parts:
+                self._seq += 1
+                self._pending.append((
+                    "INSERT OR IGNORE INTO parts (url, name, status, seq, listing, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (part['url'], part['name'], PENDING, self._seq,
+                     json.dumps(part.get('listing')) if part.get('listing') else None, time.time())))
+            self._flush_locked()
+
+    def mark_listing_page(self, page, part_count):
+        self._queue("INSERT OR REPLACE INTO listing_pages (page, part_count, done_at) VALUES (?, ?, ?)",
+                    (page, part_count, time.time()))
+
+    def listing_pages_done(self):
+        self.flush()
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT page FROM listing_pages")}
+
+    # -- parts ----------------------------------------------------------
+
+    def mark_part(self, url, status, error=None):
+        if status == IN_PROGRESS:
+            self._queue("UPDATE parts SET status = ?, attempts = attempts + 1, updated_at = ? WHERE url = ?",
+                        (status, time.time(), url))
+        else:
+            self._queue("UPDATE parts SET status = ?, error = ?, updated_at = ? WHERE url = ?",
+                        (status, error, time.time(), url))
+
+    def mark_parts(self, urls, status):
+        """Set the status of many parts in one transaction"""
+        now = time.time()
+        with self._lock:
+            self._pending.extend(("UPDATE parts SET status = ?, updated_at = ? WHERE url = ?", (status, now, url))
+                                 for url in urls)
+            self._flush_locked()
+
+    def _iter_batches(self, sql, params, batch_size):
+        """Rows in seq order, batch_size at a time; sql selects seq first and ends with 'seq > ?'"""
+        self.flush()
+        last_seq = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(f"{sql} ORDER BY seq LIMIT ?",
+                                          params + (last_seq, batch_size)).fetchall()
+            if not rows:
+                return
+            last_seq = rows[-1][0]
+            yield from rows
+
+    def iter_part_urls(self, batch_size=5000):
+        """URL of every discovered part, without loading them all at once"""
+        for _, url in self._iter_batches("SELECT seq, url FROM parts WHERE seq > ?", (), batch_size):
+            yield url
+
+    def iter_unfinished_parts(self, batch_size=1000):
+        """Parts that are pending, failed or were in progress when the last run died, read in batches"""
+        for _, name, url in self._iter_batches(
+                "SELECT seq, name, url FROM parts WHERE status != ? AND seq > ?", (DONE,), batch_size):
+            yield {'name': name, 'url': url}
+
+    def counts(self):
+        """Number of parts per status"""
+        self.flush()
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM parts GROUP BY status").fetchall())
+
+    # -- PDF jobs -------------------------------------------------------
+
+    def mark_pdf_job(self, dest, pdf_url, part_name, status):
+        self._queue(
+            "INSERT INTO pdf_jobs (dest, pdf_url, part_name, status, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(dest) DO UPDATE SET pdf_url = excluded.pdf_url, status = excluded.status, "
+            "updated_at = excluded.updated_at",
+            (dest, pdf_url, part_name, status, time.time()))
+
+    def unfinished_pdf_jobs(self):
+        """PDF jobs that were queued or failed and never completed"""
+        self.flush()
+        with self._lock:
+            return self._conn.execute(
+                "SELECT part_name, pdf_url, dest FROM pdf_jobs WHERE status != ?", (DONE,)).fetchall()
@@ -0,0 +1,160 @@
+"""
+JavaScript injected into product pages so a whole page state is read in one
+WebDriver round-trip instead of one call per element/attribute
+"""
+
+# Shared helpers; collect() mirrors the selectors used by the per-element path
+_COLLECT_JS = r"""
+var clean = function (t) { return (t || '').replace(/\s+/g, ' ').trim(); };
+var visible = function (el) {
+    return !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+};
+// Like WebElement.text: hidden elements read as empty
+var text = function (el) { return visible(el) ? clean(el.innerText) : ''; };
+var first = function (xpath, ctx) {
+    return document.evaluate(xpath, ctx || document, null,
+        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+};
+var all = function (xpath, ctx) {
+    var snap = document.evaluate(xpath, ctx || document, null,
+        XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    var out = [];
+    for (var i = 0; i < snap.snapshotLength; i++) { out.push(snap.snapshotItem(i)); }
+    return out;
+};
+var href = function (el) { return el.href || el.getAttribute('href') || null; };
+
+function collectPdfs(ctx) {
+    var pdfs = [];
+    all(".//*[@data-manual-name]", ctx).forEach(function (el) {
+        pdfs.push({href: href(el), manualName: el.getAttribute('data-manual-name'), popup: false});
+    });
+    all(".//a[contains(@href, '.pdf')]", ctx).forEach(function (el) {
+        pdfs.push({href: href(el), manualName: null, popup: false});
+    });
+    all(".//ul[contains(@class, 'data-sheet__popup__list')]//a | " +
+        ".//div[contains(@class, 'popup')]//a[contains(@href, '.pdf')] | " +
+        ".//div[contains(@class, 'data-sheet__popup')]//a", ctx).forEach(function (el) {
+        pdfs.push({href: href(el), manualName: el.getAttribute('data-manual-name'), popup: true});
+    });
+    return pdfs;
+}
+
+function collect() {
+    var out = {rows: [], listPrice: null, priceRowText: null, priceFallbackText: null,
+               prop65: null, pdfs: collectPdfs(document)};
+
+    document.querySelectorAll('.product-info .product__row').forEach(function (row) {
+        var label = row.querySelector('.product__label');
+        var val = row.querySelector('.product__val');
+        if (!label || !val) { return; }
+        var modelsText = null;
+        var links = row.querySelectorAll('a');
+        for (var i = 0; i < links.length; i++) {
+            var a = links[i];
+            if ((a.getAttribute('href') || '').indexOf('#') !== -1 || (a.textContent || '').indexOf('View') !== -1) {
+                modelsText = a.getAttribute('title') || text(a);
+                break;
+            }
+        }
+        out.rows.push({label: text(label), value: text(val), modelsText: modelsText});
+    });
+
+    var price = document.querySelector('[data-listprice]');
+    if (price) {
+        out.listPrice = {data: price.getAttribute('data-listprice'), text: text(price)};
+    } else {
+        var priceRow = first("//div[contains(@class, 'product__row')]//div[contains(@class, 'product__label') " +
+            "and contains(text(), 'List Price')]/following-sibling::div[@class='product__cell product__val']");
+        if (priceRow) { out.priceRowText = text(priceRow); }
+        var fallback = document.querySelector('.js-product-listPrice, .price-vat');
+        if (fallback) { out.priceFallbackText = text(fallback); }
+    }
+
+    var cal = first("//*[contains(text(), 'California Residents') or contains(text(), 'Prop 65')]");
+    if (cal && cal.parentElement) { out.prop65 = text(cal.parentElement); }
+    return out;
+}
+"""
+
+# Synchronous: read the current page state
+BULK_EXTRACT_SCRIPT = _COLLECT_JS + "\nreturn collect();"
+
+# Asynchronous: open the Manuals & Diagrams tab and scroll for lazy-loaded PDFs,
+# collecting after every step, then hand everything back in a single callback.
+# arguments: tabWaitMs, scrollDelayMs, scrollSteps, callback
+REVEAL_PDFS_SCRIPT = _COLLECT_JS + r"""
+var tabWaitMs = arguments[0], scrollDelayMs = arguments[1], scrollSteps = arguments[2];
+var done = arguments[arguments.length - 1];
+var found = [];
+var wait = function (ms) { return new Promise(function (r) { setTimeout(r, ms); }); };
+
+(async function () {
+    try {
+        var tab = first("//a[@href='#manualsDiagrams'] | //a[contains(@href, '#manualsDiagrams')] | " +
+            "//li[@role='tab']//a[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'manuals') " +
+            "and contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'diagrams')]");
+        if (tab && visible(tab)) {
+            tab.scrollIntoView({block: 'center'});
+            tab.click();
+            // Poll for the tab content instead of a fixed delay
+            var deadline = Date.now() + tabWaitMs;
+            while (Date.now() < deadline) {
+                var pane = document.getElementById('manualsDiagrams');
+                if (pane && visible(pane) && first(".//a[contains(@href, '.pdf')] | .//*[@data-manual-name]", pane)) { break; }
+                await wait(200);
+            }
+            found = found.concat(collectPdfs(document));
+
+            var section = first("//div[@id='manualsDiagrams'] | //div[contains(@class, 'manuals')] | //section[@id='manualsDiagrams']");
+            if (section) {
+                for (var i = 0; i < scrollSteps; i++) {
+                    section.scrollTop += 300;
+                    await wait(scrollDelayMs);
+                    found = found.concat(collectPdfs(section));
+                }
+            }
+        }
+        found = found.concat(collectPdfs(document));
+        for (var j = 0; j < scrollSteps; j++) {
+            window.scrollBy(0, 500);
+            await wait(scrollDelayMs);
+            found = found.concat(collectPdfs(document));
+        }
+        done({pdfs: found, error: null});
+    } catch (e) {
+        done({pdfs: found, error: String(e)});
+    }
+})();
+"""
+
+
+# Listing attributes kept per part so later runs can tell what changed
+LISTING_ATTRIBUTES = (
+    'data-id',
+    'data-mfrpartnumber',
+    'data-pt-price',
+    'data-quantityonhand',
+    'data-stock-status',
+    'data-units',
+)
+
+# Synchronous: every product item on a listing page with its name, link and attributes
+# arguments: item selector, attribute names
+LISTING_EXTRACT_SCRIPT = r"""
+var selector = arguments[0], attrNames = arguments[1];
+var out = [];
+document.querySelectorAll(selector).forEach(function (el) {
+    var link = el.querySelector('a');
+    if (!link) { return; }
+    var name = el.getAttribute('data-name');
+    if (!name) { name = (link.innerText || '').trim(); }
+    var attrs = {};
+    attrNames.forEach(function (attr) {
+        var value = el.getAttribute(attr);
+        if (value !== null) { attrs[attr] = value; }
+    });
+    out.push({name: name, url: link.href || link.getAttribute('href'), listing: attrs});
+});
+return out;
+"""
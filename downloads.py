@@ -0,0 +1,159 @@
+"""
+Resumable, integrity-checked file downloads shared by both scrapers
+
+Data is streamed into `<dest>.part`. If a previous attempt left a partial file,
+the transfer continues with an HTTP Range request. The response's ETag (or
+Last-Modified) is kept in `<dest>.part.validator` and sent as If-Range, so a
+file that changed on the server is fetched from the start instead of being
+appended to the old prefix. The file is only renamed into place once its size
+matches Content-Length and it starts like a PDF. The SHA-256 is computed while
+streaming.
+"""
+import hashlib
+import os
+import re
+
+import requests
+
+from rate_limiter import limited_get
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# The PDF spec allows a little junk before the header, so look at the first 1 KB
+PDF_MAGIC = b'%PDF'
+PDF_MAGIC_WINDOW = 1024
+
+
+class IntegrityError(Exception):
+    """Downloaded bytes failed the size or content check"""
+
+
+def _hash_existing(path, chunk_size):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest
+
+
+def _expected_total(response, offset):
+    """Full file size announced by the server, or None if unknown"""
+    if response.headers.get('Content-Encoding', 'identity') not in ('identity', ''):
+        # Length refers to the compressed body; requests hands us decoded bytes
+        return None
+    if response.status_code == 206:
+        match = re.search(r'/(\d+)\s*$', response.headers.get('Content-Range', ''))
+        if match:
+            return int(match.group(1))
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit():
+        return offset + int(length)
+    return None
+
+
+def _validator(response):
+    """A strong ETag or the Last-Modified date of a response, usable in If-Range"""
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('Last-Modified')
+
+
+def _read_validator(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _remove(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def download_file(session, url, filepath, chunk_size=DEFAULT_CHUNK_SIZE, timeout=60, expect_pdf=True, limiter=None):
+    """
+    Download url to filepath, resuming a leftover `.part` file when possible.
+
+    Returns the SHA-256 hex digest of the complete file. Raises
+    requests.RequestException on transfer errors (the partial file is kept for
+    the next attempt) and IntegrityError when the result is not a valid PDF.
+    Requests are paced through limiter (an AdaptiveRateLimiter) on its 'pdf' lane when given.
+    """
+    part_path = f"{filepath}.part"
+    validator_path = f"{part_path}.validator"
+    os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    validator = _read_validator(validator_path) if offset else None
+    # Without a validator the server could not tell us the file changed; start over
+    offset = offset if validator else 0
+    headers = {'Range': f'bytes={offset}-', 'If-Range': validator} if offset else {}
+    response = limited_get(limiter, session, url, lane='pdf', timeout=timeout, stream=True, headers=headers)
+    try:
+        if offset and response.status_code == 416:
+            # Nothing left to fetch or the file changed; start over
+            response.close()
+            os.remove(part_path)
+            _remove(validator_path)
+            offset = 0
+            response = limited_get(limiter, session, url, lane='pdf', timeout=timeout, stream=True)
+        response.raise_for_status()
+
+        if offset and response.status_code == 206:
+            # Hash the bytes we already have, then append the rest
+            digest = _hash_existing(part_path, chunk_size)
+            mode = 'ab'
+        else:
+            # Fresh download, or If-Range said the file changed (or Range was ignored): 200 with the full body
+            offset = 0
+            digest = hashlib.sha256()
+            mode = 'wb'
+            validator = _validator(response)
+            if validator:
+                with open(validator_path, 'w', encoding='utf-8') as f:
+                    f.write(validator)
+            else:
+                _remove(validator_path)
+
+        expected = _expected_total(response, offset)
+        with open(part_path, mode) as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    digest.update(chunk)
+                    f.write(chunk)
+    finally:
+        response.close()
+
+    size = os.path.getsize(part_path)
+    if expected is not None and size != expected:
+        if size > expected:
+            os.remove(part_path)
+            _remove(validator_path)
+        raise IntegrityError(f"size mismatch for {url}: got {size} bytes, expected {expected}")
+
+    if expect_pdf:
+        with open(part_path, 'rb') as f:
+            head = f.read(PDF_MAGIC_WINDOW)
+        if PDF_MAGIC not in head:
+            # Usually an HTML error page; resuming it would never help
+            os.remove(part_path)
+            _remove(validator_path)
+            raise IntegrityError(f"not a PDF: {url}")
+
+    os.replace(part_path, filepath)
+    _remove(validator_path)
+    return digest.hexdigest()
+
+
+def download_pdf_file(session, url, filepath, chunk_size=DEFAULT_CHUNK_SIZE, timeout=60, limiter=None):
+    """download_file wrapper that prints the outcome and returns the SHA-256 or None"""
+    try:
+        sha256 = download_file(session, url, filepath, chunk_size=chunk_size, timeout=timeout, limiter=limiter)
+        print(f"Downloaded: {os.path.basename(filepath)}")
+        return sha256
+    except (requests.exceptions.RequestException, IntegrityError, OSError) as e:
+        print(f"Failed to download PDF {url}: {e}")
+        return None
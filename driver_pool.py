@@ -0,0 +1,93 @@
+"""
+Pool of long-lived Selenium WebDriver instances shared by the worker threads
+"""
+import queue
+import threading
+from contextlib import contextmanager
+
+
+class DriverPool:
+    def __init__(self, factory, size):
+        """Create a pool of `size` drivers; drivers are started lazily by `factory`"""
+        self.factory = factory
+        self.size = size
+        self._slots = queue.Queue()
+        self._drivers = []
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(size):
+            # None marks a slot whose driver has not been started (or was discarded)
+            self._slots.put(None)
+
+    def checkout(self, timeout=None):
+        """Take a driver out of the pool, starting one if the slot is empty"""
+        driver = self._slots.get(timeout=timeout)
+        if driver is None:
+            try:
+                driver = self.factory()
+            except Exception:
+                self._slots.put(None)
+                raise
+            # Popup state is remembered per driver so handle_popups can skip
+            # modals this browser session already cleared
+            driver.popups_cleared = False
+            with self._lock:
+                self._drivers.append(driver)
+        return driver
+
+    def checkin(self, driver):
+        """Return a healthy driver to the pool"""
+        if self._closed:
+            self._quit(driver)
+            return
+        self._slots.put(driver)
+
+    def discard(self, driver):
+        """Quit a broken driver and free its slot for a fresh one"""
+        self._quit(driver)
+        self._slots.put(None)
+
+    @contextmanager
+    def driver(self):
+        """Check out a driver for the duration of a `with` block"""
+        driver = self.checkout()
+        try:
+            yield driver
+        except Exception:
+            if not self.is_alive(driver):
+                self.discard(driver)
+                driver = None
+            raise
+        finally:
+            if driver is not None:
+                self.checkin(driver)
+
+    def is_alive(self, driver):
+        """Check that the browser behind a driver still responds"""
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, driver):
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        """Quit every driver the pool started"""
+        self._closed = True
+        with self._lock:
+            drivers = list(self._drivers)
+            self._drivers = []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        print(f"Driver pool closed ({len(drivers)} browser(s))")
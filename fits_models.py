@@ -0,0 +1,271 @@
+"""
+"Fits Models" (compatible equipment) lists without a browser
+
+The product page only renders the first few models of a part (the Vue
+component pages the rest in over XHR), and the details row just says
+"View Models List". ModelListFetcher reads the list from the data embedded in
+the page (ACC.pageData.fitsModelsData, rendered js-model-item rows when the
+HTML came from a browser, and data-model-number attributes) and, when an
+endpoint is configured, pages through the JSON endpoint for the rest.
+
+The endpoint path is a template so it can follow the site without a code
+change; DEFAULT_ENDPOINT matches mock_server.py. Responses are read Hybris-style:
+{"results": [...], "pagination": {"currentPage", "numberOfPages",
+"totalNumberOfResults", "pageSize"}}; a bare JSON list also works.
+
+Usage:
+    python3 fits_models.py https://www.partstown.com/trane/trnpan02916 --output models.json
+"""
+import argparse
+import json
+import re
+import time
+from urllib.parse import urljoin, urldefrag, urlparse
+
+import requests
+from lxml import etree
+
+from page_parsers import parse_html
+from rate_limiter import AdaptiveRateLimiter, limited_get
+
+
+DEFAULT_ENDPOINT = "/p/{code}/fits-models?page={page}&pageSize={page_size}"
+
+XHR_HEADERS = {
+    'Accept': 'application/json, text/javascript, */*; q=0.01',
+    'X-Requested-With': 'XMLHttpRequest',
+}
+
+_EMBEDDED_DATA = re.compile(r'ACC\.pageData\.fitsModelsData\s*=\s*')
+_PRODUCT_CODE = re.compile(r'ACC\.pageData\.productCode\s*=\s*"([^"]+)"')
+
+_MODEL_ROWS = etree.XPath("//*[@data-item-name and contains(concat(' ', normalize-space(@class), ' '), ' js-model-item ')]")
+_ROW_LINK = etree.XPath("(.//a[@href])[1]")
+_ROW_MANUALS = etree.XPath(".//*[@data-manual-name]/@data-manual-name")
+_MODEL_NUMBERS = etree.XPath("//*[normalize-space(@data-model-number)]")
+_TOTAL = etree.XPath("//*[@id='pagin-total']/span[2]")
+
+
+def normalize_model(raw, base_url="https://www.partstown.com"):
+    """One model as {'code', 'name', 'url', 'manuals'} from an endpoint/embedded entry"""
+    if isinstance(raw, str):
+        return {'code': None, 'name': raw, 'url': None, 'manuals': []}
+    name = raw.get('name') or raw.get('modelNumber') or raw.get('modelName')
+    url = raw.get('url')
+    manuals = []
+    for manual in raw.get('manuals') or []:
+        if isinstance(manual, dict):
+            manual = manual.get('name') or manual.get('manualName') or manual.get('url')
+        if manual and manual not in manuals:
+            manuals.append(manual)
+    return {
+        'code': raw.get('code') or raw.get('modelCode') or raw.get('id'),
+        'name': name,
+        'url': urldefrag(urljoin(base_url, url))[0] if url else None,
+        'manuals': manuals,
+    }
+
+
+def _model_key(model):
+    return model['code'] or model['name']
+
+
+def _decode_array(text, start):
+    """The JSON array starting at text[start], or None"""
+    try:
+        value, _ = json.JSONDecoder().raw_decode(text, start)
+    except ValueError:
+        return None
+    return value if isinstance(value, list) else None
+
+
+def parse_embedded_models(content, base_url="https://www.partstown.com"):
+    """
+    Models embedded in a product page.
+
+    Returns (models, total, product_code); total is None when the page does not
+    say how many models there are (server-rendered HTML leaves it to the XHR).
+    """
+    text = content.decode('utf-8', 'replace') if isinstance(content, bytes) else content
+    code_match = _PRODUCT_CODE.search(text)
+    product_code = code_match.group(1) if code_match else None
+
+    models = []
+    match = _EMBEDDED_DATA.search(text)
+    if match:
+        models = [normalize_model(raw, base_url) for raw in _decode_array(text, match.end()) or []]
+
+    doc = parse_html(content)
+    if not models:
+        # Rendered rows (page source saved from a browser)
+        for row in _MODEL_ROWS(doc):
+            links = _ROW_LINK(row)
+            models.append(normalize_model({
+                'code': row.get('data-item-id'),
+                'name': row.get('data-item-name'),
+                'url': links[0].get('href') if links else None,
+                'manuals': _ROW_MANUALS(row),
+            }, base_url))
+
+    # Manual links and buttons name their model in data-model-number
+    by_name = {model['name']: model for model in models if model['name']}
+    for node in _MODEL_NUMBERS(doc):
+        name = node.get('data-model-number').strip()
+        model = by_name.get(name)
+        if model is None:
+            model = by_name[name] = normalize_model({'name': name}, base_url)
+            models.append(model)
+        manual = node.get('data-manual-name')
+        if manual and manual not in model['manuals']:
+            model['manuals'].append(manual)
+
+    total = None
+    totals = _TOTAL(doc)
+    if totals:
+        digits = re.sub(r'\D', '', totals[0].text_content())
+        total = int(digits) if digits else None
+
+    unique = {}
+    for model in models:
+        unique.setdefault(_model_key(model), model)
+    return list(unique.values()), total, product_code
+
+
+class ModelListFetcher:
+    def __init__(self, base_url="https://www.partstown.com", endpoint=None, page_size=100,
+                 max_models=None, rate_limiter=None, retries=3, timeout=30, metrics=None):
+        self.base_url = base_url
+        self.endpoint = endpoint  # None reads the embedded data only
+        self.page_size = page_size
+        self.max_models = max_models  # None fetches every page
+        self.rate_limiter = rate_limiter
+        self.retries = retries
+        self.metrics = metrics  # counts retries when set
+        self.timeout = timeout
+
+    def page_url(self, code, page):
+        return urljoin(self.base_url, self.endpoint.format(code=code, page=page, page_size=self.page_size))
+
+    def fetch_page(self, session, code, page, referer=None):
+        """(raw models, pagination dict) for one endpoint page; raises after the last retry (at once on 4xx)"""
+        headers = dict(XHR_HEADERS)
+        if referer:
+            headers['Referer'] = referer
+        url = self.page_url(code, page)
+        for attempt in range(self.retries):
+            try:
+                response = limited_get(self.rate_limiter, session, url, headers=headers, timeout=self.timeout)
+                response.raise_for_status()
+                data = response.json()
+                break
+            except (requests.exceptions.RequestException, ValueError) as e:
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                if attempt == self.retries - 1 or (status is not None and 400 <= status < 500 and status != 429):
+                    raise
+                if self.metrics is not None:
+                    self.metrics.inc('retries')
+                time.sleep(2 ** attempt)
+        if isinstance(data, list):
+            return data, {}
+        return data.get('results') or data.get('models') or [], data.get('pagination') or {}
+
+    def fetch(self, code, session, page_content=None, referer=None):
+        """
+        Every model a part fits.
+
+        Returns {'code', 'total', 'complete', 'source', 'models'}; complete is
+        False when max_models cut the list short, a page could not be fetched,
+        or the page did not say how many models there are and no endpoint
+        could confirm it (the rendered rows are only the first few).
+        """
+        embedded, total = [], None
+        if page_content is not None:
+            embedded, total, page_code = parse_embedded_models(page_content, self.base_url)
+            code = code or page_code
+            if embedded and total is not None and len(embedded) >= total:
+                return self._result(code, embedded, len(embedded), True, 'embedded')
+        if not code or not self.endpoint:
+            return self._result(code, embedded, total, False, 'embedded')
+
+        models = {}
+        page = 0
+        complete = True
+        while True:
+            try:
+                raw_models, pagination = self.fetch_page(session, code, page, referer)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"  Fits models page {page} failed for {code}: {e}")
+                complete = False
+                break
+            for raw in raw_models:
+                model = normalize_model(raw, self.base_url)
+                models.setdefault(_model_key(model), model)
+            total = pagination.get('totalNumberOfResults', total)
+            if self.max_models is not None and len(models) >= self.max_models:
+                complete = total is not None and len(models) >= total
+                break
+            pages = pagination.get('numberOfPages')
+            if not raw_models or (pages is not None and page + 1 >= pages) or (
+                    pages is None and len(raw_models) < self.page_size):
+                break
+            page += 1
+
+        found = list(models.values())
+        if not found and embedded:
+            return self._result(code, embedded, total, False, 'embedded')
+        if self.max_models is not None:
+            found = found[:self.max_models]
+        return self._result(code, found, total if total is not None else len(found), complete, 'endpoint')
+
+    @staticmethod
+    def _result(code, models, total, complete, source):
+        return {'code': code, 'total': total, 'complete': complete, 'source': source, 'models': models}
+
+
+def describe(result):
+    """Short value for the 'Fits Models' details field"""
+    count = len(result['models'])
+    if result['complete']:
+        return f"{count} models"
+    if result['total'] is None:
+        return f"{count}+ models"
+    return f"{count} of {result['total']} models"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch the complete Fits Models list of a part")
+    parser.add_argument('product_url', help="product page URL, e.g. https://www.partstown.com/trane/trnpan02916")
+    parser.add_argument('--endpoint', default=None,
+                        help="models endpoint path template with {code}, {page} and {page_size} "
+                             f"(e.g. {DEFAULT_ENDPOINT} for mock_server.py; default: embedded data only)")
+    parser.add_argument('--page-size', type=int, default=100, help="models per endpoint page (default: 100)")
+    parser.add_argument('--max-models', type=int, default=None, help="stop after this many models")
+    parser.add_argument('--output', default=None, help="write the result as JSON here instead of printing a summary")
+    args = parser.parse_args()
+
+    base_url = '{0.scheme}://{0.netloc}'.format(urlparse(args.product_url))
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    })
+    limiter = AdaptiveRateLimiter()
+    fetcher = ModelListFetcher(base_url, endpoint=args.endpoint, page_size=args.page_size,
+                               max_models=args.max_models, rate_limiter=limiter)
+    response = limited_get(limiter, session, args.product_url, timeout=30)
+    response.raise_for_status()
+    result = fetcher.fetch(None, session, page_content=response.content, referer=args.product_url)
+
+    print(f"{result['code']}: {describe(result)} (from {result['source']})")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=1)
+        print(f"Saved to {args.output}")
+    else:
+        for model in result['models'][:20]:
+            print(f"  {model['name']}  {model['url'] or ''}")
+        if len(result['models']) > 20:
+            print(f"  ... {len(result['models']) - 20} more")
+
+
+if __name__ == "__main__":
+    main()
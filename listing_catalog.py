@@ -0,0 +1,123 @@
+"""
+Listing catalog used for incremental re-crawls
+
+listing_catalog.json keeps, per product URL, the listing attributes seen on the
+last crawl and when the part's product page was last scraped. Comparing a
+fresh listing crawl against it tells which parts need their details fetched:
+new ones, ones whose price/stock/etc. changed, ones that left the listing and
+ones not scraped within the TTL. Everything else is skipped.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+
+
+class ListingCatalog:
+    def __init__(self, path, save_every=500):
+        self.path = path
+        self.save_every = save_every
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """Write the catalog atomically"""
+        with self._lock:
+            data = json.dumps(self.entries, indent=1, sort_keys=True)
+            self._unsaved = 0
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def classify(self, part, ttl_seconds=None, now=None):
+        """
+        Compare one freshly listed part ({'name', 'url', 'listing'}) with the catalog.
+
+        Returns (kind, item) where kind is 'added', 'changed' or 'stale' and item
+        is its diff entry, or (None, None) when the part is unchanged.
+        """
+        now = time.time() if now is None else now
+        url = part['url']
+        listing = part.get('listing') or {}
+        entry = self.entries.get(url)
+        if entry is None or entry.get('removed_at'):
+            return 'added', {'url': url, 'name': part['name'], 'listing': listing}
+        before = entry.get('listing') or {}
+        fields = {attr: [before.get(attr), listing.get(attr)]
+                  for attr in sorted(set(before) | set(listing))
+                  if before.get(attr) != listing.get(attr)}
+        if fields:
+            return 'changed', {'url': url, 'name': part['name'], 'fields': fields}
+        scraped_at = entry.get('scraped_at')
+        if entry.get('pending') or scraped_at is None:
+            return 'stale', {'url': url, 'name': part['name'], 'scraped_at': scraped_at,
+                             'reason': 'never finished'}
+        if ttl_seconds is not None and now - scraped_at > ttl_seconds:
+            return 'stale', {'url': url, 'name': part['name'], 'scraped_at': scraped_at,
+                             'reason': 'older than TTL'}
+        return None, None
+
+    def removed_parts(self, listed_urls):
+        """Catalog parts missing from a complete listing crawl, as diff entries"""
+        return [{'url': url, 'name': entry.get('name')}
+                for url, entry in self.entries.items()
+                if url not in listed_urls and not entry.get('removed_at')]
+
+    def update_listing(self, parts, scheduled_urls, removed_urls=(), now=None):
+        """Store the new listing attributes; scheduled parts stay pending until mark_scraped"""
+        now = time.time() if now is None else now
+        with self._lock:
+            for part in parts:
+                entry = self.entries.get(part['url']) or {'first_seen': now}
+                entry.pop('removed_at', None)
+                entry['name'] = part['name']
+                entry['listing'] = part.get('listing') or {}
+                entry['listed_at'] = now
+                if part['url'] in scheduled_urls:
+                    entry['pending'] = True
+                self.entries[part['url']] = entry
+            for url in removed_urls:
+                entry = self.entries.get(url)
+                if entry is not None:
+                    entry['removed_at'] = now
+                    entry['pending'] = True
+
+    def mark_scraped(self, url, now=None):
+        """Record that a part's product page was scraped successfully"""
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return
+            entry['scraped_at'] = time.time() if now is None else now
+            entry.pop('pending', None)
+            self._unsaved += 1
+            should_save = self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+
+def write_change_report(diff, directory, ttl_days=None, suffix=''):
+    """Write the added/changed/removed/stale diff to a timestamped JSON file and return its path"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"changes-{time.strftime('%Y%m%d-%H%M%S')}{suffix}.json")
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'ttl_days': ttl_days,
+        'counts': {kind: len(diff[kind]) for kind in ('added', 'changed', 'removed', 'stale')},
+        'unchanged': diff['unchanged'],
+    }
+    report.update({kind: diff[kind] for kind in ('added', 'changed', 'removed', 'stale')})
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1)
+    return path
@@ -0,0 +1,262 @@
+"""
+Lightweight in-process metrics for the scrapers
+
+Stage timings go into histograms and events into counters, both labelled
+with the worker (thread) name. The totals can be exported in Prometheus text
+format, as JSON snapshots (optionally written every N seconds by a background
+thread), or as an end-of-run table with p50/p95/p99 per stage.
+
+Recording costs one lock acquisition plus a list append or a dict update, so
+it is cheap next to a page load. Percentiles come from a bounded reservoir
+sample per stage; bucket counts, sums and counts are exact.
+"""
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+
+# Seconds; page loads and PDF downloads range from ~50 ms to over a minute
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+class _Histogram:
+    def __init__(self, buckets, reservoir_size):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.reservoir_size = reservoir_size
+        self.samples = []
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+        if len(self.samples) < self.reservoir_size:
+            self.samples.append(value)
+        else:
+            # Reservoir sampling keeps a uniform sample of every observation
+            j = random.randrange(self.count)
+            if j < self.reservoir_size:
+                self.samples[j] = value
+
+
+def _percentile(weighted_samples, q):
+    """q-quantile of (value, weight) pairs sorted by value"""
+    if not weighted_samples:
+        return None
+    target = q * sum(weight for _, weight in weighted_samples)
+    cumulative = 0.0
+    for value, weight in weighted_samples:
+        cumulative += weight
+        if cumulative >= target:
+            return value
+    return weighted_samples[-1][0]
+
+
+def _prom_labels(labels):
+    if not labels:
+        return ''
+    inner = ','.join('{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                     for key, value in labels)
+    return '{' + inner + '}'
+
+
+class Stopwatch:
+    """Records the time since the previous lap under a stage name; avoids nesting timers around long blocks"""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.last = time.monotonic()
+
+    def lap(self, stage):
+        now = time.monotonic()
+        self.metrics.observe(stage, now - self.last)
+        self.last = now
+
+
+class Metrics:
+    def __init__(self, prefix='partstown', buckets=DEFAULT_BUCKETS, reservoir_size=5000):
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self.reservoir_size = reservoir_size
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._histograms = {}  # (stage, worker) -> _Histogram
+        self._counters = {}  # (name, worker) -> number
+        self._snapshot_thread = None
+        self._stop = threading.Event()
+
+    # -- recording ------------------------------------------------------
+
+    @staticmethod
+    def _worker(worker):
+        return worker if worker is not None else threading.current_thread().name
+
+    def observe(self, stage, seconds, worker=None):
+        key = (stage, self._worker(worker))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(self.buckets, self.reservoir_size)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage, worker=None):
+        """Time the with-block under stage (recorded even if it raises)"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.monotonic() - start, worker)
+
+    def stopwatch(self):
+        return Stopwatch(self)
+
+    def inc(self, name, amount=1, worker=None):
+        key = (name, self._worker(worker))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    # -- aggregation ----------------------------------------------------
+
+    def _stage_totals(self):
+        """stage -> (count, sum, (value, weight) samples sorted by value) across workers"""
+        totals = {}
+        with self._lock:
+            for (stage, _), histogram in self._histograms.items():
+                count, total, samples = totals.get(stage, (0, 0.0, []))
+                # A full reservoir stands for more observations than it holds; weight each
+                # sample by that so a busy worker is not outvoted by an idle one
+                weight = histogram.count / len(histogram.samples) if histogram.samples else 0
+                totals[stage] = (count + histogram.count, total + histogram.sum,
+                                 samples + [(value, weight) for value in histogram.samples])
+        return {stage: (count, total, sorted(samples)) for stage, (count, total, samples) in totals.items()}
+
+    def counter_totals(self):
+        totals = {}
+        with self._lock:
+            for (name, _), value in self._counters.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def snapshot(self):
+        """JSON-friendly view: per-stage stats, counter totals and rates, and per-worker counters"""
+        elapsed = max(time.time() - self.started, 1e-9)
+        stages = {}
+        for stage, (count, total, samples) in self._stage_totals().items():
+            stages[stage] = {
+                'count': count,
+                'sum': round(total, 4),
+                'mean': round(total / count, 4) if count else None,
+                'p50': _percentile(samples, 0.50),
+                'p95': _percentile(samples, 0.95),
+                'p99': _percentile(samples, 0.99),
+                'max': samples[-1][0] if samples else None,
+            }
+        counters = self.counter_totals()
+        with self._lock:
+            per_worker = {}
+            for (name, worker), value in self._counters.items():
+                per_worker.setdefault(worker, {})[name] = value
+        return {
+            'timestamp': time.time(),
+            'elapsed_seconds': round(elapsed, 3),
+            'stages': stages,
+            'counters': counters,
+            'rates_per_second': {name: round(value / elapsed, 4) for name, value in counters.items()},
+            'workers': per_worker,
+        }
+
+    def prometheus_text(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        name = f"{self.prefix}_stage_seconds"
+        lines.append(f"# HELP {name} Time spent per scraping stage")
+        lines.append(f"# TYPE {name} histogram")
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        for (stage, worker), histogram in histograms:
+            labels = [('stage', stage), ('worker', worker)]
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, histogram.bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_prom_labels(labels + [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{_prom_labels(labels + [('le', '+Inf')])} {histogram.count}")
+            lines.append(f"{name}_sum{_prom_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_prom_labels(labels)} {histogram.count}")
+
+        declared = set()
+        for (counter, worker), value in counters:
+            metric = f"{self.prefix}_{counter}_total"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_prom_labels([('worker', worker)])} {value}")
+        return '\n'.join(lines) + '\n'
+
+    # -- export ---------------------------------------------------------
+
+    def write_json(self, path):
+        _write_atomic(path, json.dumps(self.snapshot(), indent=1))
+
+    def write_prometheus(self, path):
+        _write_atomic(path, self.prometheus_text())
+
+    def start_snapshots(self, interval, json_path=None, prom_path=None):
+        """Rewrite the JSON snapshot and/or Prometheus textfile every interval seconds until close()"""
+        if not (json_path or prom_path) or self._snapshot_thread is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                self._export(json_path, prom_path)
+
+        self._snapshot_thread = threading.Thread(target=loop, name='metrics-snapshots', daemon=True)
+        self._snapshot_thread.start()
+        self._paths = (json_path, prom_path)
+
+    def _export(self, json_path, prom_path):
+        try:
+            if json_path:
+                self.write_json(json_path)
+            if prom_path:
+                self.write_prometheus(prom_path)
+        except OSError as e:
+            print(f"Could not write metrics: {e}")
+
+    def close(self):
+        """Stop periodic snapshots after writing a final one"""
+        if self._snapshot_thread is not None:
+            self._stop.set()
+            self._snapshot_thread.join()
+            self._snapshot_thread = None
+            self._export(*self._paths)
+
+    def summary(self):
+        """End-of-run table of stage latencies and counter rates"""
+        snapshot = self.snapshot()
+        lines = [f"{'stage':<28}{'count':>8}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'total':>10}"]
+        fmt = lambda value: f"{value:.3f}" if value is not None else '-'
+        for stage, stats in sorted(snapshot['stages'].items(), key=lambda item: -item[1]['sum']):
+            lines.append(f"{stage:<28}{stats['count']:>8}{fmt(stats['mean']):>9}{fmt(stats['p50']):>9}"
+                         f"{fmt(stats['p95']):>9}{fmt(stats['p99']):>9}{stats['sum']:>10.1f}")
+        for counter, value in sorted(snapshot['counters'].items()):
+            lines.append(f"{counter}: {value} ({snapshot['rates_per_second'][counter]:.3f}/s)")
+        return '\n'.join(lines)
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
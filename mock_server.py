@@ -0,0 +1,387 @@
+"""
+Local stand-in for partstown.com for end-to-end load tests
+
+Serves a synthetic Trane catalog built from the saved fixtures:
+    /trane/parts?page=N      listing pages (test_page_source.html with generated items; JSON for XHRs)
+    /trane/trnmock000123     product pages (product_page_source.html with that part's codes)
+    /modelManual/<name>.pdf  generated PDF payloads (Range requests supported)
+    /p/<code>/fits-models    paged JSON "Fits Models" list (fits_models.DEFAULT_ENDPOINT)
+    /__stats                 request counters as JSON
+
+Latency, 500 errors, 429s (with Retry-After) and slow-drip bodies can be
+injected at configurable rates. Point a scraper at it with --base-url:
+
+    python3 mock_server.py --parts 2400 --latency-ms 80 --rate-429 0.02
+    python3 scraper_selenium.py --base-url http://127.0.0.1:8765 --pdf-mode unique
+"""
+import argparse
+import copy
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from lxml import etree
+import lxml.html
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LISTING_FIXTURE = os.path.join(HERE, 'test_page_source.html')
+PRODUCT_FIXTURE = os.path.join(HERE, 'product_page_source.html')
+
+# Codes of the part the product fixture was saved from
+FIXTURE_PT_CODE = b'TRNPAN02916'
+FIXTURE_MFR_CODE = b'PAN02916'
+FIXTURE_MANUAL = b'TRN-WSC-WHC-DHC-H_iom.pdf'
+FIXTURE_LAST_PAGE = b'page=1537'
+FIXTURE_MODELS_DATA = b'ACC.pageData.fitsModelsData = [];'
+FIXTURE_MODELS_TOTAL = b'<span>91415</span>'
+LIVE_ORIGIN = b'https://www.partstown.com'
+
+_ITEMS_PLACEHOLDER = b'<!--mock-listing-items-->'
+_PRODUCT_PATH = re.compile(r'^/trane/trnmock(\d+)$')
+_MODELS_PATH = re.compile(r'^/p/TRNMOCK(\d+)/fits-models$')
+
+
+def part_codes(index):
+    """Parts Town #, manufacturer # and URL slug of synthetic part `index`"""
+    return f"TRNMOCK{index:06d}", f"MOCK{index:06d}", f"trnmock{index:06d}"
+
+
+class MockCatalog:
+    def __init__(self, parts=2400, page_size=24, pdf_variety=50, pdf_size=200 * 1024, price_epoch=0,
+                 max_models=300, listing_fixture=LISTING_FIXTURE, product_fixture=PRODUCT_FIXTURE):
+        self.parts = parts
+        self.page_size = page_size
+        self.pages = max(1, -(-parts // page_size))
+        self.pdf_variety = pdf_variety
+        self.pdf_size = pdf_size
+        self.price_epoch = price_epoch  # bump to make listing prices change between runs
+        self.max_models = max(1, max_models)  # parts fit 1..max_models models
+        with open(product_fixture, 'rb') as f:
+            self.product_template = f.read()
+        self.listing_template, self.item_template = self._listing_template(listing_fixture)
+        self._cache_lock = threading.Lock()
+        self._listing_cache = {}
+
+    def _listing_template(self, path):
+        """Fixture page with its product items cut out, plus one item to clone"""
+        with open(path, 'rb') as f:
+            doc = lxml.html.fromstring(f.read())
+        items = doc.xpath("//li[contains(concat(' ', normalize-space(@class), ' '), ' js-product-item ')]")
+        template = copy.deepcopy(items[0])
+        parent = items[0].getparent()
+        parent.insert(parent.index(items[0]), etree.Comment('mock-listing-items'))
+        for item in items:
+            item.getparent().remove(item)
+        page = etree.tostring(doc, encoding='utf-8', method='html', doctype='<!DOCTYPE html>')
+        return page.replace(FIXTURE_LAST_PAGE, f"page={self.pages - 1}".encode()), template
+
+    def price(self, index):
+        return f"{((index * 7919 + self.price_epoch * 104729) % 50000) / 100 + 1:.2f}"
+
+    def listing_page(self, page, base_url):
+        if page < 0 or page >= self.pages:
+            page = self.pages - 1
+        key = (page, base_url)
+        with self._cache_lock:
+            cached = self._listing_cache.get(key)
+        if cached is not None:
+            return cached
+
+        old_href = self.item_template.xpath('(.//a)[1]')[0].get('href')
+        items = []
+        for index in range(page * self.page_size, min(self.parts, (page + 1) * self.page_size)):
+            pt_code, mfr_code, slug = part_codes(index)
+            item = copy.deepcopy(self.item_template)
+            item.set('data-name', f"Mock Part {index}")
+            item.set('data-id', pt_code)
+            item.set('data-mfrpartnumber', mfr_code)
+            item.set('data-pt-price', self.price(index))
+            item.set('data-quantityonhand', str(index % 97))
+            for link in item.iter('a'):
+                if link.get('href') == old_href:
+                    link.set('href', f"/trane/{slug}")
+            items.append(etree.tostring(item, encoding='utf-8', method='html'))
+        body = self.listing_template.replace(_ITEMS_PLACEHOLDER, b''.join(items))
+        body = body.replace(LIVE_ORIGIN, base_url.encode())
+        with self._cache_lock:
+            self._listing_cache[key] = body
+        return body
+
+    def model_count(self, index):
+        return 1 + (index * 37) % self.max_models
+
+    def models(self, index):
+        """The models part `index` fits, shaped like the site's model data"""
+        models = []
+        for n in range(self.model_count(index)):
+            model = (index * 13 + n) % 100000
+            models.append({
+                'code': f"PT_MOCK{model:05d}",
+                'name': f"MOCK-MODEL-{model:05d}",
+                'url': f"/trane/mock-model-{model:05d}/parts#id=mdptabparts",
+                'manuals': [f"MOCK-MANUAL-{model % self.pdf_variety:04d}.pdf"],
+            })
+        return models
+
+    def models_page(self, index, page, page_size):
+        """Hybris-style paged search result over models(index)"""
+        models = self.models(index)
+        page_size = max(1, min(page_size, 100))
+        pages = -(-len(models) // page_size)
+        return {
+            'results': models[page * page_size:(page + 1) * page_size],
+            'pagination': {'currentPage': page, 'numberOfPages': pages, 'pageSize': page_size,
+                           'totalNumberOfResults': len(models)},
+        }
+
+    def listing_json(self, page):
+        """The listing page as the AJAX paging's JSON (Hybris SearchPageData)"""
+        page = min(max(page, 0), self.pages - 1)
+        results = []
+        for index in range(page * self.page_size, min(self.parts, (page + 1) * self.page_size)):
+            pt_code, mfr_code, slug = part_codes(index)
+            price = float(self.price(index))
+            results.append({
+                'code': pt_code,
+                'name': f"Mock Part {index}",
+                'url': f"/trane/{slug}",
+                'manufacturer': 'Trane',
+                'manufacturerPartnumber': mfr_code,
+                'price': {'value': price, 'formattedValue': f"${price:,.2f}"},
+                'stock': {'stockLevel': index % 97, 'stockStatusMsg': self.item_template.get('data-stock-status')},
+                'unitOfMeasure': 'EA',
+            })
+        return {
+            'results': results,
+            'pagination': {'currentPage': page, 'numberOfPages': self.pages, 'pageSize': self.page_size,
+                           'totalNumberOfResults': self.parts, 'hasNextPage': page + 1 < self.pages,
+                           'hasPreviousPage': page > 0},
+        }
+
+    def product_page(self, index, base_url):
+        if index >= self.parts:
+            return None
+        pt_code, mfr_code, _ = part_codes(index)
+        manual = f"MOCK-MANUAL-{index % self.pdf_variety:04d}.pdf".encode()
+        body = self.product_template.replace(FIXTURE_PT_CODE, pt_code.encode())
+        body = body.replace(FIXTURE_PT_CODE.lower(), pt_code.lower().encode())
+        body = body.replace(FIXTURE_MFR_CODE, mfr_code.encode())
+        body = body.replace(FIXTURE_MANUAL, manual)
+        body = body.replace(b'data-listprice="118.4"', f'data-listprice="{self.price(index)}"'.encode())
+        # Short model lists are embedded in the page; longer ones only come from the endpoint
+        count = self.model_count(index)
+        if count <= 5:
+            embedded = json.dumps(self.models(index)).encode()
+            body = body.replace(FIXTURE_MODELS_DATA, b'ACC.pageData.fitsModelsData = ' + embedded + b';')
+        body = body.replace(FIXTURE_MODELS_TOTAL, f"<span>{count}</span>".encode())
+        return body.replace(LIVE_ORIGIN, base_url.encode())
+
+    def pdf(self, name):
+        """Deterministic PDF bytes for a manual name"""
+        seed = hashlib.sha256(name.encode()).digest()
+        header = b'%PDF-1.4\n% mock manual ' + name.encode() + b'\n'
+        trailer = b'\n%%EOF\n'
+        filler_size = max(0, self.pdf_size - len(header) - len(trailer))
+        filler = (seed * (filler_size // len(seed) + 1))[:filler_size]
+        return header + filler + trailer
+
+
+class FaultConfig:
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, rate_429=0.0, retry_after=1,
+                 slow_rate=0.0, slow_bps=64 * 1024):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.slow_rate = slow_rate
+        self.slow_bps = slow_bps
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'PartstownMock/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        server = self.server
+        parsed = urlparse(self.path)
+        route = self._route_name(parsed.path)
+        if route == 'stats':
+            return self._send(200, json.dumps(server.stats_snapshot(), indent=1).encode(), 'application/json', route)
+
+        faults = server.faults
+        delay = faults.latency_ms + (random.uniform(0, faults.jitter_ms) if faults.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000)
+        roll = random.random()
+        if roll < faults.rate_429:
+            return self._send(429, b'Too Many Requests', 'text/plain', route,
+                              {'Retry-After': str(faults.retry_after)})
+        if roll < faults.rate_429 + faults.error_rate:
+            return self._send(500, b'Internal Server Error', 'text/plain', route)
+
+        base_url = f"http://{self.headers.get('Host') or '%s:%s' % server.server_address[:2]}"
+        catalog = server.catalog
+        if route == 'listing':
+            page = int((parse_qs(parsed.query).get('page') or ['0'])[0] or 0)
+            if self.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                return self._send(200, json.dumps(catalog.listing_json(page)).encode(), 'application/json', route)
+            return self._send(200, catalog.listing_page(page, base_url), 'text/html; charset=utf-8', route)
+        if route == 'product':
+            match = _PRODUCT_PATH.match(parsed.path)
+            body = catalog.product_page(int(match.group(1)), base_url)
+            if body is None:
+                return self._send(404, b'Not Found', 'text/plain', route)
+            return self._send(200, body, 'text/html; charset=utf-8', route)
+        if route == 'pdf':
+            return self._send_pdf(catalog.pdf(parsed.path.rsplit('/', 1)[-1]))
+        if route == 'models':
+            index = int(_MODELS_PATH.match(parsed.path).group(1))
+            if index >= catalog.parts:
+                return self._send(404, b'Not Found', 'text/plain', route)
+            query = parse_qs(parsed.query)
+            result = catalog.models_page(index, int((query.get('page') or ['0'])[0]),
+                                         int((query.get('pageSize') or ['100'])[0]))
+            return self._send(200, json.dumps(result).encode(), 'application/json', route)
+        return self._send(404, b'Not Found', 'text/plain', route)
+
+    @staticmethod
+    def _route_name(path):
+        if path == '/__stats':
+            return 'stats'
+        if path.rstrip('/') == '/trane/parts':
+            return 'listing'
+        if _PRODUCT_PATH.match(path):
+            return 'product'
+        if path.startswith('/modelManual/') and path.lower().endswith('.pdf'):
+            return 'pdf'
+        if _MODELS_PATH.match(path):
+            return 'models'
+        return 'other'
+
+    def _send_pdf(self, body):
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+        match = re.match(r'bytes=(\d+)-(\d*)$', self.headers.get('Range', ''))
+        if_range = self.headers.get('If-Range')
+        if not match or (if_range and if_range != etag):
+            return self._send(200, body, 'application/pdf', 'pdf', {'Accept-Ranges': 'bytes', 'ETag': etag})
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else len(body) - 1
+        if start >= len(body):
+            return self._send(416, b'', 'application/pdf', 'pdf', {'Content-Range': f"bytes */{len(body)}"})
+        end = min(end, len(body) - 1)
+        return self._send(206, body[start:end + 1], 'application/pdf', 'pdf',
+                          {'Accept-Ranges': 'bytes', 'Content-Range': f"bytes {start}-{end}/{len(body)}", 'ETag': etag})
+
+    def _send(self, status, body, content_type, route, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        faults = self.server.faults
+        if faults.slow_rate and route != 'stats' and random.random() < faults.slow_rate:
+            # Slow drip: trickle the body out at slow_bps
+            chunk = max(1, faults.slow_bps // 10)
+            for offset in range(0, len(body), chunk):
+                self.wfile.write(body[offset:offset + chunk])
+                self.wfile.flush()
+                time.sleep(0.1)
+        else:
+            self.wfile.write(body)
+        self.server.record(route, status, len(body))
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, catalog, faults, verbose=False):
+        super().__init__(address, MockHandler)
+        self.catalog = catalog
+        self.faults = faults
+        self.verbose = verbose
+        self.started = time.time()
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, route, status, size):
+        with self._stats_lock:
+            stats = self._stats.setdefault(route, {'requests': 0, 'bytes': 0, 'statuses': {}})
+            stats['requests'] += 1
+            stats['bytes'] += size
+            stats['statuses'][str(status)] = stats['statuses'].get(str(status), 0) + 1
+
+    def stats_snapshot(self):
+        with self._stats_lock:
+            routes = json.loads(json.dumps(self._stats))
+        return {'uptime_seconds': round(time.time() - self.started, 1), 'routes': routes}
+
+
+def start_server(host='127.0.0.1', port=0, catalog=None, faults=None, verbose=False):
+    """Start a mock server on a background thread and return it (port=0 picks a free port)"""
+    server = MockServer((host, port), catalog or MockCatalog(), faults or FaultConfig(), verbose=verbose)
+    thread = threading.Thread(target=server.serve_forever, name='mock-server', daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic Partstown catalog for load testing")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--parts', type=int, default=2400, help="number of parts in the catalog (default: 2400)")
+    parser.add_argument('--page-size', type=int, default=24, help="parts per listing page (default: 24)")
+    parser.add_argument('--pdf-variety', type=int, default=50,
+                        help="number of distinct manuals shared by the parts (default: 50)")
+    parser.add_argument('--pdf-size', type=int, default=200 * 1024, help="bytes per manual (default: 204800)")
+    parser.add_argument('--price-epoch', type=int, default=0,
+                        help="change to reshuffle listing prices (exercises --incremental)")
+    parser.add_argument('--max-models', type=int, default=300,
+                        help="largest Fits Models list of a part (default: 300)")
+    parser.add_argument('--latency-ms', type=float, default=0, help="fixed delay before every response")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="extra uniform random delay up to this much")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument('--slow-rate', type=float, default=0.0, help="fraction of responses sent as a slow drip")
+    parser.add_argument('--slow-bps', type=int, default=64 * 1024, help="bytes per second for slow-drip bodies")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args()
+
+    catalog = MockCatalog(parts=args.parts, page_size=args.page_size, pdf_variety=args.pdf_variety,
+                          pdf_size=args.pdf_size, price_epoch=args.price_epoch, max_models=args.max_models)
+    faults = FaultConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                         rate_429=args.rate_429, retry_after=args.retry_after, slow_rate=args.slow_rate,
+                         slow_bps=args.slow_bps)
+    server = MockServer((args.host, args.port), catalog, faults, verbose=args.verbose)
+    print(f"Mock Partstown serving {catalog.parts} parts on {catalog.pages} pages at {server.base_url}")
+    print(f"Listing: {server.base_url}/trane/parts   Stats: {server.base_url}/__stats")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.stats_snapshot(), indent=1))
+
+
+if __name__ == "__main__":
+    main()
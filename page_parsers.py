@@ -0,0 +1,495 @@
+"""
+Browser-free parsers for Partstown pages
+
+These work on the server-rendered HTML (fetched with requests) and use the same
+field mapping as the Selenium scraper, so both paths produce identical details.
+"""
+import json
+import re
+from urllib.parse import urljoin
+
+from lxml import etree
+import lxml.html
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+from dom_scripts import LISTING_ATTRIBUTES
+
+
+DETAIL_FIELDS = (
+    'List Price',
+    'Quantity Available',
+    'Manufacturer',
+    'Manufacturer #',
+    'Parts Town #',
+    'Units',
+    'Fits Models',
+    'California Residents',
+)
+
+# Fields an HTTP-parsed product page must have before we trust it without a browser
+REQUIRED_FIELDS = ('List Price', 'Manufacturer #', 'Parts Town #')
+
+PROP65_FALLBACK = "See product page for Prop 65 warning details"
+
+
+def _has_class(name):
+    """XPath predicate matching elements whose class list contains `name`"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# XPath expressions are compiled once at import time. They only run inside a
+# product__row or when the single-pass scan found no data-listprice element.
+_ROW_LABEL = etree.XPath(f".//*[{_has_class('product__label')}]")
+_ROW_VALUE = etree.XPath(f".//*[{_has_class('product__val')}]")
+_ROW_MODELS_LINK = etree.XPath(".//a[contains(@href, '#') or contains(text(), 'View')]")
+_LIST_PRICE_ROW = etree.XPath(
+    f"//div[{_has_class('product__row')}]//div[{_has_class('product__label')} and contains(text(), 'List Price')]"
+    "/following-sibling::div[@class='product__cell product__val']")
+_PRICE_FALLBACK = etree.XPath(f"//*[{_has_class('js-product-listPrice')} or {_has_class('price-vat')}]")
+_JSON_SCRIPTS = etree.XPath("//script[@type='application/json']")
+
+def empty_details():
+    """Return a details dict with every field unset"""
+    return {field: None for field in DETAIL_FIELDS}
+
+
+def clean_text(text):
+    """Collapse whitespace the way a browser's rendered .text does"""
+    return ' '.join((text or '').split())
+
+
+def map_detail_label(details_fields, label, value, models_text=None):
+    """Store a product__row label/value pair under the matching details field"""
+    if not label or not value:
+        return
+    if 'Quantity' in label or ('Available' in label and 'Quantity' in label):
+        details_fields['Quantity Available'] = value
+    elif 'Manufacturer' in label and '#' not in label:
+        details_fields['Manufacturer'] = value
+    elif 'Manufacturer #' in label or ('Mfr' in label and '#' in label):
+        details_fields['Manufacturer #'] = value
+    elif 'Parts Town #' in label or 'PT #' in label:
+        details_fields['Parts Town #'] = value
+    elif 'Units' in label:
+        details_fields['Units'] = value
+    elif 'Fits Models' in label:
+        # "View Models List" is only a link; prefer its title if it carries the models
+        if ('View' in value or 'List' in value) and models_text and models_text != value:
+            details_fields['Fits Models'] = models_text
+        else:
+            details_fields['Fits Models'] = value
+
+
+def format_list_price(data_price):
+    """Format a data-listprice attribute value as currency"""
+    try:
+        return f"$ {float(data_price):.2f}"
+    except (TypeError, ValueError):
+        return f"$ {data_price}"
+
+
+def clean_prop65_text(cal_text):
+    """Turn the text around the California Residents label into the stored value"""
+    cal_text = clean_text(cal_text)
+    if cal_text and cal_text != "California Residents:":
+        cal_text = cal_text.replace("California Residents:", "").strip()
+        return cal_text or PROP65_FALLBACK
+    return PROP65_FALLBACK
+
+
+def normalize_pdf_url(url, base_url="https://www.partstown.com"):
+    """Make a PDF href or bare manual name absolute; returns None for non-PDF links"""
+    if not url or '.pdf' not in url.lower():
+        return None
+    if url.startswith('/'):
+        return f"{base_url}{url}"
+    if not url.startswith('http'):
+        return f"{base_url}/modelManual/{url}"
+    return url
+
+
+def missing_required_fields(details):
+    """List the required fields an extraction did not fill in"""
+    return [field for field in REQUIRED_FIELDS if not details.get(field)]
+
+
+def parse_html(content):
+    """Parse page bytes/text into an lxml document"""
+    return lxml.html.fromstring(content)
+
+
+def _is_prop65_text(text):
+    return bool(text) and ('California Residents' in text or 'Prop 65' in text)
+
+
+class ParserBackend:
+    """
+    Listing and product-page extraction over one parsed tree.
+
+    Subclasses supply the tree primitives; the extraction rules live here so
+    every backend returns identical results. Each page is scanned once for the
+    elements extraction needs (_listing_items / _product_nodes) and everything
+    else is looked up locally around those elements.
+    """
+    name = None
+
+    @classmethod
+    def available(cls):
+        return True
+
+    # -- primitives ---------------------------------------------------------
+
+    def parse(self, content):
+        raise NotImplementedError
+
+    def _listing_items(self, doc):
+        """Listing items (li.js-product-item, .product-item) in document order"""
+        raise NotImplementedError
+
+    def _first_link(self, item):
+        raise NotImplementedError
+
+    def _product_nodes(self, doc):
+        """
+        Candidates in document order: data-listprice, data-manual-name and
+        product__row elements, PDF links and Prop 65 text. May over-match.
+        """
+        raise NotImplementedError
+
+    def _attrs(self, node):
+        raise NotImplementedError
+
+    def _tag(self, node):
+        raise NotImplementedError
+
+    def _parent(self, node):
+        raise NotImplementedError
+
+    def _own_text(self, node):
+        """Text before the node's first child element"""
+        raise NotImplementedError
+
+    def _text(self, node):
+        """All text inside the node"""
+        raise NotImplementedError
+
+    def _row_cells(self, row):
+        """(label node, value node, models link nodes) of a product__row"""
+        raise NotImplementedError
+
+    def _fallback_price_text(self, doc):
+        """List price text when no element carries data-listprice"""
+        raise NotImplementedError
+
+    def _json_script_texts(self, doc):
+        raise NotImplementedError
+
+    # -- extraction ---------------------------------------------------------
+
+    def _has_ancestor(self, node, predicate):
+        node = self._parent(node)
+        while node is not None:
+            if predicate(self._tag(node), self._attrs(node).get('class') or ''):
+                return True
+            node = self._parent(node)
+        return False
+
+    def _in_popup(self, link, href):
+        """Whether a link sits in a model/manual popup menu"""
+        def predicate(tag, cls):
+            return ((tag == 'ul' and 'data-sheet__popup__list' in cls)
+                    or (tag == 'div' and 'data-sheet__popup' in cls)
+                    or (tag == 'div' and 'popup' in cls and '.pdf' in href))
+        return self._has_ancestor(link, predicate)
+
+    def _map_row(self, details_fields, row):
+        label_node, value_node, models_links = self._row_cells(row)
+        if label_node is None or value_node is None:
+            return
+        label = clean_text(self._text(label_node)).rstrip(':')
+        value = clean_text(self._text(value_node))
+        models_text = None
+        if 'Fits Models' in label and models_links:
+            models_text = self._attrs(models_links[0]).get('title') or clean_text(self._text(models_links[0]))
+        map_detail_label(details_fields, label, value, models_text)
+
+    def parse_product(self, content, base_url="https://www.partstown.com"):
+        """Extract (details, pdf_urls) from a server-rendered product page"""
+        doc = self.parse(content)
+        details_fields = empty_details()
+        price_node = prop65_node = None
+        manual_nodes, pdf_links, popup_links = [], [], []
+
+        for node in self._product_nodes(doc):
+            attrs = self._attrs(node)
+            if price_node is None and 'data-listprice' in attrs:
+                price_node = node
+            if 'data-manual-name' in attrs:
+                manual_nodes.append(node)
+            cls = attrs.get('class')
+            if cls and 'product__row' in cls.split() and self._has_ancestor(
+                    node, lambda tag, ancestor_cls: 'product-info' in ancestor_cls.split()):
+                self._map_row(details_fields, node)
+            if self._tag(node) == 'a':
+                href = attrs.get('href') or ''
+                if '.pdf' in href:
+                    pdf_links.append(href)
+                if self._in_popup(node, href):
+                    popup_links.append(attrs)
+            if prop65_node is None and _is_prop65_text(self._own_text(node)):
+                prop65_node = node
+
+        # List Price: data attribute first, then the labelled row, then any price element
+        if price_node is not None:
+            data_price = self._attrs(price_node).get('data-listprice')
+            if data_price:
+                details_fields['List Price'] = format_list_price(data_price)
+            else:
+                price_text = clean_text(self._text(price_node))
+                if price_text and '$' in price_text and 'My Price' not in price_text:
+                    details_fields['List Price'] = price_text
+        else:
+            details_fields['List Price'] = self._fallback_price_text(doc)
+
+        # California Residents (Prop 65) warning
+        parent = self._parent(prop65_node) if prop65_node is not None else None
+        if parent is not None:
+            details_fields['California Residents'] = clean_prop65_text(self._text(parent))
+        else:
+            details_fields['California Residents'] = "N/A"
+
+        # PDFs: data-manual-name elements, direct links, then model popup menus
+        pdf_urls = []
+
+        def add_pdf_url(url):
+            url = normalize_pdf_url(url, base_url)
+            if url and url not in pdf_urls:
+                pdf_urls.append(url)
+
+        for node in manual_nodes:
+            attrs = self._attrs(node)
+            if attrs.get('href'):
+                add_pdf_url(attrs.get('href'))
+            else:
+                add_pdf_url(attrs.get('data-manual-name'))
+        for href in pdf_links:
+            add_pdf_url(href)
+        for attrs in popup_links:
+            add_pdf_url(attrs.get('href'))
+            add_pdf_url(attrs.get('data-manual-name'))
+
+        return details_fields, pdf_urls
+
+    def parse_listing(self, content, base_url="https://www.partstown.com"):
+        """Extract [{'name', 'url', 'listing'}] from a server-rendered listing page, like LISTING_EXTRACT_SCRIPT"""
+        doc = self.parse(content)
+        parts = []
+        for item in self._listing_items(doc):
+            link = self._first_link(item)
+            href = self._attrs(link).get('href') if link is not None else None
+            if not href:
+                continue
+            attrs = self._attrs(item)
+            name = attrs.get('data-name') or clean_text(self._text(link))
+            if not name:
+                continue
+            listing = {attr: attrs[attr] for attr in LISTING_ATTRIBUTES if attrs.get(attr) is not None}
+            parts.append({'name': name, 'url': urljoin(base_url, href), 'listing': listing})
+        return parts
+
+    def json_scripts(self, content):
+        """Decoded <script type="application/json"> blocks of a page (unparseable ones are skipped)"""
+        blobs = []
+        for text in self._json_script_texts(self.parse(content)):
+            try:
+                blobs.append(json.loads(text))
+            except (TypeError, ValueError):
+                pass
+        return blobs
+
+
+class LxmlBackend(ParserBackend):
+    name = 'lxml'
+
+    def parse(self, content):
+        return content if isinstance(content, etree._Element) else parse_html(content)
+
+    def _listing_items(self, doc):
+        for el in doc.iter(etree.Element):
+            cls = el.get('class')
+            if cls and 'product-item' in cls:
+                tokens = cls.split()
+                if 'product-item' in tokens or ('js-product-item' in tokens and el.tag == 'li'):
+                    yield el
+
+    def _first_link(self, item):
+        for link in item.iter('a'):
+            if link is not item:
+                return link
+        return None
+
+    def _product_nodes(self, doc):
+        for el in doc.iter(etree.Element):
+            attrib = el.attrib
+            if attrib and ('data-listprice' in attrib or 'data-manual-name' in attrib
+                           or 'product__row' in (attrib.get('class') or '')
+                           or (el.tag == 'a' and '.pdf' in (attrib.get('href') or '').lower())):
+                yield el
+            elif _is_prop65_text(el.text):
+                yield el
+
+    def _attrs(self, node):
+        return node.attrib
+
+    def _tag(self, node):
+        return node.tag
+
+    def _parent(self, node):
+        return node.getparent()
+
+    def _own_text(self, node):
+        return node.text
+
+    def _text(self, node):
+        return node.text_content()
+
+    def _row_cells(self, row):
+        labels = _ROW_LABEL(row)
+        values = _ROW_VALUE(row)
+        return (labels[0] if labels else None, values[0] if values else None, _ROW_MODELS_LINK(row))
+
+    def _fallback_price_text(self, doc):
+        price_rows = _LIST_PRICE_ROW(doc)
+        if price_rows and clean_text(price_rows[0].text_content()):
+            return clean_text(price_rows[0].text_content())
+        fallback = _PRICE_FALLBACK(doc)
+        if fallback:
+            price_text = clean_text(fallback[0].text_content())
+            if price_text and '$' in price_text and 'My Price' not in price_text:
+                return price_text
+        return None
+
+    def _json_script_texts(self, doc):
+        return [script.text for script in _JSON_SCRIPTS(doc)]
+
+
+class SelectolaxBackend(ParserBackend):
+    """Lexbor (HTML5) parser via selectolax; needs `pip install selectolax`"""
+    name = 'selectolax'
+
+    # One grouped selector, matched by lexbor in a single walk over the tree
+    PRODUCT_SELECTOR = ('[data-listprice], [data-manual-name], .product__row, a[href*=".pdf" i], '
+                        ':lexbor-contains("California Residents"), :lexbor-contains("Prop 65")')
+    LISTING_SELECTOR = 'li.js-product-item, .product-item'
+
+    @classmethod
+    def available(cls):
+        return LexborHTMLParser is not None
+
+    def parse(self, content):
+        return LexborHTMLParser(content)
+
+    def _unique(self, nodes):
+        # A node matched by several selectors of a group is returned once per match
+        seen = set()
+        for node in nodes:
+            if node.mem_id not in seen:
+                seen.add(node.mem_id)
+                yield node
+
+    def _listing_items(self, doc):
+        return self._unique(doc.css(self.LISTING_SELECTOR))
+
+    def _first_link(self, item):
+        return item.css_first('a')
+
+    def _product_nodes(self, doc):
+        return self._unique(doc.css(self.PRODUCT_SELECTOR))
+
+    def _attrs(self, node):
+        return node.attributes
+
+    def _tag(self, node):
+        return node.tag
+
+    def _parent(self, node):
+        return node.parent
+
+    def _own_text(self, node):
+        child = node.child
+        return child.text_content if child is not None and child.is_text_node else None
+
+    def _text(self, node):
+        return node.text(deep=True)
+
+    def _row_cells(self, row):
+        links = [link for link in row.css('a')
+                 if '#' in (link.attributes.get('href') or '') or 'View' in (self._own_text(link) or '')]
+        return row.css_first('.product__label'), row.css_first('.product__val'), links
+
+    def _fallback_price_text(self, doc):
+        for label in doc.css('div.product__row div.product__label'):
+            if 'List Price' not in (self._own_text(label) or ''):
+                continue
+            sibling = label.next
+            while sibling is not None:
+                if sibling.tag == 'div' and sibling.attributes.get('class') == 'product__cell product__val':
+                    if clean_text(sibling.text()):
+                        return clean_text(sibling.text())
+                    break
+                sibling = sibling.next
+            break
+        fallback = doc.css_first('.js-product-listPrice, .price-vat')
+        if fallback is not None:
+            price_text = clean_text(fallback.text())
+            if price_text and '$' in price_text and 'My Price' not in price_text:
+                return price_text
+        return None
+
+    def _json_script_texts(self, doc):
+        return [script.text(deep=True) for script in doc.css('script[type="application/json"]')]
+
+
+PARSER_BACKENDS = {
+    'lxml': LxmlBackend,
+    'selectolax': SelectolaxBackend,
+}
+
+
+def available_backends():
+    return [name for name, backend in PARSER_BACKENDS.items() if backend.available()]
+
+
+def get_parser_backend(name=None):
+    """Return a parser backend by name; None picks selectolax when installed, else lxml"""
+    if name is None:
+        name = 'selectolax' if SelectolaxBackend.available() else 'lxml'
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"unknown parser backend {name!r}; choose from {', '.join(PARSER_BACKENDS)}")
+    backend = PARSER_BACKENDS[name]
+    if not backend.available():
+        raise ValueError(f"parser backend {name!r} is not installed (pip install {name})")
+    return backend()
+
+
+def page_index_from_url(url):
+    """Return the ?page=N index in a listing URL, or None"""
+    match = re.search(r'[?&]page=(\d+)', url or '')
+    return int(match.group(1)) if match else None
+
+
+_LAST_PAGE_LINK = re.compile(r'aria-label="go to last page of results"[^>]*?data-base-url="([^"]*)"')
+
+
+def listing_page_count(content):
+    """Number of listing pages from the "last page" link of a server-rendered listing page, or None"""
+    text = content.decode('utf-8', 'replace') if isinstance(content, bytes) else content
+    for match in _LAST_PAGE_LINK.finditer(text):
+        last_page = page_index_from_url(match.group(1))
+        if last_page is not None:
+            return last_page + 1
+    return None
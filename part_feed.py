@@ -0,0 +1,165 @@
+"""
+Streams listed parts into the product-detail workers
+
+The listing crawl hands every parsed page to the feed instead of returning
+one big list at the end. Parts whose URL has not been seen yet are submitted
+to the detail executor right away, so product pages are scraped while later
+listing pages are still loading and the run takes about as long as the
+slower of the two stages.
+
+At most max_in_flight parts are queued or running at once; submit() blocks
+the listing crawl until a worker frees a slot, and wait_for_room() lets the
+listing hold off loading further pages while the window is full. Queued parts are PartRecords
+(name, URL and attempt number; the listing attributes are already in the
+crawl state) and seen URLs are kept in a UrlSet, so memory does not grow with
+the size of the catalog. Parts whose worker raised are handed to a RetryLane
+when one is given; wait() returns once every part succeeded or was given up on.
+"""
+import threading
+
+from url_set import UrlSet
+
+
+class PartRecord:
+    """A part queued for scraping; supports part['name'] / part.get('url') like the dicts it replaces"""
+    __slots__ = ('name', 'url', 'index', 'attempt')
+
+    def __init__(self, name, url, index=None, attempt=1):
+        self.name = name
+        self.url = url
+        self.index = index  # position in the feed, for progress output
+        self.attempt = attempt
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def __repr__(self):
+        return f"PartRecord({self.name!r}, {self.url!r})"
+
+
+class PartFeed:
+    def __init__(self, executor, worker, max_in_flight=12, progress_every=50, retry_lane=None):
+        """
+        `worker(part, index, total)` scrapes one part on an executor thread and raises if it failed.
+
+        Failed parts go to retry_lane (a RetryLane) when one is given.
+        """
+        self.executor = executor
+        self.worker = worker
+        self.max_in_flight = max_in_flight
+        self.progress_every = progress_every
+        self.retry_lane = retry_lane
+        self.seen = UrlSet()  # product URLs already listed (this run and, on --resume, earlier ones)
+        self.submitted = 0
+        self.completed = 0  # parts that succeeded or were given up on
+        self.failed = 0
+        self.listing_done = False
+        self._outstanding = 0  # submitted parts not completed yet, including ones waiting to be retried
+        self._running = 0  # parts queued or running in the executor
+        self._closed = False
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._cond = threading.Condition()
+        if retry_lane is not None:
+            retry_lane.start(self._submit)
+
+    def mark_seen(self, urls):
+        """Remember URLs that must not be submitted again"""
+        self.seen.update(urls)
+
+    def new_parts(self, parts):
+        """Named parts whose URL was not seen before, in listing order"""
+        return [part for part in parts if part['name'] and self.seen.add(part['url'])]
+
+    def submit(self, parts):
+        """Queue parts for the detail workers, waiting while max_in_flight are pending"""
+        for part in parts:
+            if self._closed:
+                return
+            with self._cond:
+                self.submitted += 1
+                self._outstanding += 1
+            self._submit(PartRecord(part['name'], part['url'], self.submitted))
+
+    def _submit(self, record):
+        # Poll so a producer blocked on a full window notices close()
+        while not self._slots.acquire(timeout=1):
+            if self._closed:
+                break
+        if self._closed:
+            self._resolve(record, ok=False, cancelled=True)
+            return
+        with self._cond:
+            self._running += 1
+        try:
+            future = self.executor.submit(self.worker, record, record.index, None)
+        except BaseException:
+            self._release()
+            self._resolve(record, ok=False, cancelled=True)
+            raise
+        future.add_done_callback(lambda future: self._done(record, future))
+
+    def _release(self):
+        self._slots.release()
+        with self._cond:
+            self._running -= 1
+            self._cond.notify_all()
+
+    def wait_for_room(self):
+        """Block while max_in_flight parts are queued or running (returns early once closed)"""
+        with self._cond:
+            while self._running >= self.max_in_flight and not self._closed:
+                self._cond.wait(1)
+
+    def finish_listing(self):
+        """No more parts will be added; progress lines show the final total from now on"""
+        self.listing_done = True
+
+    def _done(self, record, future):
+        self._release()
+        if future.cancelled():
+            self._resolve(record, ok=False, cancelled=True)
+            return
+        error = future.exception()
+        if error is None:
+            self._resolve(record, ok=True)
+        elif self.retry_lane is not None and not self._closed and self.retry_lane.schedule(record, str(error)):
+            return
+        else:
+            if self.retry_lane is None:
+                print(f"\nError in parallel processing: {error}")
+            self._resolve(record, ok=False)
+
+    def _resolve(self, record, ok, cancelled=False):
+        with self._cond:
+            self._outstanding -= 1
+            if not cancelled:
+                self.completed += 1
+                if not ok:
+                    self.failed += 1
+            completed = self.completed
+            if not self._outstanding:
+                self._cond.notify_all()
+        if not cancelled and (completed % self.progress_every == 0 or
+                              (self.listing_done and not self._outstanding)):
+            total = self.submitted if self.listing_done else f"{self.submitted}+ (listing still running)"
+            print(f"\nProgress: {completed}/{total} parts completed")
+
+    def wait(self):
+        """Block until every submitted part succeeded or was given up on (retries included)"""
+        with self._cond:
+            while self._outstanding > 0:
+                self._cond.wait()
+
+    def close(self):
+        """Stop accepting work; parts still waiting for a retry are dropped (they stay failed for --resume)"""
+        self._closed = True
+        if self.retry_lane is not None:
+            for _ in range(self.retry_lane.close()):
+                with self._cond:
+                    self._outstanding -= 1
+                    self._cond.notify_all()
@@ -0,0 +1,459 @@
+"""
+Full-text index over the downloaded PDF manuals
+
+Walks the part folders under trane_parts/ (manual_N.pdf files and, with
+--pdf-link-mode reference, manuals.json entries), extracts the text of every
+distinct manual once and keeps an inverted index in trane_parts/pdf_index.sqlite3:
+term -> manuals (with counts) -> part folders that link them. Model and part
+numbers are ordinary terms; hyphenated ones are also indexed by their pieces
+and with the separators removed, so "4TTR-4036", "4ttr4036" and "4036" all
+find the same manual.
+
+Updates are incremental. Manuals are keyed by SHA-256, so a manual linked from
+many parts (or downloaded again under another URL) is extracted once, and
+file hashes are cached by path, size and mtime. A rebuild only extracts manuals
+it has not seen, in a process pool, and refreshes the part links. Manuals no
+part links any more are dropped.
+
+Text extraction uses pdftotext (poppler-utils) when it is on PATH, otherwise
+the optional pypdf package (pip install pypdf).
+
+Usage:
+    python3 pdf_index.py build
+    python3 pdf_index.py search "compressor contactor"
+    python3 pdf_index.py search "TUD100*" --limit 5
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import sqlite3
+import subprocess
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+
+DEFAULT_OUTPUT_DIR = "trane_parts"
+INDEX_FILENAME = "pdf_index.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS manuals (
+    id INTEGER PRIMARY KEY,
+    sha256 TEXT UNIQUE NOT NULL,
+    url TEXT,
+    pages INTEGER,
+    terms INTEGER,
+    error TEXT,
+    indexed_at REAL
+);
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    manual_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (term_id, manual_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_manual ON postings (manual_id);
+CREATE TABLE IF NOT EXISTS part_manuals (
+    part TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    manual_id INTEGER NOT NULL,
+    product_url TEXT,
+    PRIMARY KEY (part, filename)
+);
+CREATE INDEX IF NOT EXISTS part_manuals_manual ON part_manuals (manual_id);
+"""
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+_SEPARATORS = re.compile(r"[-./]")
+_MANUAL_FILE = re.compile(r"manual_(\d+)\.pdf$")
+_SHA256_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+STOPWORDS = frozenset(
+    "an and are as at be by for from has in is it its of on or that the this to was were will with "
+    "not no if do does can may must should all any".split())
+
+MAX_PREFIX_TERMS = 200
+
+
+# -- text -----------------------------------------------------------------
+
+def tokenize(text):
+    """Index terms of a text: lowercase words and numbers, plus the pieces of hyphenated part/model numbers"""
+    for match in _TOKEN.finditer(text.lower()):
+        token = match.group()
+        if len(token) > 64:
+            continue
+        if len(token) > 1 and token not in STOPWORDS:
+            yield token
+        if _SEPARATORS.search(token):
+            if any(ch.isdigit() for ch in token):
+                yield _SEPARATORS.sub('', token)
+            for piece in _SEPARATORS.split(token):
+                if len(piece) > 1 and piece not in STOPWORDS:
+                    yield piece
+
+
+def text_extractor():
+    """Name of the extractor extract_text() will use, or None if neither is installed"""
+    if shutil.which('pdftotext'):
+        return 'pdftotext'
+    if pypdf is not None:
+        return 'pypdf'
+    return None
+
+
+def extract_text(path):
+    """(text, page count) of a PDF; raises if it cannot be read"""
+    if shutil.which('pdftotext'):
+        result = subprocess.run(['pdftotext', '-q', '-enc', 'UTF-8', path, '-'], capture_output=True, timeout=300)
+        if result.returncode == 0:
+            text = result.stdout.decode('utf-8', 'replace')
+            return text, text.count('\f') or 1
+        if pypdf is None:
+            raise RuntimeError(f"pdftotext exited with {result.returncode}")
+    if pypdf is None:
+        raise RuntimeError("no PDF text extractor: install poppler-utils (pdftotext) or pypdf")
+    reader = pypdf.PdfReader(path)
+    return '\n'.join(page.extract_text() or '' for page in reader.pages), len(reader.pages)
+
+
+def _index_manual(sha256, path):
+    """Process-pool worker: (sha256, pages, term counts, error) for one manual"""
+    try:
+        text, pages = extract_text(path)
+    except Exception as e:
+        return sha256, None, {}, f"{type(e).__name__}: {e}"
+    return sha256, pages, Counter(tokenize(text)), None
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# -- part folders ---------------------------------------------------------
+
+def _read_product_info(folder):
+    """(product page URL, {manual number: PDF URL}) from a part's product_info.txt"""
+    product_url, pdf_urls = None, {}
+    try:
+        with open(os.path.join(folder, 'product_info.txt'), 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('Product Page: '):
+                    product_url = line[len('Product Page: '):].strip()
+                else:
+                    match = re.match(r'PDF (\d+): (\S+)', line)
+                    if match:
+                        pdf_urls[int(match.group(1))] = match.group(2)
+    except OSError:
+        pass
+    return product_url, pdf_urls
+
+
+def scan_part_folders(output_dir):
+    """
+    Every manual linked into a part folder.
+
+    Yields dicts with 'part', 'filename', 'path', 'sha256' (known for references
+    and store symlinks, else None), 'url' and 'product_url'.
+    """
+    for entry in sorted(os.scandir(output_dir), key=lambda e: e.name):
+        if not entry.is_dir() or entry.name.startswith(('_', '.')) or entry.name == 'changes':
+            continue
+        try:
+            filenames = [name for name in os.listdir(entry.path) if _MANUAL_FILE.match(name)]
+        except OSError:
+            continue
+        references = {}
+        if os.path.exists(os.path.join(entry.path, 'manuals.json')):
+            try:
+                with open(os.path.join(entry.path, 'manuals.json'), 'r', encoding='utf-8') as f:
+                    references = json.load(f)
+            except (OSError, ValueError):
+                references = {}
+        if not filenames and not references:
+            continue
+
+        product_url, pdf_urls = _read_product_info(entry.path)
+        for filename in sorted(set(filenames) | set(references), key=lambda name: (len(name), name)):
+            path = os.path.join(entry.path, filename)
+            reference = references.get(filename) or {}
+            sha256 = reference.get('sha256')
+            if not os.path.exists(path) and reference.get('path'):
+                path = os.path.normpath(os.path.join(entry.path, reference['path']))
+            elif os.path.islink(path):
+                # Symlinks point into the content-addressed store (objects/ab/<sha256>.pdf)
+                name = os.path.splitext(os.path.basename(os.path.realpath(path)))[0]
+                sha256 = sha256 or (name if _SHA256_NAME.match(name) else None)
+            number = _MANUAL_FILE.match(filename)
+            yield {
+                'part': entry.name,
+                'filename': filename,
+                'path': path,
+                'sha256': sha256,
+                'url': reference.get('url') or (pdf_urls.get(int(number.group(1))) if number else None),
+                'product_url': product_url,
+            }
+
+
+# -- index ----------------------------------------------------------------
+
+class PdfIndex:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # -- building -------------------------------------------------------
+
+    def _hash(self, path, cached):
+        """SHA-256 of a file, reusing the cached value while size and mtime are unchanged"""
+        stat = os.stat(path)
+        row = cached.get(path)
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+        sha256 = file_sha256(path)
+        self.conn.execute("INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                          (path, stat.st_size, stat.st_mtime_ns, sha256))
+        return sha256
+
+    def _term_ids(self, terms):
+        """term -> id, adding terms not in the index yet"""
+        self.conn.executemany("INSERT OR IGNORE INTO terms (term) VALUES (?)", ((term,) for term in terms))
+        ids = {}
+        terms = list(terms)
+        for start in range(0, len(terms), 500):
+            chunk = terms[start:start + 500]
+            ids.update(self.conn.execute(
+                f"SELECT term, id FROM terms WHERE term IN ({','.join('?' * len(chunk))})", chunk))
+        return ids
+
+    def _add_manual(self, sha256, url, pages, counts, error):
+        cursor = self.conn.execute(
+            "INSERT OR REPLACE INTO manuals (sha256, url, pages, terms, error, indexed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (sha256, url, pages, len(counts), error, time.time()))
+        manual_id = cursor.lastrowid
+        if counts:
+            ids = self._term_ids(counts)
+            self.conn.executemany("INSERT INTO postings (term_id, manual_id, count) VALUES (?, ?, ?)",
+                                  ((ids[term], manual_id, count) for term, count in counts.items()))
+        return manual_id
+
+    def update(self, output_dir=DEFAULT_OUTPUT_DIR, workers=None, retry_errors=False):
+        """Index manuals that are new since the last update and refresh the part links; returns a stats dict"""
+        started = time.time()
+        cached = {path: (size, mtime_ns, sha256) for path, size, mtime_ns, sha256
+                  in self.conn.execute("SELECT path, size, mtime_ns, sha256 FROM files")}
+        links = []
+        missing = 0
+        for link in scan_part_folders(output_dir):
+            try:
+                link['sha256'] = link['sha256'] or self._hash(link['path'], cached)
+            except OSError:
+                missing += 1
+                continue
+            links.append(link)
+        seen_paths = {link['path'] for link in links}
+        self.conn.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in cached if path not in seen_paths))
+        self.conn.commit()
+
+        known = {sha256: error for sha256, error in self.conn.execute("SELECT sha256, error FROM manuals")}
+        todo = {}
+        for link in links:
+            sha256 = link['sha256']
+            if sha256 not in todo and (sha256 not in known or (retry_errors and known[sha256])):
+                if os.path.exists(link['path']):
+                    todo[sha256] = link
+
+        indexed = failed = 0
+        if todo:
+            if text_extractor() is None:
+                print("No PDF text extractor installed (poppler-utils' pdftotext or `pip install pypdf`); "
+                      f"{len(todo)} manual(s) left unindexed")
+            else:
+                print(f"Extracting text from {len(todo)} new manual(s) with {text_extractor()}...")
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(_index_manual, sha256, link['path']) for sha256, link in todo.items()]
+                    for done, future in enumerate(as_completed(futures), 1):
+                        sha256, pages, counts, error = future.result()
+                        self.conn.execute("DELETE FROM postings WHERE manual_id IN "
+                                          "(SELECT id FROM manuals WHERE sha256 = ?)", (sha256,))
+                        self._add_manual(sha256, todo[sha256]['url'], pages, counts, error)
+                        if error:
+                            failed += 1
+                            print(f"  Could not read {todo[sha256]['path']}: {error}")
+                        else:
+                            indexed += 1
+                        if done % 50 == 0:
+                            self.conn.commit()
+                            print(f"  {done}/{len(todo)} manuals indexed")
+                self.conn.commit()
+
+        # Part links are cheap; replace them all so moved and deleted part folders drop out
+        manual_ids = dict(self.conn.execute("SELECT sha256, id FROM manuals"))
+        with self.conn:
+            self.conn.execute("DELETE FROM part_manuals")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO part_manuals (part, filename, manual_id, product_url) VALUES (?, ?, ?, ?)",
+                ((link['part'], link['filename'], manual_ids[link['sha256']], link['product_url'])
+                 for link in links if link['sha256'] in manual_ids))
+            orphans = [row[0] for row in self.conn.execute(
+                "SELECT id FROM manuals WHERE id NOT IN (SELECT manual_id FROM part_manuals)")]
+            if orphans:
+                self.conn.executemany("DELETE FROM postings WHERE manual_id = ?", ((id_,) for id_ in orphans))
+                self.conn.executemany("DELETE FROM manuals WHERE id = ?", ((id_,) for id_ in orphans))
+                self.conn.execute("DELETE FROM terms WHERE id NOT IN (SELECT term_id FROM postings)")
+
+        stats = {
+            'links': len(links),
+            'manuals': len(manual_ids) - len(orphans),
+            'indexed': indexed,
+            'failed': failed,
+            'removed': len(orphans),
+            'missing_files': missing,
+            'seconds': round(time.time() - started, 2),
+        }
+        print(f"PDF index: {stats['manuals']} manuals ({indexed} new, {failed} unreadable, {len(orphans)} removed) "
+              f"linked from {len(links)} part file(s) in {stats['seconds']}s -> {self.path}")
+        return stats
+
+    # -- querying -------------------------------------------------------
+
+    def _query_terms(self, query):
+        """Groups of term ids, one group per indexable query word (a trailing * matches every term with that prefix)"""
+        groups = []
+        for word in query.lower().split():
+            if word.endswith('*') and len(word) > 1:
+                prefix = word.rstrip('*')
+                rows = self.conn.execute(
+                    "SELECT id FROM terms WHERE term >= ? AND term < ? LIMIT ?",
+                    (prefix, prefix + '\uffff', MAX_PREFIX_TERMS)).fetchall()
+                groups.append([row[0] for row in rows])
+                continue
+            for match in _TOKEN.finditer(word):
+                token = match.group()
+                # Same rules as tokenize(): stopwords and 1-character words were never indexed, so skip
+                # them instead of failing the whole query; for "a-1" only its indexable pieces are kept
+                if len(token) > 64:
+                    continue
+                terms = [token] if len(token) > 1 and token not in STOPWORDS else list(tokenize(token))
+                for term in terms:
+                    row = self.conn.execute("SELECT id FROM terms WHERE term = ?", (term,)).fetchone()
+                    groups.append([row[0]] if row else [])
+        return groups
+
+    def search(self, query, limit=20):
+        """
+        Manuals containing every query word, best match first.
+
+        Returns [{'sha256', 'url', 'pages', 'score', 'parts': [{'part', 'filename', 'product_url'}]}].
+        """
+        groups = self._query_terms(query)
+        if not groups or not all(groups):
+            return []
+        total = self.conn.execute("SELECT COUNT(*) FROM manuals WHERE error IS NULL").fetchone()[0] or 1
+        scores = None
+        for term_ids in groups:
+            group_scores = {}
+            for term_id in term_ids:
+                rows = self.conn.execute("SELECT manual_id, count FROM postings WHERE term_id = ?",
+                                         (term_id,)).fetchall()
+                idf = math.log(1 + total / len(rows)) if rows else 0
+                for manual_id, count in rows:
+                    group_scores[manual_id] = group_scores.get(manual_id, 0) + (1 + math.log(count)) * idf
+            if scores is None:
+                scores = group_scores
+            else:
+                scores = {manual_id: score + group_scores[manual_id]
+                          for manual_id, score in scores.items() if manual_id in group_scores}
+            if not scores:
+                return []
+
+        results = []
+        for manual_id, score in sorted(scores.items(), key=lambda item: -item[1])[:limit]:
+            sha256, url, pages = self.conn.execute(
+                "SELECT sha256, url, pages FROM manuals WHERE id = ?", (manual_id,)).fetchone()
+            parts = [{'part': part, 'filename': filename, 'product_url': product_url}
+                     for part, filename, product_url in self.conn.execute(
+                         "SELECT part, filename, product_url FROM part_manuals WHERE manual_id = ? ORDER BY part",
+                         (manual_id,))]
+            results.append({'sha256': sha256, 'url': url, 'pages': pages, 'score': round(score, 3), 'parts': parts})
+        return results
+
+
+def update_index(output_dir=DEFAULT_OUTPUT_DIR, workers=None):
+    """Bring output_dir/pdf_index.sqlite3 up to date (called after a crawl)"""
+    index = PdfIndex(os.path.join(output_dir, INDEX_FILENAME))
+    try:
+        return index.update(output_dir, workers=workers)
+    finally:
+        index.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query a full-text index of the downloaded PDF manuals")
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR, help="scraper output folder (default: trane_parts)")
+    parser.add_argument('--index', default=None, help="index file (default: <output-dir>/pdf_index.sqlite3)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="index new manuals and refresh the part links")
+    build.add_argument('--workers', type=int, default=None, help="extraction processes (default: CPU count)")
+    build.add_argument('--retry-errors', action='store_true', help="try manuals that could not be read before again")
+    search = commands.add_parser('search', help="find manuals containing every word (word* for a prefix)")
+    search.add_argument('query')
+    search.add_argument('--limit', type=int, default=20, help="number of manuals to show (default: 20)")
+    search.add_argument('--json', action='store_true', help="print the results as JSON")
+    args = parser.parse_args()
+
+    index = PdfIndex(args.index or os.path.join(args.output_dir, INDEX_FILENAME))
+    try:
+        if args.command == 'build':
+            index.update(args.output_dir, workers=args.workers, retry_errors=args.retry_errors)
+            return
+        started = time.perf_counter()
+        results = index.search(args.query, limit=args.limit)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if args.json:
+            print(json.dumps(results, indent=1))
+            return
+        for result in results:
+            print(f"{result['score']:>8.2f}  {result['url'] or result['sha256']}  ({result['pages']} pages)")
+            for part in result['parts'][:10]:
+                print(f"            {part['part']}/{part['filename']}  {part['product_url'] or ''}")
+            if len(result['parts']) > 10:
+                print(f"            ... {len(result['parts']) - 10} more part(s)")
+        print(f"{len(results)} manual(s) in {elapsed_ms:.1f} ms")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
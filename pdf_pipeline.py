@@ -0,0 +1,68 @@
+"""
+PDF download stage that runs separately from the browser workers
+
+Browser workers only enqueue (part, pdf_url, dest) jobs; a dedicated thread
+pool drains the bounded queue with its own concurrency limit.
+"""
+import queue
+import threading
+from collections import namedtuple
+
+
+PdfJob = namedtuple('PdfJob', ['part_name', 'pdf_url', 'dest'])
+
+_STOP = object()
+
+
+class PdfDownloadPipeline:
+    def __init__(self, handler, max_workers=4, queue_size=200):
+        """`handler(job)` downloads one PdfJob and returns True on success"""
+        self.handler = handler
+        self.max_workers = max_workers
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self._threads = []
+        for i in range(max_workers):
+            thread = threading.Thread(target=self._drain, name=f"pdf-downloader-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, part_name, pdf_url, dest):
+        """Queue a download; blocks while the queue is full so producers can't run away"""
+        self._queue.put(PdfJob(part_name, pdf_url, dest))
+        with self._lock:
+            self.submitted += 1
+
+    def _drain(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is _STOP:
+                    return
+                try:
+                    ok = self.handler(job)
+                except Exception as e:
+                    print(f"PDF job failed for {job.part_name} ({job.pdf_url}): {e}")
+                    ok = False
+                with self._lock:
+                    if ok:
+                        self.succeeded += 1
+                    else:
+                        self.failed += 1
+            finally:
+                self._queue.task_done()
+
+    def pending(self):
+        """Number of jobs waiting in the queue"""
+        return self._queue.qsize()
+
+    def close(self):
+        """Finish every queued job and stop the downloader threads"""
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        print(f"PDF downloads: {self.succeeded} succeeded, {self.failed} failed of {self.submitted} queued")
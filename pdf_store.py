@@ -0,0 +1,175 @@
+"""
+Content-addressed PDF store shared by all parts
+
+Each manual is downloaded once per canonical URL, stored under its SHA-256 and
+linked into the part folders. manifest.json maps canonical URLs to hashes so
+later runs reuse what is already on disk.
+"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+from urllib.parse import urlparse
+
+
+LINK_MODES = ('hardlink', 'symlink', 'reference')
+
+
+def canonical_pdf_url(url):
+    """Normalize a PDF URL so cache-busting query strings map to the same manual"""
+    parsed = urlparse(url)
+    return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}{parsed.path}"
+
+
+class PdfStore:
+    def __init__(self, root, link_mode='hardlink', save_every=50, tmp_dir=None):
+        """tmp_dir holds partial downloads; give each process sharing the store its own"""
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"link_mode must be one of {LINK_MODES}, got {link_mode!r}")
+        self.root = root
+        self.link_mode = link_mode
+        self.objects_dir = os.path.join(root, 'objects')
+        self.tmp_dir = tmp_dir or os.path.join(root, 'tmp')
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        self.save_every = save_every
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._inflight = {}  # canonical url -> threading.Event for the fetch in progress
+        self._unsaved = 0
+        self.downloads = 0
+        self.reused = 0
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """Write the manifest atomically, keeping entries other processes added meanwhile"""
+        with self._lock:
+            for key, entry in self._load_manifest().items():
+                self.manifest.setdefault(key, entry)
+            data = json.dumps(self.manifest, indent=1, sort_keys=True)
+            self._unsaved = 0
+        tmp_path = f"{self.manifest_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.manifest_path)
+
+    def object_path(self, sha256):
+        """Location of a stored PDF by content hash"""
+        return os.path.join(self.objects_dir, sha256[:2], f"{sha256}.pdf")
+
+    def fetch(self, pdf_url, download):
+        """
+        Make sure the PDF behind pdf_url is in the store and return its manifest entry.
+
+        `download(pdf_url, tmp_path)` must write the file and return its SHA-256
+        (or None on failure). Concurrent calls for the same URL share one download.
+        """
+        key = canonical_pdf_url(pdf_url)
+        while True:
+            with self._lock:
+                entry = self.manifest.get(key)
+                if entry and os.path.exists(self.object_path(entry['sha256'])):
+                    self.reused += 1
+                    return entry
+                event = self._inflight.get(key)
+                if event is None:
+                    event = threading.Event()
+                    self._inflight[key] = event
+                    break
+            # Another worker is downloading this manual; wait and re-check the manifest
+            event.wait()
+            with self._lock:
+                if key not in self.manifest:
+                    return None
+
+        try:
+            return self._download_into_store(key, pdf_url, download)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
+
+    def _download_into_store(self, key, pdf_url, download):
+        # Stable name per URL so an interrupted transfer's .part file can be resumed
+        tmp_path = os.path.join(self.tmp_dir, f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.pdf")
+        try:
+            sha256 = download(pdf_url, tmp_path)
+            if not sha256:
+                return None
+            object_path = self.object_path(sha256)
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            if os.path.exists(object_path):
+                # Same bytes already stored under another URL
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, object_path)
+            entry = {'sha256': sha256, 'size': os.path.getsize(object_path), 'url': pdf_url}
+            with self._lock:
+                self.manifest[key] = entry
+                self.downloads += 1
+                self._unsaved += 1
+                should_save = self._unsaved >= self.save_every
+            if should_save:
+                self.save()
+            return entry
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def link(self, entry, dest):
+        """Place a stored PDF at dest (hardlink, symlink, or nothing for 'reference'); returns the mode used"""
+        source = self.object_path(entry['sha256'])
+        if self.link_mode == 'reference':
+            return 'reference'
+        os.makedirs(os.path.dirname(dest) or '.', exist_ok=True)
+        if os.path.lexists(dest):
+            try:
+                if os.path.samefile(source, dest):
+                    return self.link_mode
+            except OSError:
+                pass
+            os.remove(dest)
+
+        if self.link_mode == 'hardlink':
+            try:
+                os.link(source, dest)
+                return 'hardlink'
+            except OSError:
+                pass  # e.g. store on a different filesystem; try a symlink
+        try:
+            os.symlink(os.path.relpath(source, os.path.dirname(dest) or '.'), dest)
+            return 'symlink'
+        except OSError:
+            return 'reference'
+
+    def add_reference(self, part_folder, pdf_filename, pdf_url, entry):
+        """Record in the part's manuals.json that pdf_filename is a stored PDF"""
+        os.makedirs(part_folder, exist_ok=True)
+        path = os.path.join(part_folder, 'manuals.json')
+        with self._lock:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    references = json.load(f)
+            except (OSError, ValueError):
+                references = {}
+            references[pdf_filename] = {
+                'url': pdf_url,
+                'sha256': entry['sha256'],
+                'path': os.path.relpath(self.object_path(entry['sha256']), part_folder),
+            }
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(references, f, indent=1, sort_keys=True)
+
+    def close(self):
+        """Persist the manifest"""
+        self.save()
+        print(f"PDF store: {self.downloads} downloaded, {self.reused} reused, {len(self.manifest)} in manifest")
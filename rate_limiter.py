@@ -0,0 +1,124 @@
+"""
+Adaptive per-host rate limiter shared by every worker thread
+
+Each (lane, host) pair gets its own token bucket, so page fetches and PDF
+downloads ('page' and 'pdf' lanes) are paced separately even when the site
+serves both from the same host. Callers take a token with acquire(url) before
+a request and report the outcome with record(). The rate grows additively
+while responses are fast and healthy (2xx/3xx), and is cut multiplicatively
+on 429/503 or slow responses (AIMD). Other 4xx responses leave it unchanged.
+A Retry-After header pauses the bucket entirely for that long.
+"""
+import threading
+import time
+from urllib.parse import urlparse
+
+
+BACKOFF_STATUSES = (429, 503)
+
+
+class _HostBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate=1.0, min_rate=0.1, max_rate=10.0, burst=2, increase=0.1,
+                 backoff_factor=0.5, slow_factor=0.75, slow_threshold=5.0):
+        """
+        rate/min_rate/max_rate are requests per second per host. increase is added
+        after every healthy response; backoff_factor multiplies the rate on
+        429/503 and slow_factor on responses slower than slow_threshold seconds.
+        """
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.backoff_factor = backoff_factor
+        self.slow_factor = slow_factor
+        self.slow_threshold = slow_threshold
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self.waited = 0.0
+        self.backoffs = 0
+
+    def _bucket(self, url, lane):
+        key = (lane, urlparse(url).netloc.lower())
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _HostBucket(self.initial_rate, self.burst)
+        return bucket
+
+    def acquire(self, url, lane='page'):
+        """Block until a request to url's host is allowed on lane"""
+        while True:
+            with self._lock:
+                bucket = self._bucket(url, lane)
+                now = time.monotonic()
+                bucket.tokens = min(bucket.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+                bucket.updated = now
+                if now >= bucket.paused_until and bucket.tokens >= 1:
+                    bucket.tokens -= 1
+                    return
+                delay = max(bucket.paused_until - now, (1 - bucket.tokens) / bucket.rate)
+                self.waited += delay
+            time.sleep(delay)
+
+    def record(self, url, status_code=None, elapsed=None, retry_after=None, lane='page'):
+        """Adapt the host's rate on lane to a response (status_code None means a transport error)"""
+        with self._lock:
+            bucket = self._bucket(url, lane)
+            if status_code in BACKOFF_STATUSES:
+                bucket.rate = max(self.min_rate, bucket.rate * self.backoff_factor)
+                self.backoffs += 1
+                pause = _parse_retry_after(retry_after)
+                if pause:
+                    bucket.paused_until = max(bucket.paused_until, time.monotonic() + pause)
+                    bucket.tokens = 0
+            elif status_code is None or (elapsed is not None and elapsed > self.slow_threshold):
+                bucket.rate = max(self.min_rate, bucket.rate * self.slow_factor)
+            elif status_code < 400:
+                # 404s and other client errors say nothing about the server's load
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def record_response(self, url, response, elapsed, lane='page'):
+        """record() for a requests.Response"""
+        self.record(url, response.status_code, elapsed, response.headers.get('Retry-After'), lane=lane)
+
+    def rates(self):
+        """Current requests-per-second per host (suffixed with the lane unless it is 'page')"""
+        with self._lock:
+            return {host if lane == 'page' else f"{host} ({lane})": round(bucket.rate, 2)
+                    for (lane, host), bucket in self._buckets.items()}
+
+    def summary(self):
+        return (f"Rate limiter: {self.backoffs} backoff(s), {self.waited:.1f}s waited, "
+                f"rates {self.rates()}")
+
+
+def _parse_retry_after(value):
+    """Seconds from a Retry-After header (HTTP-date values are ignored)"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def limited_get(limiter, session, url, lane='page', **kwargs):
+    """session.get(url) paced and fed back through limiter (which may be None) on lane"""
+    if limiter is None:
+        return session.get(url, **kwargs)
+    limiter.acquire(url, lane)
+    start = time.monotonic()
+    try:
+        response = session.get(url, **kwargs)
+    except Exception:
+        limiter.record(url, None, time.monotonic() - start, lane=lane)
+        raise
+    limiter.record_response(url, response, time.monotonic() - start, lane=lane)
+    return response
@@ -0,0 +1,101 @@
+"""
+Retry lane for parts whose product page could not be scraped
+
+A failed part is not retried on the worker that failed it. It is parked on
+this lane's own thread with an exponential backoff plus jitter (half the
+delay fixed, half random, so retries after an outage don't arrive in
+lockstep) and handed back to the detail pool once it is due. Healthy work
+keeps the workers in the meantime. After max_attempts the part is written to
+a dead-letter JSON-lines file instead; the crawl state keeps it as failed, so
+--resume tries it again later. With metrics, scheduled retries count under
+'retries' and dead-lettered parts under 'parts_failed'.
+"""
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+
+
+class RetryLane:
+    def __init__(self, max_attempts=3, base_delay=30.0, max_delay=900.0, dead_letter_path=None, metrics=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.dead_letter_path = dead_letter_path
+        self.metrics = metrics
+        self.retried = 0
+        self.dead_lettered = 0
+        self._submit = None
+        self._heap = []  # (due, seq, part)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._file_lock = threading.Lock()
+        self._stopped = False
+        self._thread = None
+
+    def start(self, submit):
+        """Start handing due parts to submit(part) (which may block for a free slot)"""
+        self._submit = submit
+        self._thread = threading.Thread(target=self._run, name='retry-lane', daemon=True)
+        self._thread.start()
+
+    def delay(self, attempt):
+        """Seconds to wait after the given failed attempt (1-based)"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def schedule(self, part, error):
+        """Park a failed part for another attempt; returns False once it was dead-lettered instead"""
+        if part.attempt >= self.max_attempts:
+            self._dead_letter(part, error)
+            return False
+        due = time.monotonic() + self.delay(part.attempt)
+        with self._cond:
+            heapq.heappush(self._heap, (due, next(self._seq), part))
+            self.retried += 1
+            self._cond.notify()
+        if self.metrics is not None:
+            self.metrics.inc('retries')
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                if self._stopped:
+                    return
+                _, _, part = heapq.heappop(self._heap)
+            part.attempt += 1
+            print(f"Retrying {part.name} (attempt {part.attempt}/{self.max_attempts})")
+            self._submit(part)
+
+    def _dead_letter(self, part, error):
+        self.dead_lettered += 1
+        if self.metrics is not None:
+            self.metrics.inc('parts_failed')
+        print(f"Giving up on {part.name} after {part.attempt} attempt(s): {error}")
+        if not self.dead_letter_path:
+            return
+        entry = {'url': part.url, 'name': part.name, 'attempts': part.attempt, 'error': error,
+                 'failed_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        with self._file_lock:
+            os.makedirs(os.path.dirname(self.dead_letter_path) or '.', exist_ok=True)
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+
+    def close(self):
+        """Stop the lane; parts still parked stay failed in the crawl state for --resume"""
+        with self._cond:
+            self._stopped = True
+            dropped = len(self._heap)
+            self._heap = []
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        if dropped:
+            print(f"Retry lane stopped with {dropped} part(s) still waiting")
+        return dropped
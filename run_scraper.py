@@ -19,7 +19,7 @@ def print_menu():
     print("Choose a scraper:")
     print("1. Test Connection (recommended first)")
     print("2. Selenium Scraper (for JavaScript-heavy sites)")
-    print("3. Basic Scraper (BeautifulSoup - faster but may not work)")
+    print("3. Basic Scraper (requests + lxml - faster but may not work)")
     print("4. Quit")
     print()
 
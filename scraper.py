@@ -1,97 +1,216 @@
+import argparse
 import requests
-from bs4 import BeautifulSoup
 import os
 import re
 import time
-from urllib.parse import urljoin, urlparse
-import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
+from downloads import download_pdf_file, DEFAULT_CHUNK_SIZE
+from rate_limiter import AdaptiveRateLimiter, limited_get
+from page_parsers import PARSER_BACKENDS, get_parser_backend, clean_text, listing_page_count
+from url_set import UrlSet
+from metrics import Metrics
+
+
+# The listing's AJAX paging asks for the same ?page=N URLs with these headers and gets JSON back
+XHR_HEADERS = {
+    'Accept': 'application/json, text/javascript, */*; q=0.01',
+    'X-Requested-With': 'XMLHttpRequest',
+}
+
+
+def _attr_value(value):
+    """Render a JSON value the way the listing template writes it into a data- attribute"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
 
 
 class PartstownScraper:
-    def __init__(self, base_url="https://www.partstown.com"):
+    def __init__(self, base_url="https://www.partstown.com", pdf_chunk_size=DEFAULT_CHUNK_SIZE, rate_limiter=None,
+                 parser_backend=None, metrics=None):
         self.base_url = base_url
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.session = self._new_session()
+        self._thread_local = threading.local()
         self.output_dir = "trane_parts"
+        self.pdf_chunk_size = pdf_chunk_size  # Bytes per read when streaming PDFs
+        # Paces requests per host and backs off on 429/503 (replaces fixed sleeps)
+        self.rate_limiter = rate_limiter if rate_limiter is not None else AdaptiveRateLimiter()
+        # lxml or selectolax; None picks the fastest one installed
+        self.parser = get_parser_backend(parser_backend)
+        # Retry and failure counters, printed at the end of the run
+        self.metrics = metrics if metrics is not None else Metrics()
         
+    def _new_session(self):
+        session = requests.Session()
+        session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        })
+        return session
+    
+    def _thread_session(self):
+        """requests session owned by the current thread (sessions aren't shared between threads)"""
+        session = getattr(self._thread_local, 'session', None)
+        if session is None:
+            session = self._thread_local.session = self._new_session()
+        return session
+    
     def sanitize_filename(self, filename):
         """Remove invalid characters from filename"""
         filename = re.sub(r'[<>:"/\\|?*]', '', filename)
         filename = filename.strip()
         return filename[:100]  # Limit length
     
-    def get_page(self, url, retries=3):
+    def get_page(self, url, retries=3, session=None, headers=None):
         """Fetch a page with retry logic"""
+        session = session if session is not None else self.session
         for attempt in range(retries):
             try:
-                response = self.session.get(url, timeout=30)
+                response = limited_get(self.rate_limiter, session, url, timeout=30, headers=headers)
                 response.raise_for_status()
                 return response
             except requests.exceptions.RequestException as e:
                 if attempt < retries - 1:
+                    self.metrics.inc('retries')
                     time.sleep(2 ** attempt)
                     continue
                 print(f"Failed to fetch {url}: {e}")
+                self.metrics.inc('fetch_failures')
                 return None
     
-    def extract_trane_parts(self, url):
-        """Extract all Trane parts from the main parts page"""
-        print(f"Fetching Trane parts from: {url}")
-        response = self.get_page(url)
+    def listing_page_url(self, url, page):
+        """Direct ?page=N URL of a listing page (pages are 0-based)"""
+        parsed = urlparse(url)
+        query = [(k, v) for k, v in parse_qsl(parsed.query) if k != 'page']
+        query.append(('page', str(page)))
+        return urlunparse(parsed._replace(query=urlencode(query), fragment=''))
+    
+    def fetch_listing_page(self, url, page, session=None):
+        """
+        Fetch one listing page the way the site's AJAX paging does.
+        
+        Returns (parts, page_count); parts is None if the page failed. JSON
+        responses are read directly; if the server answers with HTML, the
+        rendered product items are parsed instead.
+        """
+        response = self.get_page(self.listing_page_url(url, page), session=session, headers=XHR_HEADERS)
         if not response:
+            return None, None
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            pagination = self._json_pagination(data)
+            return self._parse_json_data(data), pagination.get('numberOfPages')
+        return self.parse_listing_html(response.content), listing_page_count(response.content)
+    
+    def _fetch_listing_parts(self, url, page):
+        """Pool worker: one listing page's parts on this thread's session"""
+        return self.fetch_listing_page(url, page, session=self._thread_session())[0]
+    
+    def extract_trane_parts(self, url, max_pages=None, max_workers=4):
+        """Extract all Trane parts, fetching the listing pages concurrently over HTTP"""
+        print(f"Fetching Trane parts from: {url}")
+        first_parts, page_count = self.fetch_listing_page(url, 0)
+        if first_parts is None:
             return []
+        page_count = page_count or 1
+        if max_pages:
+            page_count = min(page_count, max_pages)
+        print(f"Listing has {page_count} page(s); fetching with {max_workers} worker(s)")
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        parts = []
-        
-        # Look for product cards/links - this may need adjustment based on actual HTML structure
-        product_links = soup.find_all('a', href=re.compile(r'/trane/parts/'))
+        pages = {0: first_parts}
+        failed = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self._fetch_listing_parts, url, page): page for page in range(1, page_count)}
+            for done, future in enumerate(as_completed(futures), 2):
+                page = futures[future]
+                pages[page] = future.result()
+                if pages[page] is None:
+                    failed.append(page)
+                if done % 50 == 0 or done == page_count:
+                    print(f"  {done}/{page_count} listing pages fetched")
+        if failed:
+            print(f"  {len(failed)} listing page(s) failed: {sorted(failed)[:20]}")
         
-        for link in product_links:
-            product_url = urljoin(self.base_url, link.get('href', ''))
-            product_name = link.get_text(strip=True)
-            
-            if product_url and product_name:
-                parts.append({
-                    'name': product_name,
-                    'url': product_url
-                })
+        # Dedup by product URL, in page order
+        seen_urls = UrlSet()
+        parts = [part for page in sorted(pages) for part in pages[page] or []
+                 if part['name'] and seen_urls.add(part['url'])]
+        print(f"Found {len(parts)} parts")
+        return parts
+    
+    def parse_listing_html(self, content):
+        """Extract name/url/listing attributes for every part on a listing page"""
+        parts = self.parser.parse_listing(content, self.base_url)
         
-        # If the above doesn't work, try to find JSON data in the page
-        if not parts:
-            scripts = soup.find_all('script', type='application/json')
-            for script in scripts:
-                try:
-                    data = json.loads(script.string)
-                    # Process JSON data structure
-                    if isinstance(data, dict):
-                        parts.extend(self._parse_json_data(data))
-                except:
-                    pass
-        
-        # Alternative: Look for data attributes or specific class patterns
+        # If no product items were found, try the JSON data embedded in the page
         if not parts:
-            product_cards = soup.find_all(['div', 'article'], class_=re.compile(r'product|item', re.I))
-            for card in product_cards:
-                link = card.find('a', href=True)
-                if link:
-                    product_url = urljoin(self.base_url, link['href'])
-                    product_name = link.get_text(strip=True) or card.get_text(strip=True)
-                    if product_url and product_name:
-                        parts.append({
-                            'name': product_name,
-                            'url': product_url
-                        })
+            for data in self.parser.json_scripts(content):
+                if isinstance(data, dict):
+                    parts.extend(self._parse_json_data(data))
         
-        print(f"Found {len(parts)} parts")
         return parts
     
+    @staticmethod
+    def _json_results(data):
+        """Product list of a search/listing JSON response (Hybris SearchPageData and similar)"""
+        for container in (data, data.get('searchPageData'), data.get('productSearchPageData')):
+            if isinstance(container, dict):
+                for key in ('results', 'products'):
+                    if isinstance(container.get(key), list):
+                        return container[key]
+        return []
+    
+    @staticmethod
+    def _json_pagination(data):
+        for container in (data, data.get('searchPageData'), data.get('productSearchPageData')):
+            if isinstance(container, dict) and isinstance(container.get('pagination'), dict):
+                return container['pagination']
+        return {}
+    
     def _parse_json_data(self, data):
-        """Parse JSON data to extract parts"""
+        """Parse listing JSON into [{'name', 'url', 'listing'}], with the same listing attributes as the HTML items"""
         parts = []
-        # This is a placeholder - actual implementation depends on JSON structure
+        for product in self._json_results(data):
+            if not isinstance(product, dict):
+                continue
+            # Order/cart-style entries wrap the product
+            product = (product.get('productEntry') or {}).get('product') or product.get('product') or product
+            name = product.get('name')
+            url = product.get('url')
+            if not name or not url:
+                continue
+            
+            listing = {}
+            if product.get('code') is not None:
+                listing['data-id'] = _attr_value(product['code'])
+            mfr_number = product.get('manufacturerPartnumber') or product.get('manufacturerPartNumber')
+            if mfr_number is not None:
+                listing['data-mfrpartnumber'] = _attr_value(mfr_number)
+            price = product.get('price')
+            if isinstance(price, dict) and price.get('value') is not None:
+                listing['data-pt-price'] = _attr_value(price['value'])
+            stock = product.get('stock')
+            if isinstance(stock, dict):
+                if stock.get('stockLevel') is not None:
+                    listing['data-quantityonhand'] = _attr_value(max(stock['stockLevel'], 0))
+                status = stock.get('stockStatusMsg') or (stock.get('stockLevelStatus') or {}).get('code')
+                if status:
+                    listing['data-stock-status'] = clean_text(re.sub(r'<[^>]+>', ' ', status))
+            unit = product.get('unitOfMeasure')
+            if unit:
+                listing['data-units'] = 'Each' if unit == 'EA' else _attr_value(unit)
+            
+            parts.append({
+                'name': clean_text(name),
+                'url': urljoin(self.base_url, url),
+                'listing': listing,
+            })
         return parts
     
     def get_part_details(self, part_url):
@@ -101,73 +220,16 @@ class PartstownScraper:
         if not response:
             return None, []
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        details = {}
-        pdf_urls = []
-        
-        # Extract product information
-        details_fields = {
-            'List Price': None,
-            'Quantity Available': None,
-            'Manufacturer': None,
-            'Manufacturer #': None,
-            'Parts Town #': None,
-            'Units': None,
-            'Fits Models': None,
-            'California Residents': None
-        }
-        
-        # Find product specifications - adjust selectors based on actual HTML
-        spec_section = soup.find(['div', 'section'], class_=re.compile(r'spec|detail|product-info', re.I))
-        if spec_section:
-            rows = spec_section.find_all(['tr', 'div'], class_=re.compile(r'row|item', re.I))
-            for row in rows:
-                label_elem = row.find(['td', 'dt', 'span'], class_=re.compile(r'label|name', re.I))
-                value_elem = row.find(['td', 'dd', 'span'], class_=re.compile(r'value|data', re.I))
-                
-                if label_elem and value_elem:
-                    label = label_elem.get_text(strip=True)
-                    value = value_elem.get_text(strip=True)
-                    
-                    # Map to our fields
-                    for key in details_fields.keys():
-                        if key.lower() in label.lower():
-                            details_fields[key] = value
-        
-        details = details_fields
-        
-        # Find PDF links
-        pdf_links = soup.find_all('a', href=re.compile(r'\.pdf$', re.I))
-        for link in pdf_links:
-            pdf_url = urljoin(self.base_url, link['href'])
-            pdf_urls.append(pdf_url)
-        
-        # Also check for download buttons or manual sections
-        download_links = soup.find_all(['a', 'button'], string=re.compile(r'manual|pdf|download', re.I))
-        for link in download_links:
-            href = link.get('href', '')
-            if '.pdf' in href.lower():
-                pdf_url = urljoin(self.base_url, href)
-                if pdf_url not in pdf_urls:
-                    pdf_urls.append(pdf_url)
-        
-        return details, pdf_urls
+        return self.parse_part_html(response.content)
+    
+    def parse_part_html(self, content):
+        """Extract (details, pdf_urls) from a product page"""
+        return self.parser.parse_product(content, self.base_url)
     
     def download_pdf(self, pdf_url, filepath):
-        """Download a PDF file"""
-        try:
-            response = self.session.get(pdf_url, timeout=60, stream=True)
-            response.raise_for_status()
-            
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            print(f"Downloaded: {os.path.basename(filepath)}")
-            return True
-        except Exception as e:
-            print(f"Failed to download PDF {pdf_url}: {e}")
-            return False
+        """Download a PDF file (resumable, verified before it is moved into place)"""
+        return download_pdf_file(self.session, pdf_url, filepath, chunk_size=self.pdf_chunk_size,
+                                 limiter=self.rate_limiter) is not None
     
     def save_part_info(self, details, filepath):
         """Save part information to a text file"""
@@ -203,9 +265,8 @@ class PartstownScraper:
                 pdf_count += 1
         
         print(f"Scraped: {part_name} ({pdf_count} PDFs downloaded)")
-        time.sleep(1)  # Be respectful
     
-    def run(self, url):
+    def run(self, url, max_pages=None, listing_workers=4):
         """Main scraping function"""
         print("Starting Partstown Trane Parts Scraper")
         print("=" * 50)
@@ -214,7 +275,7 @@ class PartstownScraper:
         os.makedirs(self.output_dir, exist_ok=True)
         
         # Get all parts
-        parts = self.extract_trane_parts(url)
+        parts = self.extract_trane_parts(url, max_pages=max_pages, max_workers=listing_workers)
         
         if not parts:
             print("No parts found. This might be due to:")
@@ -231,12 +292,25 @@ class PartstownScraper:
         
         print("\n" + "=" * 50)
         print(f"Scraping complete! {total} parts processed.")
+        counters = self.metrics.counter_totals()
+        if counters:
+            print(', '.join(f"{name}: {value}" for name, value in sorted(counters.items())))
 
 
 def main():
-    url = "https://www.partstown.com/trane/parts#id=mdptabparts"
-    scraper = PartstownScraper()
-    scraper.run(url)
+    parser = argparse.ArgumentParser(description="Scrape Trane parts and PDF manuals from Partstown (requests)")
+    parser.add_argument('--base-url', default="https://www.partstown.com",
+                        help="site to crawl, e.g. http://127.0.0.1:8765 for mock_server.py")
+    parser.add_argument('--parser', choices=sorted(PARSER_BACKENDS), default=None,
+                        help="HTML parser backend (default: selectolax if installed, else lxml)")
+    parser.add_argument('--max-pages', type=int, default=None, help="only crawl this many listing pages")
+    parser.add_argument('--listing-workers', type=int, default=4,
+                        help="listing pages fetched concurrently (default: 4)")
+    args = parser.parse_args()
+    base_url = args.base_url.rstrip('/')
+    url = f"{base_url}/trane/parts#id=mdptabparts"
+    scraper = PartstownScraper(base_url=base_url, parser_backend=args.parser)
+    scraper.run(url, max_pages=args.max_pages, listing_workers=args.listing_workers)
 
 
 if __name__ == "__main__":
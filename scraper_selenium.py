@@ -4,34 +4,140 @@ from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import (
+    TimeoutException, NoSuchElementException, StaleElementReferenceException, WebDriverException,
+)
 from webdriver_manager.chrome import ChromeDriverManager
 import requests
 import os
 import re
 import time
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import threading
+import argparse
+from driver_pool import DriverPool
+from browser_profile import BrowserProfile
+from metrics import Metrics
+from dom_scripts import BULK_EXTRACT_SCRIPT, REVEAL_PDFS_SCRIPT, LISTING_EXTRACT_SCRIPT, LISTING_ATTRIBUTES
+from pdf_store import PdfStore
+from pdf_pipeline import PdfDownloadPipeline
+from part_feed import PartFeed
+from retry_lane import RetryLane
+from circuit_breaker import CircuitBreaker
+from pdf_index import update_index as update_pdf_index
+from catalog_index import update_index as update_catalog_index
+from url_set import UrlSet
+from downloads import download_pdf_file, DEFAULT_CHUNK_SIZE
+from crawl_state import CrawlState, IN_PROGRESS, DONE, FAILED, PENDING
+from listing_catalog import ListingCatalog, write_change_report
+from catalog_sink import CatalogSink, make_record, write_parquet
+from rate_limiter import AdaptiveRateLimiter, limited_get
+from fits_models import ModelListFetcher, DEFAULT_ENDPOINT as FITS_MODELS_ENDPOINT, describe as describe_fits_models
+from shards import (
+    owns_page, shard_path, launch_shards, merge_catalog_files, listing_started, merge_listing_catalogs,
+    write_removed_report,
+)
+from page_parsers import (
+    empty_details, map_detail_label, format_list_price, clean_prop65_text,
+    normalize_pdf_url, missing_required_fields, page_index_from_url, PARSER_BACKENDS, get_parser_backend,
+)
+
+
+# chromedriver is resolved once per process instead of once per browser
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+
+def get_chromedriver_path():
+    """Resolve (and download if needed) the chromedriver binary once per process"""
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            _chromedriver_path = ChromeDriverManager().install()
+        return _chromedriver_path
+
+
+# OneTrust sets this cookie once the consent banner has been answered
+CONSENT_COOKIE = 'OptanonAlertBoxClosed'
+
+COUNTRY_POPUP_XPATH = (
+    "//button[contains(@class, 'js-country-popup-proceed')] | "
+    "//button[contains(text(), 'START SHOPPING') or contains(text(), 'Start Shopping')] | "
+    "//a[contains(text(), 'START SHOPPING')]")
+
+CONSENT_POPUP_XPATH = (
+    "//button[@id='onetrust-accept-btn-handler'] | "
+    "//button[contains(text(), 'Accept') or contains(text(), 'Accept All') or contains(text(), 'Ok')]")
+
+LISTING_ITEM_SELECTOR = "li.js-product-item, .product-item"
+PRODUCT_INFO_SELECTOR = ".product-info, .product-block"
 
 
 class PartstownScraperSelenium:
-    def __init__(self, base_url="https://www.partstown.com", unique_pdfs=True):
+    def __init__(self, base_url="https://www.partstown.com", unique_pdfs=True, http_first=True,
+                 bulk_extract=True, shared_pdf_store=True, pdf_link_mode='hardlink',
+                 pdf_chunk_size=DEFAULT_CHUNK_SIZE, catalog_format='jsonl', catalog_parquet=False,
+                 write_info_files=True, rate_limiter=None, shard_index=None, shard_count=1,
+                 browser_profile=None, metrics=None, parser_backend=None, fits_models=None, circuit_breaker=None):
         self.base_url = base_url
         self.output_dir = "trane_parts"
         self.driver = None
         self.session = requests.Session()
         self.unique_pdfs = unique_pdfs  # True for unique PDFs only, False for all PDFs
+        self.http_first = http_first  # Try a plain HTTP fetch before rendering in Chrome
+        self.bulk_extract = bulk_extract  # Read each page state with one injected script
+        self.shared_pdf_store = shared_pdf_store  # Download each manual once and link it into part folders
+        self.pdf_link_mode = pdf_link_mode  # 'hardlink', 'symlink' or 'reference' (manuals.json only)
+        self.pdf_chunk_size = pdf_chunk_size  # Bytes per read when streaming PDFs
+        self.catalog_format = catalog_format  # 'jsonl', 'sqlite' or None for no structured catalog
+        self.catalog_parquet = catalog_parquet  # Also roll the catalog into catalog.parquet (needs pyarrow)
+        self.write_info_files = write_info_files  # Write product_info.txt into each part folder
+        self.catalog_sink = None
+        # Paces page loads and PDF downloads per host for all workers (replaces fixed sleeps)
+        self.rate_limiter = rate_limiter if rate_limiter is not None else AdaptiveRateLimiter()
+        # With --shards, this process only crawls listing pages where page % shard_count == shard_index
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.pdf_store = None
+        self.pdf_pipeline = None
+        self.crawl_state = None
+        self.catalog = None
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        self.driver_pool = None
+        self._thread_local = threading.local()
+        # Explicit timeouts (seconds) for condition-based waits
+        self.popup_timeout = 3
+        # Images, fonts, media and third-party tags are blocked unless a profile says otherwise
+        self.browser_profile = browser_profile if browser_profile is not None else BrowserProfile()
+        self.ready_states = self.browser_profile.ready_states()
+        # Stage timings and counters, labelled per worker thread
+        self.metrics = metrics if metrics is not None else Metrics()
+        # HTML parser for HTTP-fetched product pages; None picks selectolax when installed, else lxml
+        self.parser = get_parser_backend(parser_backend)
+        # ModelListFetcher for complete "Fits Models" lists over HTTP; None keeps the details row text
+        self.fits_models = fits_models
+        if fits_models is not None and fits_models.rate_limiter is None:
+            fits_models.rate_limiter = self.rate_limiter
+        if fits_models is not None and fits_models.metrics is None:
+            fits_models.metrics = self.metrics
+        # Pauses listing and detail workers alike when most recent pages failed
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        self.manuals_tab_timeout = 4
+        self.scroll_delay = 1
+        self._country_cookie_names = set()
+        self._country_cookie_lock = threading.Lock()  # pool threads learn the names concurrently
+        # Listing pages that failed (or a click-through crawl that stopped early) in the last listing crawl
+        self.listing_failures = 0
         
     def _create_driver(self):
         """Create a new Selenium WebDriver instance (for parallel processing)"""
         chrome_options = Options()
-        # Comment out headless for debugging - we can enable it after testing
-        # chrome_options.add_argument('--headless')  # Run in background
+        # Headless mode, page-load strategy and image blocking come from the browser profile
+        self.browser_profile.apply_to_options(chrome_options)
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
         chrome_options.add_argument('--disable-blink-features=AutomationControlled')
@@ -52,12 +158,13 @@ class PartstownScraperSelenium:
         
         try:
             # Use webdriver-manager to automatically download and manage chromedriver
-            service = Service(ChromeDriverManager().install())
+            service = Service(get_chromedriver_path())
             driver = webdriver.Chrome(service=service, options=chrome_options)
             # Execute script to hide webdriver property
             driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
                 'source': 'Object.defineProperty(navigator, "webdriver", {get: () => undefined})'
             })
+            self.browser_profile.apply_to_driver(driver)
             return driver
         except Exception as e:
             print(f"Error initializing Chrome driver: {e}")
@@ -66,6 +173,7 @@ class PartstownScraperSelenium:
     def init_driver(self):
         """Initialize Selenium WebDriver"""
         driver = self._create_driver()
+        driver.popups_cleared = False
         self.driver = driver
         print("Selenium WebDriver initialized successfully")
     
@@ -75,46 +183,123 @@ class PartstownScraperSelenium:
         filename = filename.strip()
         return filename[:100]
     
+    def _find_visible(self, driver, xpath):
+        """Return the first displayed element matching xpath, or None"""
+        for elem in driver.find_elements(By.XPATH, xpath):
+            try:
+                if elem.is_displayed():
+                    return elem
+            except StaleElementReferenceException:
+                continue
+        return None
+    
+    def _wait_for_visible(self, driver, xpath, timeout):
+        """Wait up to timeout seconds for an element matching xpath to become visible"""
+        try:
+            return WebDriverWait(driver, timeout, poll_frequency=0.2,
+                                 ignored_exceptions=(StaleElementReferenceException,)).until(
+                lambda d: self._find_visible(d, xpath))
+        except TimeoutException:
+            return None
+    
+    def _wait_until_hidden(self, driver, element, timeout):
+        """Wait for a clicked modal button to disappear (or be removed from the DOM); False on timeout"""
+        def hidden(_):
+            try:
+                return not element.is_displayed()
+            except StaleElementReferenceException:
+                return True
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=0.2).until(hidden)
+            return True
+        except TimeoutException:
+            return False
+    
+    def _has_consent_cookie(self, driver):
+        try:
+            return any(cookie['name'] == CONSENT_COOKIE for cookie in driver.get_cookies())
+        except Exception:
+            return False
+    
+    def _popups_dismissed(self, driver):
+        """
+        Check the session cookies for the country and cookie-consent choices.
+        
+        A True result is cached on the driver (popups_cleared), so later pages skip the check.
+        """
+        try:
+            names = {cookie['name'] for cookie in driver.get_cookies()}
+        except Exception:
+            return False
+        if CONSENT_COOKIE not in names:
+            return False
+        # Country cookies are learned the first time a driver clicks through that modal. The site
+        # does not always set any, so consent plus no visible country modal counts as well
+        with self._country_cookie_lock:
+            country_cookies = set(self._country_cookie_names)
+        if not (country_cookies and country_cookies <= names):
+            try:
+                if self._find_visible(driver, COUNTRY_POPUP_XPATH) is not None:
+                    return False
+            except Exception:
+                return False
+        try:
+            driver.popups_cleared = True
+        except AttributeError:
+            pass
+        return True
+    
+    def _wait_for_ready(self, driver, timeout, ready_selector=None):
+        """Wait for document.readyState and, optionally, a CSS selector to be present"""
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+                lambda d: d.execute_script("return document.readyState") in self.ready_states)
+            if ready_selector:
+                WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, ready_selector)))
+            return True
+        except TimeoutException:
+            return False
+    
     def handle_popups(self, driver=None):
         """Handle country selection, cookie consent, and other popups"""
         driver_to_use = driver if driver is not None else self.driver
+        if getattr(driver_to_use, 'popups_cleared', False):
+            # This pooled browser already got past the country and cookie modals
+            return
+        if self._popups_dismissed(driver_to_use):
+            return
         try:
             print("Handling popups and modals...")
             
-            # Wait a bit for popups to appear
-            time.sleep(2)
-            
-            # Handle Country & Currency popup
+            # Handle Country & Currency popup (wait for it to show up instead of sleeping)
+            country_shown = False
+            country_dismissed = consent_dismissed = False
             try:
-                # Look for the country selection button
-                start_shopping_buttons = driver_to_use.find_elements(By.XPATH, 
-                    "//button[contains(text(), 'START SHOPPING') or contains(text(), 'Start Shopping')]")
-                if not start_shopping_buttons:
-                    # Try finding button by different methods
-                    start_shopping_buttons = driver_to_use.find_elements(By.XPATH,
-                        "//a[contains(text(), 'START SHOPPING')]")
-                
-                for button in start_shopping_buttons:
-                    if button.is_displayed():
-                        print("  Found country selection popup, clicking through...")
-                        button.click()
-                        time.sleep(2)
-                        break
+                button = self._wait_for_visible(driver_to_use, COUNTRY_POPUP_XPATH, self.popup_timeout)
+                if button:
+                    country_shown = True
+                    print("  Found country selection popup, clicking through...")
+                    cookies_before = {cookie['name'] for cookie in driver_to_use.get_cookies()}
+                    button.click()
+                    country_dismissed = self._wait_until_hidden(driver_to_use, button, self.popup_timeout)
+                    # Remember which cookies record the country choice for later sessions
+                    learned = {cookie['name'] for cookie in driver_to_use.get_cookies()} - cookies_before
+                    learned.discard(CONSENT_COOKIE)
+                    if learned:
+                        with self._country_cookie_lock:
+                            self._country_cookie_names |= learned
             except Exception as e:
                 print(f"  Country popup handling: {e}")
             
-            # Handle cookie consent
+            # Handle cookie consent; it is usually already up if the country modal was not
             try:
-                # Look for cookie consent buttons
-                cookie_buttons = driver_to_use.find_elements(By.XPATH,
-                    "//button[contains(text(), 'Accept') or contains(text(), 'Accept All') or contains(text(), 'Ok')]")
-                
-                for button in cookie_buttons:
-                    if button.is_displayed():
-                        print("  Found cookie consent, accepting...")
-                        button.click()
-                        time.sleep(1)
-                        break
+                timeout = self.popup_timeout if country_shown else min(1, self.popup_timeout)
+                button = self._wait_for_visible(driver_to_use, CONSENT_POPUP_XPATH, timeout)
+                if button:
+                    print("  Found cookie consent, accepting...")
+                    button.click()
+                    consent_dismissed = self._wait_until_hidden(driver_to_use, button, self.popup_timeout)
             except Exception as e:
                 print(f"  Cookie popup handling: {e}")
             
@@ -128,33 +313,304 @@ class PartstownScraperSelenium:
                     if button.is_displayed():
                         print("  Closing notification...")
                         button.click()
-                        time.sleep(0.5)
             except Exception:
                 pass
                 
+            # Pooled drivers keep their session cookies, so the modals stay dismissed. Only stop
+            # checking once both were seen to close (or the cookies say so), not after a failed page
+            # A country modal that never showed up (returning session, some geos) plus the consent cookie
+            # counts as cleared too, or every page on this driver would wait for it again
+            if hasattr(driver_to_use, 'popups_cleared') and (
+                    (country_dismissed and consent_dismissed) or self._popups_dismissed(driver_to_use) or
+                    (not country_shown and self._has_consent_cookie(driver_to_use))):
+                driver_to_use.popups_cleared = True
             print("Popup handling complete")
             
         except Exception as e:
             print(f"Error handling popups: {e}")
     
-    def get_page_selenium(self, url, wait_time=10, driver=None):
-        """Load a page with Selenium and wait for content"""
+    def get_page_selenium(self, url, wait_time=10, driver=None, ready_selector=None):
+        """Load a page with Selenium and wait until it (and ready_selector, if given) is ready"""
         driver_to_use = driver if driver is not None else self.driver
         try:
+            # Browser loads are paced but not recorded: WebDriver exposes no status code, and the
+            # render plus ready wait is far slower than the server's response, so only the HTTP
+            # path's responses adapt the rate
+            self.rate_limiter.acquire(url)
+            start = time.monotonic()
             driver_to_use.get(url)
-            time.sleep(3)  # Give time for JavaScript to load
-            self.handle_popups(driver=driver_to_use)  # Handle any popups that appear
+            if not self._wait_for_ready(driver_to_use, wait_time, ready_selector):
+                print(f"  Warning: page not ready after {wait_time}s: {url}")
+            self.metrics.observe('page_load', time.monotonic() - start)
+            with self.metrics.timer('popups'):
+                self.handle_popups(driver=driver_to_use)  # Handle any popups that appear
             return True
         except Exception as e:
             print(f"Error loading page {url}: {e}")
             return False
     
-    def extract_trane_parts(self, url, max_pages=None):
-        """Extract all Trane parts from the main parts page with pagination"""
+    def _extract_listing_items(self, driver):
+        """Extract name/url/listing attributes for every product item on the currently loaded listing page"""
+        if self.bulk_extract:
+            try:
+                items = driver.execute_script(LISTING_EXTRACT_SCRIPT, LISTING_ITEM_SELECTOR, list(LISTING_ATTRIBUTES))
+                return [item for item in (items or []) if item.get('url') and item.get('name')]
+            except WebDriverException as e:
+                print(f"Listing script failed, reading items one by one: {e}")
+        
+        parts = []
+        product_elements = driver.find_elements(By.CSS_SELECTOR, LISTING_ITEM_SELECTOR)
+        for element in product_elements:
+            try:
+                product_name = element.get_attribute('data-name')
+                link = element.find_element(By.TAG_NAME, 'a')
+                product_url = link.get_attribute('href')
+                
+                if not product_name:
+                    product_name = link.text.strip()
+                
+                if product_url and product_name:
+                    listing = {}
+                    for attr in LISTING_ATTRIBUTES:
+                        value = element.get_attribute(attr)
+                        if value is not None:
+                            listing[attr] = value
+                    parts.append({
+                        'name': product_name,
+                        'url': product_url,
+                        'listing': listing
+                    })
+            except:
+                continue
+        return parts
+    
+    def _dedup_parts(self, parts):
+        """Drop parts without a name and repeated product URLs, keeping first-seen order"""
+        seen_urls = UrlSet()
+        return [part for part in parts if part['name'] and seen_urls.add(part['url'])]
+    
+    def _owns_page(self, page):
+        return self.shard_index is None or owns_page(page, self.shard_index, self.shard_count)
+    
+    def _output_path(self, name):
+        """Path of a run-level file in the output dir, made per-shard when sharded"""
+        return shard_path(os.path.join(self.output_dir, name), self.shard_index)
+    
+    def _listing_page_url(self, url, page):
+        """Build the direct ?page=N URL for a listing page (pages are 0-based)"""
+        parsed = urlparse(url)
+        query = [(k, v) for k, v in parse_qsl(parsed.query) if k != 'page']
+        query.append(('page', str(page)))
+        return urlunparse(parsed._replace(query=urlencode(query), fragment=''))
+    
+    def _get_listing_page_count(self, driver):
+        """Read the total number of listing pages from the pagination controls"""
+        try:
+            # The "last page" link carries the 0-based index of the final page
+            last_links = driver.find_elements(By.CSS_SELECTOR,
+                "a.js-link-paging[aria-label='go to last page of results']")
+            for link in last_links:
+                last_page = page_index_from_url(link.get_attribute('data-base-url'))
+                if last_page is not None:
+                    return last_page + 1
+            
+            # Otherwise use the highest page index any paging control points to
+            page_indexes = []
+            for elem in driver.find_elements(By.CSS_SELECTOR, ".js-pagination .js-link-paging[data-base-url]"):
+                page = page_index_from_url(elem.get_attribute('data-base-url'))
+                if page is not None:
+                    page_indexes.append(page)
+            if page_indexes:
+                return max(page_indexes) + 1
+        except Exception as e:
+            print(f"  Error reading page count: {e}")
+        return 1
+    
+    def _fetch_listing_page(self, url, page, pool):
+        """Load one listing page by direct URL on a pooled driver; None if the page failed to load"""
+        page_url = self._listing_page_url(url, page)
+        token = self.circuit_breaker.wait()
+        page_parts = None
+        try:
+            with pool.driver() as driver:
+                if not self.get_page_selenium(page_url, driver=driver):
+                    return None
+                try:
+                    WebDriverWait(driver, 20).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, LISTING_ITEM_SELECTOR))
+                    )
+                except TimeoutException:
+                    # The page is within the listing's page count, so an empty one did not load properly
+                    print(f"  No products found on page {page + 1}")
+                    self.metrics.inc('listing_pages_failed')
+                    return None
+                with self.metrics.timer('listing_extract'):
+                    page_parts = self._extract_listing_items(driver)
+        except Exception as e:
+            print(f"  Error fetching listing page {page + 1}: {e}")
+            self.metrics.inc('listing_pages_failed')
+            return None
+        finally:
+            # Every exit reports back, or a half-open breaker would wait on this probe
+            self.circuit_breaker.record(page_parts is not None, token)
+        self.metrics.inc('listing_pages')
+        print(f"  Found {len(page_parts)} products on page {page + 1}")
+        return page_parts
+    
+    def extract_trane_parts_paginated(self, url, max_pages=None, max_workers=3, pool=None,
+                                      skip_pages=None, on_page=None, collect=True, before_page=None):
+        """
+        Extract all Trane parts by fetching ?page=N listing URLs in parallel.
+        
+        Pages in skip_pages are not fetched again (their parts are expected to be known
+        already); on_page(page, parts) is called for every page that loaded. With
+        collect=False the pages are only handed to on_page and nothing is returned.
+        Pages that failed to load are counted in self.listing_failures. before_page() is
+        called before each further page is requested and may block to hold the listing back.
+        """
+        print(f"Fetching Trane parts from: {url} (parallel pagination, {max_workers} workers)")
+        skip_pages = skip_pages or set()
+        self.listing_failures = 0
+        
+        own_pool = pool is None
+        if own_pool:
+            pool = DriverPool(self._create_driver, max_workers)
+        
+        try:
+            # Page 0 tells us how many pages there are
+            page_count = 1
+            first_page_parts = []
+            with pool.driver() as driver:
+                if not self.get_page_selenium(self._listing_page_url(url, 0), driver=driver):
+                    # Without page 0 the page count is unknown
+                    print("  Could not load the first listing page")
+                    self.metrics.inc('listing_pages_failed')
+                    self.listing_failures += 1
+                    return [] if collect else None
+                try:
+                    WebDriverWait(driver, 20).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, LISTING_ITEM_SELECTOR))
+                    )
+                    with self.metrics.timer('listing_extract'):
+                        first_page_parts = self._extract_listing_items(driver)
+                    page_count = self._get_listing_page_count(driver)
+                    self.metrics.inc('listing_pages')
+                except TimeoutException:
+                    print("  No products found")
+                    self.listing_failures += 1
+                    return [] if collect else None
+            
+            if max_pages and page_count > max_pages:
+                print(f"Limiting to max pages: {max_pages} (of {page_count})")
+                page_count = max_pages
+            print(f"  Found {len(first_page_parts)} products on page 1 of {page_count}")
+            page_results = {}
+            if self._owns_page(0):
+                if collect:
+                    page_results[0] = first_page_parts
+                if on_page:
+                    on_page(0, first_page_parts)
+            
+            owned = [page for page in range(1, page_count) if self._owns_page(page)]
+            if self.shard_index is not None:
+                print(f"  Shard {self.shard_index + 1}/{self.shard_count}: {len(owned) + self._owns_page(0)} "
+                      f"listing page(s) of {page_count}")
+            remaining = [page for page in owned if page not in skip_pages]
+            if len(remaining) < len(owned):
+                print(f"  Skipping {len(owned) - len(remaining)} listing page(s) already crawled")
+            
+            # Fan the remaining pages out across the pool; page_results keeps page order for the merge
+            for page, page_parts in self._iter_listing_pages(url, remaining, pool, max_workers,
+                                                             before_page=before_page):
+                if page_parts is None:
+                    self.listing_failures += 1
+                    continue
+                if collect:
+                    page_results[page] = page_parts
+                if on_page:
+                    on_page(page, page_parts)
+        finally:
+            if own_pool:
+                pool.close()
+        if self.listing_failures:
+            print(f"  {self.listing_failures} listing page(s) failed to load")
+        if not collect:
+            return None
+        
+        parts = []
+        for page in sorted(page_results):
+            parts.extend(page_results[page])
+        
+        # Remove duplicates
+        unique_parts = self._dedup_parts(parts)
+        
+        print(f"\nTotal: Found {len(unique_parts)} unique parts across {page_count} page(s)")
+        return unique_parts
+    
+    def _iter_listing_pages(self, url, pages, pool, max_workers, window=None, before_page=None):
+        """
+        Yield (page, parts) as listing pages finish loading, parts None for a failed page.
+        
+        At most window pages (default: 2 x max_workers) are queued or loading at once; the
+        next one is only submitted after the caller has taken a finished page, so a slow
+        consumer throttles the listing and finished pages are not kept around. before_page()
+        is called before each submission and may block (e.g. while the detail queue is full).
+        """
+        window = window or max_workers * 2
+        pages = iter(pages)
+        futures = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                while True:
+                    while len(futures) < window:
+                        page = next(pages, None)
+                        if page is None:
+                            break
+                        if before_page:
+                            before_page()
+                        futures[executor.submit(self._fetch_listing_page, url, page, pool)] = page
+                    if not futures:
+                        return
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        page = futures.pop(future)
+                        yield page, future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+    
+    def _wait_for_new_items(self, driver, items_before, timeout):
+        """Wait until paging appended products or replaced the previous ones"""
+        def changed(d):
+            if len(d.find_elements(By.CSS_SELECTOR, LISTING_ITEM_SELECTOR)) > len(items_before):
+                return True
+            if not items_before:
+                return False
+            try:
+                items_before[0].is_enabled()
+                return False
+            except StaleElementReferenceException:
+                return True
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=0.25).until(changed)
+            return True
+        except TimeoutException:
+            return False
+    
+    def extract_trane_parts(self, url, max_pages=None, on_page=None, collect=True):
+        """
+        Extract all Trane parts from the main parts page with pagination.
+        
+        on_page(page, parts) is called with every page's items as soon as they are read;
+        with collect=False they are not kept and nothing is returned. Stopping before
+        the last page (other than at max_pages) counts in self.listing_failures.
+        """
         print(f"Fetching Trane parts from: {url}")
+        self.listing_failures = 0
         
-        if not self.get_page_selenium(url):
-            return []
+        if not self.get_page_selenium(url, ready_selector=LISTING_ITEM_SELECTOR):
+            self.listing_failures += 1
+            return [] if collect else None
         
         parts = []
         page_num = 0
@@ -165,33 +621,20 @@ class PartstownScraperSelenium:
             # Wait for products to load
             try:
                 WebDriverWait(self.driver, 20).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "li.js-product-item, .product-item"))
+                    EC.presence_of_element_located((By.CSS_SELECTOR, LISTING_ITEM_SELECTOR))
                 )
             except TimeoutException:
                 print("  No more products found")
+                self.listing_failures += 1
                 break
             
             # Find all product items on current page
-            product_elements = self.driver.find_elements(By.CSS_SELECTOR, 'li.js-product-item, .product-item')
-            
-            page_parts_count = 0
-            for element in product_elements:
-                try:
-                    product_name = element.get_attribute('data-name')
-                    link = element.find_element(By.TAG_NAME, 'a')
-                    product_url = link.get_attribute('href')
-                    
-                    if not product_name:
-                        product_name = link.text.strip()
-                    
-                    if product_url and product_name:
-                        parts.append({
-                            'name': product_name,
-                            'url': product_url
-                        })
-                        page_parts_count += 1
-                except:
-                    continue
+            page_parts = self._extract_listing_items(self.driver)
+            if collect:
+                parts.extend(page_parts)
+            page_parts_count = len(page_parts)
+            if on_page:
+                on_page(page_num, page_parts)
             
             print(f"  Found {page_parts_count} products on page {page_num + 1}")
             
@@ -217,8 +660,13 @@ class PartstownScraperSelenium:
                 
                 if next_button and next_button.is_displayed():
                     try:
+                        items_before = self.driver.find_elements(By.CSS_SELECTOR, LISTING_ITEM_SELECTOR)
                         next_button.click()
-                        time.sleep(3)  # Wait for new products to load
+                        # Wait for new products to load: more items, or the old ones replaced
+                        if not self._wait_for_new_items(self.driver, items_before, timeout=20):
+                            print("  Timed out waiting for more products")
+                            self.listing_failures += 1
+                            break
                         page_num += 1
                         
                         if max_pages and page_num >= max_pages:
@@ -226,6 +674,7 @@ class PartstownScraperSelenium:
                             break
                         continue
                     except:
+                        self.listing_failures += 1
                         break
                 else:
                     print("  No more pages found")
@@ -233,50 +682,126 @@ class PartstownScraperSelenium:
                     
             except Exception as e:
                 print(f"Error checking for next page: {e}")
+                self.listing_failures += 1
                 break
         
+        if not collect:
+            return None
+        
         # Remove duplicates
-        seen_urls = set()
-        unique_parts = []
-        for part in parts:
-            if part['url'] not in seen_urls and part['name']:
-                seen_urls.add(part['url'])
-                unique_parts.append(part)
+        unique_parts = self._dedup_parts(parts)
         
         print(f"\nTotal: Found {len(unique_parts)} unique parts across {page_num + 1} page(s)")
         return unique_parts
     
+    def _apply_bulk_details(self, blob):
+        """Map the rows/price/Prop 65 parts of a BULK_EXTRACT_SCRIPT result onto the details fields"""
+        details_fields = empty_details()
+        
+        for row in blob.get('rows') or []:
+            label = (row.get('label') or '').rstrip(':')
+            value = row.get('value') or ''
+            models_text = None
+            if 'Fits Models' in label and ('View' in value or 'List' in value):
+                models_text = row.get('modelsText')
+            map_detail_label(details_fields, label, value, models_text)
+        
+        list_price = blob.get('listPrice')
+        if list_price is not None:
+            if list_price.get('data'):
+                details_fields['List Price'] = format_list_price(list_price['data'])
+            else:
+                price_text = list_price.get('text') or ''
+                if price_text and '$' in price_text and 'My Price' not in price_text:
+                    details_fields['List Price'] = price_text
+        elif blob.get('priceRowText'):
+            details_fields['List Price'] = blob['priceRowText']
+        else:
+            price_text = blob.get('priceFallbackText') or ''
+            if price_text and '$' in price_text and 'My Price' not in price_text:
+                details_fields['List Price'] = price_text
+        
+        if blob.get('prop65') is None:
+            details_fields['California Residents'] = "N/A"
+        else:
+            details_fields['California Residents'] = clean_prop65_text(blob['prop65'])
+        return details_fields
+    
+    def _add_bulk_pdfs(self, pdf_entries, pdf_urls):
+        """Normalize PDF hrefs / data-manual-name values from an injected script into pdf_urls"""
+        for entry in pdf_entries or []:
+            href = entry.get('href')
+            manual_name = entry.get('manualName')
+            candidates = [href]
+            # Popup menu items contribute both; other elements fall back to the manual name
+            if manual_name and (entry.get('popup') or not href):
+                candidates.append(manual_name)
+            for url in candidates:
+                url = normalize_pdf_url(url, self.base_url)
+                if url and url not in pdf_urls:
+                    pdf_urls.append(url)
+    
+    def _extract_details_bulk(self, driver):
+        """Extract details and PDF links with one script per page state; None if injection fails"""
+        try:
+            with self.metrics.timer('extract_fields'):
+                blob = driver.execute_script(BULK_EXTRACT_SCRIPT)
+        except WebDriverException as e:
+            print(f"  Bulk extraction failed, using per-element extraction: {e}")
+            return None
+        if not isinstance(blob, dict):
+            return None
+        
+        details = self._apply_bulk_details(blob)
+        pdf_urls = []
+        self._add_bulk_pdfs(blob.get('pdfs'), pdf_urls)
+        
+        # Second page state: Manuals & Diagrams tab opened and page scrolled
+        scroll_steps = 3
+        tab_wait_ms = int(self.manuals_tab_timeout * 1000)
+        scroll_delay_ms = int(self.scroll_delay * 1000)
+        try:
+            driver.set_script_timeout(self.manuals_tab_timeout + 2 * scroll_steps * self.scroll_delay + 10)
+            with self.metrics.timer('pdf_reveal'):
+                revealed = driver.execute_async_script(REVEAL_PDFS_SCRIPT, tab_wait_ms, scroll_delay_ms, scroll_steps)
+            if isinstance(revealed, dict):
+                if revealed.get('error'):
+                    print(f"  Error revealing PDFs: {revealed['error']}")
+                self._add_bulk_pdfs(revealed.get('pdfs'), pdf_urls)
+        except WebDriverException as e:
+            print(f"  Error finding PDF links: {e}")
+        
+        return details, pdf_urls
+    
     def get_part_details(self, part_url, driver=None):
         """Fetch detailed information about a specific part using Selenium"""
         driver_to_use = driver if driver is not None else self.driver
         print(f"Fetching details from: {part_url}")
         
-        if not self.get_page_selenium(part_url, wait_time=15, driver=driver_to_use):
+        # Wait for the product info section rather than a fixed delay
+        if not self.get_page_selenium(part_url, wait_time=15, driver=driver_to_use,
+                                      ready_selector=PRODUCT_INFO_SELECTOR):
             return None, [], part_url
         
         details = {}
         pdf_urls = []
         product_page_url = part_url
         
-        # Wait for product info section to load
-        try:
-            WebDriverWait(driver_to_use, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".product-info, .product-block"))
-            )
-        except TimeoutException:
-            print("  Warning: Product info section not found")
+        if self.bulk_extract:
+            result = self._extract_details_bulk(driver_to_use)
+            if result is not None:
+                details, pdf_urls = result
+                pdf_urls = self._dedup_pdf_urls(pdf_urls)
+                if pdf_urls:
+                    print(f"  Found {len(pdf_urls)} PDF(s)")
+                else:
+                    print(f"  No PDFs found for this product")
+                return details, pdf_urls, product_page_url
+            # Script injection failed; fall through to per-element extraction
         
         # Extract product information using correct selectors
-        details_fields = {
-            'List Price': None,
-            'Quantity Available': None,
-            'Manufacturer': None,
-            'Manufacturer #': None,
-            'Parts Town #': None,
-            'Units': None,
-            'Fits Models': None,
-            'California Residents': None
-        }
+        laps = self.metrics.stopwatch()
+        details_fields = empty_details()
         
         # Method 1: Use product__row structure (primary method)
         try:
@@ -288,33 +813,17 @@ class PartstownScraperSelenium:
                     label = label_elem.text.strip().rstrip(':')
                     value = val_elem.text.strip()
                     
-                    if label and value:
-                        # Map labels to our fields
-                        if 'Quantity' in label or ('Available' in label and 'Quantity' in label):
-                            details_fields['Quantity Available'] = value
-                        elif 'Manufacturer' in label and '#' not in label:
-                            details_fields['Manufacturer'] = value
-                        elif 'Manufacturer #' in label or ('Mfr' in label and '#' in label):
-                            details_fields['Manufacturer #'] = value
-                        elif 'Parts Town #' in label or 'PT #' in label:
-                            details_fields['Parts Town #'] = value
-                        elif 'Units' in label:
-                            details_fields['Units'] = value
-                        elif 'Fits Models' in label:
-                            # If value is "View Models List" or similar, try to get actual list
-                            if 'View' in value or 'List' in value:
-                                # Try to find the actual models text nearby
-                                try:
-                                    models_link = row.find_element(By.XPATH, ".//a[contains(@href, '#') or contains(text(), 'View')]")
-                                    models_text = models_link.get_attribute('title') or models_link.text.strip()
-                                    if models_text and models_text != value:
-                                        details_fields['Fits Models'] = models_text
-                                    else:
-                                        details_fields['Fits Models'] = value
-                                except:
-                                    details_fields['Fits Models'] = value
-                            else:
-                                details_fields['Fits Models'] = value
+                    models_text = None
+                    if 'Fits Models' in label and ('View' in value or 'List' in value):
+                        # If value is "View Models List" or similar, try to get actual list
+                        try:
+                            models_link = row.find_element(By.XPATH, ".//a[contains(@href, '#') or contains(text(), 'View')]")
+                            models_text = models_link.get_attribute('title') or models_link.text.strip()
+                        except:
+                            pass
+                    
+                    # Map labels to our fields
+                    map_detail_label(details_fields, label, value, models_text)
                 except:
                     continue
         except Exception as e:
@@ -327,11 +836,7 @@ class PartstownScraperSelenium:
             data_price = price_elem.get_attribute('data-listprice')
             if data_price:
                 # Format as currency
-                try:
-                    price_val = float(data_price)
-                    details_fields['List Price'] = f"$ {price_val:.2f}"
-                except:
-                    details_fields['List Price'] = f"$ {data_price}"
+                details_fields['List Price'] = format_list_price(data_price)
             else:
                 # Fallback to text content (filter out "My Price")
                 price_text = price_elem.text.strip()
@@ -362,36 +867,21 @@ class PartstownScraperSelenium:
                 "//*[contains(text(), 'California Residents') or contains(text(), 'Prop 65')]")
             if cal_elem:
                 parent = cal_elem.find_element(By.XPATH, "./..")
-                cal_text = parent.text.strip()
-                # Clean up - remove just "California Residents:" label if that's all it is
-                if cal_text and cal_text != "California Residents:":
-                    # Remove the label if it's just a label
-                    cal_text = cal_text.replace("California Residents:", "").strip()
-                    if cal_text:
-                        details_fields['California Residents'] = cal_text
-                    else:
-                        details_fields['California Residents'] = "See product page for Prop 65 warning details"
-                elif not cal_text or cal_text == "California Residents:":
-                    details_fields['California Residents'] = "See product page for Prop 65 warning details"
+                details_fields['California Residents'] = clean_prop65_text(parent.text)
         except:
             # If no California Residents warning found, that's okay
             details_fields['California Residents'] = "N/A"
         
         details = details_fields
+        laps.lap('extract_fields')
         
         # Find PDF links - COMPREHENSIVE SEARCH (ensuring we always find available PDFs)
         # Use a helper function to normalize and add URLs
         def add_pdf_url(url):
             """Helper to normalize and add PDF URL"""
-            if not url or '.pdf' not in url.lower():
-                return
-            # Normalize URL
-            if url.startswith('/'):
-                url = f"https://www.partstown.com{url}"
-            elif not url.startswith('http'):
-                url = f"https://www.partstown.com/modelManual/{url}"
+            url = normalize_pdf_url(url, self.base_url)
             # Add if not already present
-            if url not in pdf_urls:
+            if url and url not in pdf_urls:
                 pdf_urls.append(url)
         
         try:
@@ -415,6 +905,7 @@ class PartstownScraperSelenium:
                         continue
             except Exception as e:
                 print(f"  Error checking data attributes: {e}")
+            laps.lap('pdf_step1_data_attributes')
             
             # Step 2: Find PDFs on main page (direct links)
             try:
@@ -428,6 +919,7 @@ class PartstownScraperSelenium:
                         continue
             except Exception as e:
                 print(f"  Error finding direct PDF links: {e}")
+            laps.lap('pdf_step2_direct_links')
             
             # Step 3: Click "MANUALS & DIAGRAMS" tab to reveal more PDFs
             try:
@@ -489,6 +981,7 @@ class PartstownScraperSelenium:
                         pass
             except:
                 pass  # Tab might not exist, that's okay
+            laps.lap('pdf_step3_manuals_tab')
             
             # Step 4: Check popup menus (model-specific manuals)
             try:
@@ -511,6 +1004,7 @@ class PartstownScraperSelenium:
                         continue
             except:
                 pass
+            laps.lap('pdf_step4_popups')
             
             # Step 5: Scroll entire page to catch any lazy-loaded PDFs
             for i in range(3):
@@ -525,22 +1019,12 @@ class PartstownScraperSelenium:
                             add_pdf_url(href)
                     except:
                         continue
+            laps.lap('pdf_step5_page_scroll')
         except Exception as e:
             print(f"  Error finding PDF links: {e}")
         
         # Remove duplicates if unique_pdfs is True, otherwise keep all
-        if self.unique_pdfs:
-            from urllib.parse import urlparse
-            seen_bases = set()
-            unique_pdfs = []
-            for pdf_url in pdf_urls:
-                parsed = urlparse(pdf_url)
-                base_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-                if base_url not in seen_bases:
-                    seen_bases.add(base_url)
-                    unique_pdfs.append(pdf_url)
-            
-            pdf_urls = unique_pdfs
+        pdf_urls = self._dedup_pdf_urls(pdf_urls)
         
         # Product page URL (already set to part_url)
         # No need to do anything else
@@ -553,22 +1037,108 @@ class PartstownScraperSelenium:
         
         return details, pdf_urls, product_page_url
     
-    def download_pdf(self, pdf_url, filepath, session=None):
-        """Download a PDF file"""
+    def _dedup_pdf_urls(self, pdf_urls):
+        """Collapse PDF URLs that differ only by query string when unique_pdfs is set"""
+        if not self.unique_pdfs:
+            return pdf_urls
+        seen_bases = set()
+        unique_pdfs = []
+        for pdf_url in pdf_urls:
+            parsed = urlparse(pdf_url)
+            base_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+            if base_url not in seen_bases:
+                seen_bases.add(base_url)
+                unique_pdfs.append(pdf_url)
+        return unique_pdfs
+    
+    def get_part_details_http(self, part_url, session=None):
+        """Fetch a product page with requests and parse the server-rendered HTML"""
         session_to_use = session if session is not None else self.session
         try:
-            response = session_to_use.get(pdf_url, timeout=60, stream=True)
+            with self.metrics.timer('http_fetch'):
+                response = limited_get(self.rate_limiter, session_to_use, part_url, timeout=30)
+            if response.status_code in (404, 410):
+                # The part was taken off the site; a browser render would only find an error page
+                print(f"  Part page gone ({response.status_code}): {part_url}")
+                self.metrics.inc('parts_gone')
+                self._thread_local.part_gone = True
+                return None, [], part_url
             response.raise_for_status()
-            
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            print(f"Downloaded: {os.path.basename(filepath)}")
-            return True
-        except Exception as e:
-            print(f"Failed to download PDF {pdf_url}: {e}")
+        except requests.exceptions.RequestException as e:
+            print(f"  HTTP fetch failed for {part_url}: {e}")
+            self.metrics.inc('http_fetch_failures')
+            return None, [], part_url
+        
+        with self.metrics.timer('parse_html'):
+            details, pdf_urls = self.parser.parse_product(response.content, self.base_url)
+        # Kept for the Fits Models data embedded in the page
+        self._thread_local.product_html = response.content
+        return details, self._dedup_pdf_urls(pdf_urls), part_url
+    
+    def fetch_part_details(self, part_url, driver=None, session=None):
+        """Get part details over HTTP, rendering in Chrome only when fields or PDFs are missing"""
+        self._thread_local.product_html = None
+        self._thread_local.part_gone = False
+        if self.http_first:
+            print(f"Fetching details over HTTP: {part_url}")
+            details, pdf_urls, product_page_url = self.get_part_details_http(part_url, session=session)
+            if self._thread_local.part_gone:
+                return details, pdf_urls, product_page_url
+            if details is not None:
+                missing = missing_required_fields(details)
+                if not missing and pdf_urls:
+                    print(f"  Found {len(pdf_urls)} PDF(s) (HTTP)")
+                    return details, pdf_urls, product_page_url
+                reason = f"missing {', '.join(missing)}" if missing else "no PDFs"
+                print(f"  HTTP page incomplete ({reason}), falling back to Selenium")
+            self.metrics.inc('selenium_fallbacks')
+        
+        if driver is not None:
+            return self.get_part_details(part_url, driver=driver)
+        if self.driver_pool is not None:
+            # Only borrow a browser when the HTTP path was not enough
+            with self.driver_pool.driver() as pooled_driver:
+                return self.get_part_details(part_url, driver=pooled_driver)
+        return self.get_part_details(part_url)
+    
+    def download_pdf(self, pdf_url, filepath, session=None):
+        """Download a PDF file (resumable, verified before it is moved into place)"""
+        return self.download_pdf_hashed(pdf_url, filepath, session=session) is not None
+    
+    def download_pdf_hashed(self, pdf_url, filepath, session=None):
+        """Download a PDF and return its SHA-256 (computed while streaming), or None on failure"""
+        session_to_use = session if session is not None else self.session
+        with self.metrics.timer('pdf_download'):
+            sha256 = download_pdf_file(session_to_use, pdf_url, filepath, chunk_size=self.pdf_chunk_size,
+                                       limiter=self.rate_limiter)
+        if sha256:
+            self.metrics.inc('pdfs_downloaded')
+            self.metrics.inc('pdf_bytes', os.path.getsize(filepath))
+        else:
+            self.metrics.inc('pdfs_failed')
+        return sha256
+    
+    def store_pdf(self, pdf_url, pdf_path, session=None):
+        """Fetch a PDF through the shared store and link it to pdf_path"""
+        download = lambda url, tmp_path: self.download_pdf_hashed(url, tmp_path, session=session)
+        entry = self.pdf_store.fetch(pdf_url, download)
+        if not entry:
             return False
+        mode = self.pdf_store.link(entry, pdf_path)
+        if mode == 'reference':
+            self.pdf_store.add_reference(os.path.dirname(pdf_path), os.path.basename(pdf_path), pdf_url, entry)
+        return True
+    
+    def _download_pdf_job(self, job):
+        """Handler for the PDF pipeline; runs on a downloader thread"""
+        session = self._get_thread_session()
+        if self.pdf_store is not None:
+            ok = self.store_pdf(job.pdf_url, job.dest, session=session)
+        else:
+            ok = self.download_pdf(job.pdf_url, job.dest, session=session)
+        if self.crawl_state is not None:
+            self.crawl_state.mark_pdf_job(job.dest, job.pdf_url, job.part_name, DONE if ok else FAILED)
+        return ok
     
     def save_part_info(self, details, pdf_urls, product_page_url, filepath):
         """Save part information to a text file with product page link and PDF links"""
@@ -618,124 +1188,548 @@ class PartstownScraperSelenium:
         print(f"Saved info: {os.path.basename(filepath)}")
     
     def scrape_part(self, part, driver=None, session=None):
-        """Scrape a single part"""
+        """Scrape a single part; returns False if the product page could not be read"""
         part_name = self.sanitize_filename(part['name'])
         part_folder = os.path.join(self.output_dir, part_name)
         
         # Get part details
-        details, pdf_urls, product_page_url = self.get_part_details(part['url'], driver=driver)
+        details, pdf_urls, product_page_url = self.fetch_part_details(part['url'], driver=driver, session=session)
+        if self._thread_local.part_gone:
+            # Keep the last good product_info.txt; the part is simply no longer sold
+            print(f"Part removed from the site: {part_name}")
+            return True
+        if details and not (details.get('Manufacturer #') or details.get('Parts Town #')):
+            # An error or placeholder page renders with every field empty; don't overwrite good files with it
+            print(f"  No part number on the page for {part_name}; not saving")
+            details, pdf_urls = None, []
+        
+        fits_models = None
+        page_content = getattr(self._thread_local, 'product_html', None)
+        if details and self.fits_models is not None and (details.get('Parts Town #') or page_content):
+            models_session = session if session is not None else self.session
+            with self.metrics.timer('fits_models'):
+                fits_models = self.fits_models.fetch(details.get('Parts Town #'), models_session,
+                                                     page_content=page_content, referer=product_page_url)
+            # An incomplete list of unknown length would read like the full list; keep the row text then
+            if fits_models['models'] and (fits_models['complete'] or fits_models['total'] is not None):
+                details['Fits Models'] = describe_fits_models(fits_models)
+            elif fits_models['total'] is None:
+                fits_models = None
         
+        pdf_paths = [os.path.join(part_folder, f"manual_{idx + 1}.pdf") for idx in range(len(pdf_urls))]
         if details:
-            # Save product information with product page link and PDF links
-            info_file = os.path.join(part_folder, 'product_info.txt')
-            self.save_part_info(details, pdf_urls, product_page_url, info_file)
+            if self.catalog_sink is not None:
+                self.catalog_sink.write(make_record(part, details, product_page_url, pdf_urls, pdf_paths, fits_models))
+            if self.write_info_files:
+                # Save product information with product page link and PDF links
+                info_file = os.path.join(part_folder, 'product_info.txt')
+                with self.metrics.timer('save_info'):
+                    self.save_part_info(details, pdf_urls, product_page_url, info_file)
+                    if fits_models is not None:
+                        with open(os.path.join(part_folder, 'fits_models.json'), 'w', encoding='utf-8') as f:
+                            json.dump(fits_models, f, indent=1)
         
         # Download PDFs
-        pdf_count = 0
-        session_to_use = session if session is not None else self.session
-        for idx, pdf_url in enumerate(pdf_urls):
-            pdf_filename = f"manual_{idx + 1}.pdf"
-            pdf_path = os.path.join(part_folder, pdf_filename)
-            if self.download_pdf(pdf_url, pdf_path, session=session_to_use):
-                pdf_count += 1
-        
-        print(f"Scraped: {part_name} ({pdf_count} PDFs downloaded)")
-        time.sleep(2)  # Be respectful
-    
-    def _scrape_part_worker(self, part, part_index, total_parts):
-        """Worker function for parallel processing - creates its own driver instance"""
-        driver = None
-        session = None
-        try:
-            print(f"\n[Thread {threading.current_thread().name}] Processing part {part_index}/{total_parts}")
-            # Create a new driver instance for this thread
-            driver = self._create_driver()
-            # Create a new session for this thread (for thread-safe PDF downloads)
+        if self.pdf_pipeline is not None:
+            # Hand the downloads to the PDF stage so this browser slot is freed right away
+            for pdf_url, pdf_path in zip(pdf_urls, pdf_paths):
+                if self.crawl_state is not None:
+                    self.crawl_state.mark_pdf_job(pdf_path, pdf_url, part_name, PENDING)
+                self.pdf_pipeline.submit(part_name, pdf_url, pdf_path)
+            print(f"Scraped: {part_name} ({len(pdf_urls)} PDFs queued)")
+        else:
+            pdf_count = 0
+            session_to_use = session if session is not None else self.session
+            for pdf_url, pdf_path in zip(pdf_urls, pdf_paths):
+                if self.pdf_store is not None:
+                    ok = self.store_pdf(pdf_url, pdf_path, session=session_to_use)
+                else:
+                    ok = self.download_pdf(pdf_url, pdf_path, session=session_to_use)
+                if ok:
+                    pdf_count += 1
+            print(f"Scraped: {part_name} ({pdf_count} PDFs downloaded)")
+        return details is not None
+    
+    def _get_thread_session(self):
+        """Get the requests session owned by the current worker thread"""
+        session = getattr(self._thread_local, 'session', None)
+        if session is None:
             session = requests.Session()
             session.headers.update({
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             })
-            # Scrape the part using this driver and session
-            self.scrape_part(part, driver=driver, session=session)
+            self._thread_local.session = session
+        return session
+    
+    def _scrape_part_worker(self, part, part_index, total_parts=None):
+        """
+        Worker function for parallel processing - borrows a driver from the pool when needed.
+        
+        Raises if the part could not be scraped, so the feed can retry it.
+        """
+        # Every worker waits here while the circuit breaker is open
+        token = self.circuit_breaker.wait()
+        ok = False
+        try:
+            progress = f"{part_index}/{total_parts}" if total_parts else part_index
+            attempt = part.get('attempt') or 1
+            retry = f" (attempt {attempt})" if attempt > 1 else ""
+            print(f"\n[Thread {threading.current_thread().name}] Processing part {progress}{retry}")
+            # Reuse this thread's session (for HTTP detail fetches and PDF downloads)
+            session = self._get_thread_session()
+            if self.crawl_state is not None:
+                self.crawl_state.mark_part(part['url'], IN_PROGRESS)
+            # A pooled driver is borrowed only if the HTTP fetch needs a Selenium fallback
+            with self.metrics.timer('scrape_part'):
+                ok = self.scrape_part(part, session=session)
+            if not ok:
+                raise RuntimeError("product page could not be loaded")
+            self.metrics.inc('parts_scraped')
+            if self.catalog is not None:
+                self.catalog.mark_scraped(part['url'])
+            if self.crawl_state is not None:
+                self.crawl_state.mark_part(part['url'], DONE)
             return True
         except Exception as e:
             print(f"Error processing part {part.get('name', 'Unknown')}: {e}")
-            return False
+            # parts_failed is counted once the retry lane gives up on the part
+            self.metrics.inc('part_attempts_failed')
+            if self.crawl_state is not None:
+                self.crawl_state.mark_part(part['url'], FAILED, str(e))
+            raise
         finally:
-            # Clean up driver
-            if driver:
-                try:
-                    driver.quit()
-                except:
-                    pass
-            # Session cleanup is automatic, but we can close it explicitly
-            if session:
-                try:
-                    session.close()
-                except:
-                    pass
+            self.circuit_breaker.record(ok, token)
     
-    def run(self, url, max_workers=3):
-        """Main scraping function with parallel processing"""
+    def _crawl_listing(self, url, feed, max_workers, max_pages, parallel_listing, resume,
+                       incremental=False, ttl_days=None):
+        """
+        Discover parts, feeding every listing page's new parts to the detail workers.
+        
+        Listing progress is recorded in the crawl state. With incremental, each page is
+        compared with the listing catalog and only new, changed and stale parts are fed.
+        Returns the number of parts listed.
+        """
+        state = self.crawl_state
+        if resume:
+            # Parts found by earlier runs are in the state too; only unfinished ones are left
+            feed.mark_seen(state.iter_part_urls())
+            feed.submit(state.iter_unfinished_parts())
+            if state.get_meta('listing_complete') == '1':
+                print("Resuming: listing crawl already complete, scraping the parts left in the crawl state")
+                return len(feed.seen)
+        
+        ttl_seconds = ttl_days * 86400 if ttl_days is not None else None
+        diff = {'added': [], 'changed': [], 'removed': [], 'stale': [], 'unchanged': 0}
+        
+        def on_page(page, page_parts):
+            new_parts = feed.new_parts(page_parts)
+            if new_parts:
+                state.add_parts(new_parts)
+                feed.submit(self._schedule_listed(new_parts, incremental, ttl_seconds, diff))
+            if parallel_listing:
+                state.mark_listing_page(page, len(page_parts))
+        
+        if parallel_listing:
+            self.extract_trane_parts_paginated(
+                url, max_pages=max_pages, max_workers=max_workers, pool=self.driver_pool,
+                skip_pages=state.listing_pages_done() if resume else None, on_page=on_page, collect=False,
+                before_page=feed.wait_for_room)
+        else:
+            # A separate browser clicks through the pages while the pool scrapes details
+            self.init_driver()
+            self.extract_trane_parts(url, max_pages=max_pages, on_page=on_page, collect=False)
+            if self.driver:
+                self.driver.quit()
+                self.driver = None
+        
+        if not feed.seen:
+            return 0
+        if incremental:
+            # A shard only sees its own pages; removals are found when the shards are merged.
+            # Parts on pages that failed to load are not removed, so only a complete listing counts
+            if max_pages is None and self.shard_index is None and not self.listing_failures:
+                diff['removed'] = self.catalog.removed_parts(feed.seen)
+            elif self.listing_failures:
+                print("Listing incomplete; skipping removed-part detection")
+            suffix = f'.shard-{self.shard_index}' if self.shard_index is not None else ''
+            report_path = write_change_report(diff, os.path.join(self.output_dir, 'changes'), ttl_days, suffix)
+            print(f"Listing changes: {len(diff['added'])} added, {len(diff['changed'])} changed, "
+                  f"{len(diff['removed'])} removed, {len(diff['stale'])} stale, {diff['unchanged']} unchanged")
+            print(f"Change report written to {report_path}")
+            
+            # Removed parts are no longer listed; re-check their pages once to record the final state
+            removed = [{'name': item['name'] or item['url'], 'url': item['url']} for item in diff['removed']]
+            if removed:
+                feed.mark_seen(part['url'] for part in removed)
+                state.add_parts(removed)
+                self.catalog.update_listing((), (), [part['url'] for part in removed])
+                feed.submit(removed)
+        
+        self.catalog.save()
+        if self.listing_failures:
+            # Pages missing from listing_pages_done() are fetched again by --resume
+            print(f"Listing incomplete: {self.listing_failures} page(s) failed; rerun with --resume to retry them")
+        else:
+            state.set_meta('listing_complete', 1)
+        return len(feed.seen)
+    
+    def _queue_recheck(self, feed, parts):
+        """Feed parts to the detail workers without crawling the listing; returns how many"""
+        parts = [{'name': part['name'] or part['url'], 'url': part['url']} for part in parts]
+        feed.mark_seen(part['url'] for part in parts)
+        self.crawl_state.add_parts(parts)
+        feed.submit(parts)
+        return len(parts)
+    
+    def _schedule_listed(self, parts, incremental, ttl_seconds, diff):
+        """Newly listed parts whose product pages need scraping; records them in the listing catalog"""
+        if incremental:
+            scheduled, unchanged = [], []
+            now = time.time()
+            for part in parts:
+                kind, item = self.catalog.classify(part, ttl_seconds, now)
+                if kind is None:
+                    diff['unchanged'] += 1
+                    unchanged.append(part['url'])
+                else:
+                    diff[kind].append(item)
+                    scheduled.append(part)
+            self.crawl_state.mark_parts(unchanged, DONE)
+        else:
+            scheduled = parts
+        self.catalog.update_listing(parts, {part['url'] for part in scheduled})
+        return scheduled
+    
+    def run(self, url, max_workers=3, max_pages=None, parallel_listing=True, pdf_workers=4, resume=False,
+            incremental=False, ttl_days=None, metrics_interval=30, metrics_json=None, metrics_prom=None,
+            max_in_flight=None, pdf_index=False, catalog_index=False, retry_attempts=3, retry_delay=30,
+            recheck=None):
+        """
+        Main scraping function with parallel processing
+        
+        With recheck (a list of {'name', 'url'} parts), the listing is not crawled and
+        only those parts are scraped (used for removed parts after a sharded merge).
+        """
         print("Starting Partstown Trane Parts Scraper (Selenium)")
         print("=" * 50)
         print(f"Parallel processing enabled with {max_workers} workers")
         print("=" * 50)
         
         try:
-            # Initialize driver (only needed for extracting parts list)
-            self.init_driver()
-            
             # Create output directory
             os.makedirs(self.output_dir, exist_ok=True)
             
-            # Get all parts (still sequential - only one page)
-            parts = self.extract_trane_parts(url)
+            # Crawl state lets an interrupted run pick up where it stopped (--resume)
+            self.crawl_state = CrawlState(self._output_path('crawl_state.sqlite3'))
+            if resume:
+                print(f"Resuming previous crawl: {self.crawl_state.counts()}")
+            else:
+                self.crawl_state.reset()
+                # Parts listed before this are removed if a complete sharded listing missed them
+                self.crawl_state.set_meta('listing_started', time.time())
             
-            if not parts:
-                print("No parts found. The page might need authentication or has a different structure.")
-                return
+            # Periodic metrics snapshots (JSON and/or a Prometheus textfile)
+            self.metrics.start_snapshots(metrics_interval,
+                                         json_path=shard_path(metrics_json, self.shard_index) if metrics_json else None,
+                                         prom_path=shard_path(metrics_prom, self.shard_index) if metrics_prom else None)
             
-            # Close the main driver since we'll create new ones for parallel processing
-            if self.driver:
-                self.driver.quit()
-                self.driver = None
+            # Listing attributes and scrape times from earlier runs (drives --incremental)
+            self.catalog = ListingCatalog(self._output_path('listing_catalog.json'))
+            if self.shard_index is not None and not self.catalog.entries:
+                # Shards start from the merged catalog; merge_listing_catalogs folds them back in
+                self.catalog.entries = ListingCatalog(os.path.join(self.output_dir, 'listing_catalog.json')).entries
             
-            # Process parts in parallel
-            total = len(parts)
-            print(f"\nProcessing {total} parts in parallel with {max_workers} workers...")
+            # One writer thread appends a structured record per scraped part
+            if self.catalog_format:
+                extension = 'sqlite3' if self.catalog_format == 'sqlite' else 'jsonl'
+                self.catalog_sink = CatalogSink(self._output_path(f'catalog.{extension}'), fmt=self.catalog_format)
             
-            # Use ThreadPoolExecutor for parallel processing
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Submit all tasks
-                futures = []
-                for idx, part in enumerate(parts, 1):
-                    future = executor.submit(self._scrape_part_worker, part, idx, total)
-                    futures.append(future)
-                
-                # Wait for all tasks to complete and track progress
-                completed = 0
-                for future in as_completed(futures):
-                    try:
-                        future.result()
-                        completed += 1
-                        print(f"\nProgress: {completed}/{total} parts completed")
-                    except Exception as e:
-                        print(f"\nError in parallel processing: {e}")
-                        completed += 1
+            if self.shared_pdf_store:
+                store_root = os.path.join(self.output_dir, '_pdf_store')
+                # Shards share the store but keep their partial downloads apart
+                tmp_dir = os.path.join(store_root, 'tmp', f'shard-{self.shard_index}') if self.shard_index is not None else None
+                self.pdf_store = PdfStore(store_root, link_mode=self.pdf_link_mode, tmp_dir=tmp_dir)
+            
+            # PDFs download on their own threads, independent of max_workers
+            if pdf_workers:
+                self.pdf_pipeline = PdfDownloadPipeline(self._download_pdf_job, max_workers=pdf_workers)
+                if resume:
+                    jobs = self.crawl_state.unfinished_pdf_jobs()
+                    if jobs:
+                        print(f"Re-queueing {len(jobs)} unfinished PDF download(s)")
+                    for part_name, pdf_url, dest in jobs:
+                        self.pdf_pipeline.submit(part_name, pdf_url, dest)
+            
+            if self.shard_index is not None and not parallel_listing:
+                print("Sharded runs split the listing by page; using parallel pagination")
+                parallel_listing = True
+            
+            # One long-lived browser per worker thread, shared by listing pages and detail fallbacks
+            self.driver_pool = DriverPool(self._create_driver, max_workers)
+            
+            # Detail workers start right away; each listing page feeds them its new parts
+            print(f"\nProcessing parts with {max_workers} workers as the listing is crawled...")
+            # At most max_in_flight parts wait in the executor; the listing crawl blocks until a slot frees
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            # Failed parts wait on their own lane (exponential backoff) and then rejoin the queue
+            retry_lane = RetryLane(max_attempts=retry_attempts, base_delay=retry_delay,
+                                   dead_letter_path=self._output_path('dead_letter.jsonl'), metrics=self.metrics)
+            feed = PartFeed(executor, self._scrape_part_worker, max_in_flight=max_in_flight or max_workers * 4,
+                            retry_lane=retry_lane)
+            try:
+                if recheck is not None:
+                    listed = self._queue_recheck(feed, recheck)
+                else:
+                    listed = self._crawl_listing(url, feed, max_workers, max_pages, parallel_listing, resume,
+                                                 incremental, ttl_days)
+                feed.finish_listing()
+                if listed:
+                    print(f"\nListing done: {listed} parts listed, {feed.submitted} queued for scraping, "
+                          f"{feed.completed} finished so far")
+                feed.wait()
+            except BaseException:
+                # Leave queued parts to --resume instead of working through them
+                feed.close()
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+            feed.close()
+            executor.shutdown(wait=True)
+            if retry_lane.retried or retry_lane.dead_lettered:
+                print(f"\nRetries: {retry_lane.retried} scheduled, {retry_lane.dead_lettered} part(s) given up "
+                      f"after {retry_attempts} attempt(s) (see {retry_lane.dead_letter_path})")
+            
+            total = feed.submitted
+            if not listed:
+                print("No parts found. The page might need authentication or has a different structure.")
+                return
+            if not total:
+                if resume:
+                    print("Nothing left to do: every part in the crawl state is done.")
+                else:
+                    print("No listing changes since the last crawl; nothing to scrape.")
+                return
+            
+            # Browsers are done; let the PDF stage drain its queue
+            if self.driver_pool:
+                self.driver_pool.close()
+                self.driver_pool = None
+            if self.pdf_pipeline:
+                print(f"\nWaiting for {self.pdf_pipeline.pending()} queued PDF download(s)...")
+                self.pdf_pipeline.close()
+                self.pdf_pipeline = None
+            if self.catalog_sink:
+                self.catalog_sink.close()
+                if self.catalog_parquet and self.shard_index is None:
+                    self.catalog_sink.write_parquet(os.path.join(self.output_dir, 'catalog.parquet'))
+                self.catalog_sink = None
+            if pdf_index and self.shard_index is None:
+                # Only manuals that are new since the last crawl get their text extracted
+                update_pdf_index(self.output_dir)
+            if catalog_index and self.shard_index is None:
+                update_catalog_index(self.output_dir)
             
             print("\n" + "=" * 50)
             print(f"Scraping complete! {total} parts processed.")
+            print(self.rate_limiter.summary())
+            print(self.circuit_breaker.summary())
+            print("\nStage timings (seconds):")
+            print(self.metrics.summary())
             
         finally:
+            if self.pdf_pipeline:
+                self.pdf_pipeline.close()
+                self.pdf_pipeline = None
+            self.metrics.close()
+            if self.crawl_state:
+                self.crawl_state.close()
+                self.crawl_state = None
+            if self.catalog:
+                self.catalog.save()
+                self.catalog = None
+            if self.catalog_sink:
+                self.catalog_sink.close()
+                self.catalog_sink = None
+            if self.pdf_store:
+                self.pdf_store.close()
+                self.pdf_store = None
+            if self.driver_pool:
+                self.driver_pool.close()
+                self.driver_pool = None
             if self.driver:
                 self.driver.quit()
                 print("Browser closed")
 
 
 def main():
-    url = "https://www.partstown.com/trane/parts"  # Removed fragment for better compatibility
+    parser = argparse.ArgumentParser(description="Scrape Trane parts and PDF manuals from Partstown")
+    parser.add_argument('--base-url', default="https://www.partstown.com",
+                        help="site to crawl, e.g. http://127.0.0.1:8765 for mock_server.py (default: https://www.partstown.com)")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue the crawl recorded in trane_parts/crawl_state.sqlite3, skipping finished work")
+    parser.add_argument('--workers', type=int, default=3, help="number of browser workers (default: 3)")
+    parser.add_argument('--max-pages', type=int, default=None, help="only crawl this many listing pages")
+    parser.add_argument('--max-in-flight', type=int, default=None,
+                        help="parts queued or being scraped at once; the listing waits when full (default: 4 x --workers)")
+    parser.add_argument('--retry-attempts', type=int, default=3,
+                        help="attempts per part before it is written to trane_parts/dead_letter.jsonl (default: 3)")
+    parser.add_argument('--retry-delay', type=float, default=30,
+                        help="seconds before the first retry of a failed part, doubled for each later one (default: 30)")
+    parser.add_argument('--breaker-failure-rate', type=float, default=0.5,
+                        help="pause all workers when this share of the last 50 pages failed (default: 0.5)")
+    parser.add_argument('--breaker-cooldown', type=float, default=60,
+                        help="seconds the workers pause when the circuit breaker opens (default: 60)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only scrape parts that are new, changed, removed or older than --ttl-days "
+                             "compared with trane_parts/listing_catalog.json")
+    parser.add_argument('--ttl-days', type=float, default=30,
+                        help="with --incremental, re-scrape parts last scraped more than this many days ago (default: 30)")
+    parser.add_argument('--catalog-format', choices=['jsonl', 'sqlite', 'none'], default='jsonl',
+                        help="structured catalog written to trane_parts/catalog.* (default: jsonl)")
+    parser.add_argument('--pdf-index', action='store_true',
+                        help="update the full-text index of the downloaded manuals (trane_parts/pdf_index.sqlite3) "
+                             "at the end of the run")
+    parser.add_argument('--catalog-index', action='store_true',
+                        help="rebuild the part-number/model lookup index (trane_parts/catalog_index.sqlite3) "
+                             "at the end of the run")
+    parser.add_argument('--parquet', action='store_true',
+                        help="also write trane_parts/catalog.parquet at the end of the run (needs pyarrow)")
+    parser.add_argument('--no-info-files', action='store_true',
+                        help="don't write product_info.txt into each part folder")
+    parser.add_argument('--shards', type=int, default=1,
+                        help="split the listing pages across this many scraper processes and merge their output")
+    parser.add_argument('--shard-index', type=int, default=None,
+                        help="run only this shard (0-based); set by --shards for its child processes")
+    parser.add_argument('--headless', action='store_true', help="run Chrome without a window")
+    parser.add_argument('--load-everything', action='store_true',
+                        help="don't block images, fonts, media or third-party tags and wait for the full page load")
+    parser.add_argument('--page-load-strategy', choices=['normal', 'eager', 'none'], default='eager',
+                        help="when driver.get() returns (default: eager, i.e. once the DOM is ready)")
+    parser.add_argument('--fits-models', action='store_true',
+                        help="fetch each part's complete Fits Models list over HTTP into the catalog and fits_models.json")
+    parser.add_argument('--fits-models-endpoint', default=None,
+                        help="models endpoint path template with {code}, {page} and {page_size}, for lists longer "
+                             f"than the page embeds (e.g. {FITS_MODELS_ENDPOINT} for mock_server.py)")
+    parser.add_argument('--fits-models-max', type=int, default=None,
+                        help="stop after this many models per part (default: all)")
+    parser.add_argument('--parser', choices=sorted(PARSER_BACKENDS), default=None,
+                        help="HTML parser for HTTP-fetched product pages (default: selectolax if installed, else lxml)")
+    parser.add_argument('--metrics-json', default=None,
+                        help="write a JSON metrics snapshot to this file every --metrics-interval seconds")
+    parser.add_argument('--metrics-prom', default=None,
+                        help="write Prometheus text-format metrics to this file (e.g. for node_exporter's textfile collector)")
+    parser.add_argument('--metrics-interval', type=float, default=30, help="seconds between metrics snapshots (default: 30)")
+    parser.add_argument('--pdf-mode', choices=['unique', 'all'], default=None,
+                        help="skip the interactive prompt: unique or all PDFs")
+    args = parser.parse_args()
+    base_url = args.base_url.rstrip('/')
+    url = f"{base_url}/trane/parts"  # Removed fragment for better compatibility
+    
+    if args.pdf_mode:
+        unique_pdfs = args.pdf_mode == 'unique'
+    else:
+        unique_pdfs = ask_pdf_mode()
+    
+    if args.shards > 1 and args.shard_index is None:
+        run_sharded(args, unique_pdfs)
+        return
     
+    scraper = build_scraper(args, unique_pdfs, shard_index=args.shard_index)
+    scraper.run(url, max_workers=args.workers, max_pages=args.max_pages, resume=args.resume,
+                incremental=args.incremental, ttl_days=args.ttl_days, metrics_interval=args.metrics_interval,
+                metrics_json=args.metrics_json, metrics_prom=args.metrics_prom, max_in_flight=args.max_in_flight,
+                pdf_index=args.pdf_index, catalog_index=args.catalog_index, retry_attempts=args.retry_attempts,
+                retry_delay=args.retry_delay)
+
+
+def build_scraper(args, unique_pdfs, shard_index=None):
+    """Create a scraper configured from the command-line arguments"""
+    rate_limiter = None
+    if shard_index is not None and args.shards > 1:
+        # The shards share the site; split the per-host request budget between them
+        rate_limiter = AdaptiveRateLimiter(rate=1.0 / args.shards, min_rate=0.1 / args.shards,
+                                           max_rate=10.0 / args.shards)
+    if args.load_everything:
+        browser_profile = BrowserProfile.unrestricted(headless=args.headless)
+    else:
+        browser_profile = BrowserProfile(page_load_strategy=args.page_load_strategy, headless=args.headless)
+    fits_models = None
+    if args.fits_models:
+        fits_models = ModelListFetcher(args.base_url.rstrip('/'), endpoint=args.fits_models_endpoint, max_models=args.fits_models_max)
+    return PartstownScraperSelenium(
+        base_url=args.base_url.rstrip('/'),
+        unique_pdfs=unique_pdfs,
+        browser_profile=browser_profile,
+        parser_backend=args.parser,
+        fits_models=fits_models,
+        catalog_format=None if args.catalog_format == 'none' else args.catalog_format,
+        catalog_parquet=args.parquet,
+        write_info_files=not args.no_info_files,
+        rate_limiter=rate_limiter,
+        shard_index=shard_index,
+        shard_count=args.shards,
+        circuit_breaker=CircuitBreaker(failure_rate=args.breaker_failure_rate, cooldown=args.breaker_cooldown),
+    )
+
+
+def run_sharded(args, unique_pdfs):
+    """Start one process per shard, wait for all of them and merge their catalogs"""
+    output_dir = "trane_parts"  # PartstownScraperSelenium.output_dir
+    argv = []
+    for flag, value in (('--base-url', args.base_url), ('--workers', args.workers), ('--max-pages', args.max_pages),
+                        ('--ttl-days', args.ttl_days), ('--catalog-format', args.catalog_format),
+                        ('--metrics-json', args.metrics_json), ('--metrics-prom', args.metrics_prom),
+                        ('--metrics-interval', args.metrics_interval), ('--parser', args.parser),
+                        ('--fits-models-max', args.fits_models_max), ('--max-in-flight', args.max_in_flight),
+                        ('--retry-attempts', args.retry_attempts), ('--retry-delay', args.retry_delay),
+                        ('--breaker-failure-rate', args.breaker_failure_rate),
+                        ('--breaker-cooldown', args.breaker_cooldown)):
+        if value is not None:
+            argv += [flag, str(value)]
+    argv += ['--page-load-strategy', args.page_load_strategy]
+    if args.fits_models_endpoint:
+        argv += ['--fits-models-endpoint', args.fits_models_endpoint]
+    for flag, enabled in (('--resume', args.resume), ('--incremental', args.incremental),
+                          ('--no-info-files', args.no_info_files), ('--headless', args.headless),
+                          ('--load-everything', args.load_everything), ('--fits-models', args.fits_models)):
+        if enabled:
+            argv.append(flag)
+    argv += ['--pdf-mode', 'unique' if unique_pdfs else 'all']
+    
+    exit_codes = launch_shards(args.shards, argv, script=os.path.abspath(__file__))
+    failed = [index for index, code in enumerate(exit_codes) if code != 0]
+    if failed:
+        print(f"Shard(s) {failed} failed; rerun with --resume to finish them before merging")
+        return
+    
+    print("\nMerging shard output...")
+    if args.catalog_format != 'none':
+        extension = 'sqlite3' if args.catalog_format == 'sqlite' else 'jsonl'
+        catalog_path = merge_catalog_files(os.path.join(output_dir, f'catalog.{extension}'), args.shards)
+        if catalog_path and args.parquet:
+            write_parquet(catalog_path, args.catalog_format, os.path.join(output_dir, 'catalog.parquet'))
+    removed_before = None
+    # Removals are only looked for on --incremental runs, as in a single-process crawl
+    if args.incremental and args.max_pages is None:
+        removed_before = listing_started(os.path.join(output_dir, 'crawl_state.sqlite3'), args.shards)
+        if removed_before is None:
+            print("Not every shard listed all of its pages; skipping removed-part detection")
+    removed = merge_listing_catalogs(os.path.join(output_dir, 'listing_catalog.json'), args.shards, removed_before)
+    if removed:
+        print(f"{len(removed)} part(s) no longer listed: {write_removed_report(removed, os.path.join(output_dir, 'changes'))}")
+        # Re-check their pages once to record the final state, like a single-process --incremental run
+        scraper = build_scraper(args, unique_pdfs)
+        scraper.run(f"{args.base_url.rstrip('/')}/trane/parts", max_workers=args.workers,
+                    metrics_interval=args.metrics_interval, max_in_flight=args.max_in_flight,
+                    retry_attempts=args.retry_attempts, retry_delay=args.retry_delay, recheck=removed)
+    if args.pdf_index:
+        update_pdf_index(output_dir)
+    if args.catalog_index:
+        update_catalog_index(output_dir)
+    print(f"All {args.shards} shards complete.")
+
+
+def ask_pdf_mode():
+    """Ask the user whether to keep unique PDFs only; returns True for unique"""
     # Ask user for PDF extraction preference
     print("\n" + "=" * 60)
     print("PDF EXTRACTION OPTION")
@@ -755,9 +1749,7 @@ def main():
         # If running non-interactively, default to unique
         unique_pdfs = True
         print("\nNon-interactive mode: Using unique PDFs (default)")
-    
-    scraper = PartstownScraperSelenium(unique_pdfs=unique_pdfs)
-    scraper.run(url)
+    return unique_pdfs
 
 
 if __name__ == "__main__":
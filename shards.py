@@ -0,0 +1,156 @@
+"""
+Multi-process sharded crawling
+
+`--shards N` starts N copies of the scraper, each with `--shard-index i`. Shard
+i crawls the listing pages where page % N == i and scrapes the parts it finds
+with its own driver pool. All shards write part folders into the same output
+tree and share the PDF store. Crawl state, the catalog and the listing catalog
+are kept per shard (`<name>.shard-<i>.<ext>`) and merged once every shard has
+finished.
+"""
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+from catalog_sink import ensure_schema
+from crawl_state import CrawlState
+from listing_catalog import ListingCatalog
+
+
+def owns_page(page, shard_index, shard_count):
+    """True if listing page belongs to the shard"""
+    return shard_count <= 1 or page % shard_count == shard_index
+
+
+def shard_path(path, shard_index):
+    """trane_parts/catalog.jsonl -> trane_parts/catalog.shard-2.jsonl"""
+    if shard_index is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard-{shard_index}{ext}"
+
+
+def launch_shards(shard_count, argv, script=None):
+    """Run one scraper process per shard with the given CLI arguments; returns their exit codes"""
+    script = script or os.path.abspath(sys.argv[0])
+    processes = []
+    for index in range(shard_count):
+        command = [sys.executable, script] + list(argv) + ['--shards', str(shard_count), '--shard-index', str(index)]
+        print(f"Starting shard {index + 1}/{shard_count}")
+        processes.append(subprocess.Popen(command, stdin=subprocess.DEVNULL))
+    return [process.wait() for process in processes]
+
+
+def _merge_jsonl(paths, dest):
+    with open(dest, 'a', encoding='utf-8') as out:
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    out.write(line)
+    return dest
+
+
+def _merge_sqlite(paths, dest):
+    conn = sqlite3.connect(dest)
+    try:
+        ensure_schema(conn)
+        for path in paths:
+            conn.execute("ATTACH DATABASE ? AS shard", (path,))
+            conn.execute("INSERT OR REPLACE INTO parts SELECT * FROM shard.parts")
+            conn.commit()
+            conn.execute("DETACH DATABASE shard")
+    finally:
+        conn.close()
+    return dest
+
+
+def merge_catalog_files(catalog_path, shard_count):
+    """Fold every shard's catalog file into catalog_path and remove the shard files"""
+    paths = [shard_path(catalog_path, index) for index in range(shard_count)]
+    paths = [path for path in paths if os.path.exists(path)]
+    if not paths:
+        return None
+    if catalog_path.endswith('.jsonl'):
+        _merge_jsonl(paths, catalog_path)
+    else:
+        _merge_sqlite(paths, catalog_path)
+    for path in paths:
+        os.remove(path)
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    return catalog_path
+
+
+def _entry_time(entry):
+    return max(entry.get('listed_at') or 0, entry.get('scraped_at') or 0, entry.get('removed_at') or 0)
+
+
+def listing_started(state_path, shard_count):
+    """
+    When the shards' listing crawl began, or None unless every shard listed all of its pages.
+
+    Each shard records listing_started on a fresh crawl and listing_complete once
+    none of its pages failed. A shard resumed after finishing its listing keeps
+    the listed_at times of the run that crawled it, so the earliest start is used.
+    """
+    started = []
+    for index in range(shard_count):
+        path = shard_path(state_path, index)
+        if not os.path.exists(path):
+            return None
+        state = CrawlState(path)
+        try:
+            complete = state.get_meta('listing_complete') == '1'
+            value = state.get_meta('listing_started')
+        finally:
+            state.close()
+        if not complete or value is None:
+            return None
+        started.append(float(value))
+    return min(started) if started else None
+
+
+def merge_listing_catalogs(catalog_path, shard_count, removed_before=None):
+    """
+    Merge the shards' listing catalogs (newest entry per URL wins) into catalog_path.
+
+    Shards cannot tell a removed part from one listed on another shard's pages,
+    so removals are detected here: with removed_before (see listing_started),
+    parts not listed by any shard since then are marked removed and pending a
+    re-check. Returns the removed entries.
+    """
+    merged = ListingCatalog(catalog_path)
+    shard_files = [shard_path(catalog_path, index) for index in range(shard_count)]
+    for path in shard_files:
+        if not os.path.exists(path):
+            continue
+        for url, entry in ListingCatalog(path).entries.items():
+            current = merged.entries.get(url)
+            if current is None or _entry_time(entry) >= _entry_time(current):
+                merged.entries[url] = entry
+
+    removed = []
+    if removed_before is not None:
+        for url, entry in merged.entries.items():
+            if not entry.get('removed_at') and (entry.get('listed_at') or 0) < removed_before:
+                entry['removed_at'] = time.time()
+                entry['pending'] = True
+                removed.append({'url': url, 'name': entry.get('name')})
+    merged.save()
+    for path in shard_files:
+        if os.path.exists(path):
+            os.remove(path)
+    return removed
+
+
+def write_removed_report(removed, directory):
+    """Record parts that dropped out of a sharded listing crawl"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"removed-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'removed': removed}, f, indent=1)
+    return path
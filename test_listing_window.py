@@ -0,0 +1,35 @@
+"""Listing pages are fetched through a bounded window, not all submitted up front"""
+import threading
+import time
+
+from scraper_selenium import PartstownScraperSelenium
+
+
+def test_listing_window_stays_bounded():
+    scraper = PartstownScraperSelenium()
+    lock = threading.Lock()
+    submitted = []
+
+    def fake_fetch(url, page, pool):
+        with lock:
+            submitted.append(page)
+        time.sleep(0.005)
+        return [{'name': f'P{page}', 'url': f'https://x/p{page}'}]
+
+    scraper._fetch_listing_page = fake_fetch
+    max_workers = 3
+    window = max_workers * 2
+    consumed = 0
+    peak = 0
+    pages = []
+    for page, parts in scraper._iter_listing_pages('https://x/trane/parts', range(1, 60), None, max_workers):
+        consumed += 1
+        # A slow consumer (e.g. a full PartFeed) must hold the listing back
+        time.sleep(0.01)
+        with lock:
+            peak = max(peak, len(submitted) - consumed)
+        pages.append(page)
+        assert parts == [{'name': f'P{page}', 'url': f'https://x/p{page}'}]
+
+    assert sorted(pages) == list(range(1, 60))
+    assert peak <= window
@@ -0,0 +1,23 @@
+"""Full-text search over the manual index"""
+from collections import Counter
+
+from pdf_index import PdfIndex, tokenize
+
+
+def test_query_stopwords_and_short_words_are_ignored(tmp_path):
+    index = PdfIndex(str(tmp_path / 'pdf_index.sqlite3'))
+    try:
+        index._add_manual('a' * 64, 'https://x/m1.pdf', 3,
+                          Counter(tokenize("Replace the contactor before checking the compressor fuse.")), None)
+        index._add_manual('b' * 64, 'https://x/m2.pdf', 2, Counter(tokenize("Compressor wiring diagram")), None)
+        index.conn.commit()
+
+        assert [hit['url'] for hit in index.search("replace the contactor")] == ['https://x/m1.pdf']
+        assert [hit['url'] for hit in index.search("compressor a fuse")] == ['https://x/m1.pdf']
+        assert len(index.search("compressor")) == 2
+        # Words that are indexable but missing still rule a manual out
+        assert index.search("compressor thermostat") == []
+        # A query made only of stopwords matches nothing rather than everything
+        assert index.search("the a of") == []
+    finally:
+        index.close()
@@ -0,0 +1,80 @@
+"""
+Compact set of URLs for deduplicating large listings
+
+A Python set of URL strings costs well over 100 bytes per entry (the string
+plus the hash table slot). UrlSet keeps only a 64-bit hash of each URL in an
+open-addressing table backed by array('Q'), 12-24 bytes per URL, so the
+scheduler stays small whether a crawl lists 36k parts or 1M.
+
+Two different URLs collide only if their 64-bit BLAKE2b hashes are equal; the
+chance of that happening anywhere in a million URLs is around 3e-8, and the
+cost would be one part treated as a duplicate.
+"""
+from array import array
+from hashlib import blake2b
+
+
+_EMPTY = 0
+
+
+def url_hash(url):
+    """Non-zero 64-bit hash of a URL (0 marks an empty slot)"""
+    value = int.from_bytes(blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little')
+    return value or 1
+
+
+class UrlSet:
+    def __init__(self, urls=(), capacity=1024, max_load=0.66):
+        size = 8
+        while size < capacity:
+            size *= 2
+        self.max_load = max_load
+        self._table = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+        for url in urls:
+            self.add(url)
+
+    def __len__(self):
+        return self._count
+
+    def _slot(self, value):
+        """Index of value's slot, or of the empty slot where it would go"""
+        table, mask = self._table, self._mask
+        index = value & mask
+        while True:
+            current = table[index]
+            if current == value or current == _EMPTY:
+                return index
+            index = (index + 1) & mask
+
+    def __contains__(self, url):
+        return self._table[self._slot(url_hash(url))] != _EMPTY
+
+    def add(self, url):
+        """Add url; returns True if it was not in the set yet"""
+        value = url_hash(url)
+        index = self._slot(value)
+        if self._table[index] != _EMPTY:
+            return False
+        self._table[index] = value
+        self._count += 1
+        if self._count > self.max_load * len(self._table):
+            self._grow()
+        return True
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def _grow(self):
+        old = self._table
+        self._table = array('Q', bytes(16 * len(old)))
+        self._mask = len(self._table) - 1
+        for value in old:
+            if value != _EMPTY:
+                self._table[self._slot(value)] = value
+
+    def memory_bytes(self):
+        """Size of the hash table"""
+        return self._table.itemsize * len(self._table)